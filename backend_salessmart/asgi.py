@@ -11,7 +11,28 @@ os.environ.setdefault(
     "backend_salessmart.settings_railway"
 )
 
-# 🔥 Railway no soporta Channels sin Redis → forzamos modo simple
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
 
-print("🌐 ASGI inicializado en modo simple (sin Channels)")
+# Importaciones condicionales para channels
+try:
+    from channels.auth import AuthMiddlewareStack
+    from channels.routing import ProtocolTypeRouter, URLRouter
+    HAS_CHANNELS = True
+except ImportError:
+    HAS_CHANNELS = False
+
+from django.conf import settings
+
+# WebSockets solo si hay una capa de canales configurada (CHANNEL_LAYERS);
+# 🔥 Railway no la define (no soporta Channels sin Redis) → modo simple
+if HAS_CHANNELS and getattr(settings, 'CHANNEL_LAYERS', None):
+    from sales.routing import websocket_urlpatterns
+
+    application = ProtocolTypeRouter({
+        "http": django_asgi_app,
+        "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+    })
+    print("🌐 ASGI inicializado con WebSockets (Channels)")
+else:
+    application = django_asgi_app
+    print("🌐 ASGI inicializado en modo simple (sin Channels)")
@@ -0,0 +1,136 @@
+"""
+Cola en memoria vaciada por un hilo en segundo plano.
+
+BackgroundWriter es la base de logs.audit.AuditWriter y sales.events.EventBus:
+submit() deja el elemento en una cola acotada y un hilo daemon la vacía por
+lotes (hasta batch_size elementos o batch_interval segundos desde el
+primero) llamando a process(). Cada proceso tiene su propia cola e hilo: se
+recrean después de un fork y se vacían al terminar (atexit). Antes de cada
+lote el hilo descarta su conexión a la base si quedó inutilizable o vencida,
+y la cierra al salir.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    thread_name = 'background-writer'
+    # Segundos que espera el hilo por el primer elemento antes de revisar si debe parar
+    idle_timeout = 1.0
+
+    def __init__(self, stats=()):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        # Los contadores los modifican el hilo de la petición y el del writer
+        self._stats_lock = threading.Lock()
+        self.stats = {name: 0 for name in stats}
+
+    # Configuración (las subclases la leen de settings)
+
+    def queue_size(self):
+        return 1000
+
+    def batch_size(self):
+        return 1
+
+    def batch_interval(self):
+        return 0
+
+    def process(self, batch):
+        raise NotImplementedError
+
+    # API
+
+    def submit(self, item):
+        """Encola item para el hilo; False si la cola de este proceso está llena."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            return False
+        return True
+
+    def flush(self):
+        """Procesa ahora, en este hilo, todo lo encolado en este proceso."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.process(batch)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    # Hilo
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            # Proceso nuevo (fork) o hilo caído: se arranca con una cola nueva
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size())
+                self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.idle_timeout)]
+        except queue.Empty:
+            return []
+        # Lote por tamaño o por tiempo, lo que llegue primero
+        batch_size = self.batch_size()
+        deadline = time.monotonic() + self.batch_interval()
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                # Descarta la conexión si la base se reinició o venció (CONN_MAX_AGE)
+                close_old_connections()
+                try:
+                    self.process(batch)
+                except Exception:
+                    logger.exception('%s: error procesando un lote', self.thread_name)
+        finally:
+            connection.close()
@@ -0,0 +1,232 @@
+"""
+Capa de canales sobre un archivo SQLite.
+
+Todos los procesos de la máquina (gunicorn, daphne/uvicorn, workers) que
+apuntan al mismo archivo comparten canales y grupos, así que un group_send
+hecho en un proceso llega a los WebSockets abiertos en otro. Sirve para
+desarrollo y despliegues de un solo host sin Redis (se activa con
+CHANNEL_LAYER=sqlite). receive() consulta la tabla cada poll_interval
+segundos con una lectura simple; el lock de escritura de SQLite solo se
+toma cuando hay un mensaje para retirar, así que los sockets inactivos no
+compiten con los que envían.
+
+Contrapresión por canal: cada canal admite hasta capacity mensajes
+pendientes (channel_capacity por patrón, como en channels). Un cliente lento
+que no los consume deja de recibir los nuevos (group_send los descarta en
+silencio, send levanta ChannelFull), salvo los que traen coalesce_key: si ya
+hay uno pendiente con la misma clave se reemplaza por el más reciente en
+lugar de encolar otro. Un canal con mensajes vencidos (nadie lo leyó en
+expiry segundos) sale de sus grupos.
+
+Los mensajes se guardan como JSON.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import string
+import threading
+import time
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    coalesce_key TEXT,
+    body TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_channel_idx ON messages (channel, id);
+CREATE TABLE IF NOT EXISTS group_members (
+    grp TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    joined REAL NOT NULL,
+    PRIMARY KEY (grp, channel)
+);
+CREATE INDEX IF NOT EXISTS group_members_channel_idx ON group_members (channel);
+"""
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(
+        self,
+        path='channels.sqlite3',
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        poll_interval=0.05,
+        cleanup_interval=5,
+        **kwargs
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self.stats = {'sent': 0, 'coalesced': 0, 'dropped': 0}
+        self._local = threading.local()
+        self._schema_ready = False
+        self._last_cleanup = 0.0
+
+    # Conexiones: una por hilo, en modo WAL para lectores y escritores concurrentes
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    async def _run(self, work):
+        return await asyncio.to_thread(self._transaction, work)
+
+    def _has_pending(self, channel):
+        # Lectura en autocommit (sin BEGIN IMMEDIATE): en WAL no bloquea ni espera a los escritores
+        return self._connection().execute(
+            'SELECT 1 FROM messages WHERE channel = ? AND expires > ? LIMIT 1', (channel, time.time())
+        ).fetchone() is not None
+
+    # Operaciones síncronas (dentro de una transacción)
+
+    def _enqueue(self, conn, channel, message, now):
+        """True si el mensaje quedó encolado (o reemplazó a uno pendiente), False si el canal está lleno."""
+        key = message.get('coalesce_key')
+        body = json.dumps(message)
+        if key is not None:
+            updated = conn.execute(
+                'UPDATE messages SET body = ?, expires = ? WHERE channel = ? AND coalesce_key = ? AND expires > ?',
+                (body, now + self.expiry, channel, str(key), now),
+            ).rowcount
+            if updated:
+                self.stats['coalesced'] += 1
+                return True
+        pending = conn.execute(
+            'SELECT COUNT(*) FROM messages WHERE channel = ? AND expires > ?', (channel, now)
+        ).fetchone()[0]
+        if pending >= self.get_capacity(channel):
+            self.stats['dropped'] += 1
+            return False
+        conn.execute(
+            'INSERT INTO messages (channel, coalesce_key, body, expires) VALUES (?, ?, ?, ?)',
+            (channel, None if key is None else str(key), body, now + self.expiry),
+        )
+        self.stats['sent'] += 1
+        return True
+
+    def _pop(self, conn, channel):
+        row = conn.execute(
+            'DELETE FROM messages WHERE id = ('
+            ' SELECT id FROM messages WHERE channel = ? AND expires > ? ORDER BY id LIMIT 1'
+            ') RETURNING body',
+            (channel, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _clean_expired(self, conn, now):
+        if now - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = now
+        # Un canal que no leyó sus mensajes a tiempo se considera desconectado
+        conn.execute(
+            'DELETE FROM group_members WHERE channel IN (SELECT channel FROM messages WHERE expires <= ?)', (now,)
+        )
+        conn.execute('DELETE FROM messages WHERE expires <= ?', (now,))
+        conn.execute('DELETE FROM group_members WHERE joined < ?', (now - self.group_expiry,))
+
+    # API de la capa de canales
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        assert "__asgi_channel__" not in message
+
+        def work(conn):
+            now = time.time()
+            self._clean_expired(conn, now)
+            return self._enqueue(conn, channel, message, now)
+
+        if not await self._run(work):
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+        while True:
+            if await asyncio.to_thread(self._has_pending, channel):
+                # Otro receptor pudo llevárselo entre la lectura y el DELETE: _pop devuelve None
+                message = await self._run(lambda conn: self._pop(conn, channel))
+                if message is not None:
+                    return message
+            await asyncio.sleep(self.poll_interval)
+
+    async def new_channel(self, prefix="specific."):
+        return "%s.sqlite!%s" % (
+            prefix,
+            "".join(random.choice(string.ascii_letters) for i in range(12)),
+        )
+
+    async def flush(self):
+        def work(conn):
+            conn.execute('DELETE FROM messages')
+            conn.execute('DELETE FROM group_members')
+        await self._run(work)
+
+    async def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        await self._run(lambda conn: conn.execute(
+            'INSERT OR REPLACE INTO group_members (grp, channel, joined) VALUES (?, ?, ?)',
+            (group, channel, time.time()),
+        ))
+
+    async def group_discard(self, group, channel):
+        assert self.valid_channel_name(channel), "Invalid channel name"
+        assert self.valid_group_name(group), "Invalid group name"
+        await self._run(lambda conn: conn.execute(
+            'DELETE FROM group_members WHERE grp = ? AND channel = ?', (group, channel)
+        ))
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Invalid group name"
+
+        def work(conn):
+            now = time.time()
+            self._clean_expired(conn, now)
+            channels = [row[0] for row in conn.execute(
+                'SELECT channel FROM group_members WHERE grp = ? AND joined >= ?', (group, now - self.group_expiry)
+            )]
+            # Canal lleno: el mensaje se descarta para ese cliente, los demás lo reciben
+            for channel in channels:
+                self._enqueue(conn, channel, message, now)
+
+        await self._run(work)
@@ -0,0 +1,83 @@
+"""
+Presupuesto de consultas SQL por petición.
+
+Cuenta las consultas y el tiempo de base de datos de cada petición y los
+devuelve en las cabeceras X-DB-Query-Count y X-DB-Time-Ms. Cada vista
+puede tener un tope en QUERY_BUDGETS (por nombre de ruta, p. ej.
+'returns-my-orders-for-return'); QUERY_BUDGET_DEFAULT aplica al resto.
+Si se supera el tope se agrega X-DB-Query-Budget-Exceeded y se registra
+un warning, o se lanza QueryBudgetExceeded con QUERY_BUDGET_STRICT (tests).
+
+Activo con QUERY_BUDGET_ENABLED (por defecto, igual que DEBUG). En las
+respuestas en streaming solo se cuentan las consultas hechas antes de
+empezar a enviar el cuerpo.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, view_name, count, budget):
+        self.view_name = view_name
+        self.count = count
+        self.budget = budget
+        super().__init__(f"{view_name}: {count} queries (budget {budget})")
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.count += 1
+
+
+def query_budget(view_name):
+    """Tope de consultas para la ruta view_name (None = sin tope)."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        response['X-DB-Query-Count'] = str(counter.count)
+        response['X-DB-Time-Ms'] = f"{counter.elapsed * 1000:.1f}"
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        budget = query_budget(view_name)
+        if budget is None:
+            return response
+        response['X-DB-Query-Budget'] = str(budget)
+        if counter.count > budget:
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(view_name, counter.count, budget)
+            response['X-DB-Query-Budget-Exceeded'] = 'true'
+            logger.warning(
+                "Query budget exceeded: %s %s (%s) ran %d queries, budget %d",
+                request.method, request.path, view_name, counter.count, budget,
+            )
+        return response
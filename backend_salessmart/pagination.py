@@ -0,0 +1,97 @@
+"""
+Paginación por cursor (keyset) para listados que crecen sin límite.
+
+KeysetPagination pide cada página con WHERE <campo> < <posición> ORDER BY
+... LIMIT, apoyada en un índice sobre el orden del ViewSet
+(cursor_ordering), así que la página 500 cuesta lo mismo que la 1: no hay
+OFFSET ni COUNT(*) por página.
+
+El total es opcional (?count=approx|exact|none). Por defecto se calcula
+aproximado solo en la primera página: en PostgreSQL, sin filtros, se lee
+la estimación de pg_class; si no, COUNT(*) acotado a
+PAGINATION_COUNT_CAP filas (count_is_approximate indica si se cortó).
+
+?page=N sigue funcionando con la paginación por número de página (con su
+OFFSET y COUNT) para los clientes que todavía la usan.
+"""
+from django.conf import settings
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+COUNT_MODES = ('approx', 'exact', 'none')
+
+
+def count_cap():
+    return getattr(settings, 'PAGINATION_COUNT_CAP', 10000)
+
+
+def _estimated_rows(queryset):
+    """Filas estimadas por el planificador de PostgreSQL (solo sin filtros), o None."""
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 (o 0) si la tabla nunca se analizó
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+def approximate_count(queryset, cap=None):
+    """(total, es_aproximado) sin recorrer más de cap filas."""
+    estimated = _estimated_rows(queryset)
+    if estimated is not None:
+        return estimated, True
+    cap = count_cap() if cap is None else cap
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class KeysetPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+    legacy_pagination_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = None
+        if request.query_params.get('page') is not None:
+            self.legacy = self.legacy_pagination_class()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        mode = request.query_params.get('count')
+        if mode not in COUNT_MODES:
+            mode = 'approx' if request.query_params.get(self.cursor_query_param) is None else 'none'
+        self.count = None
+        self.count_is_approximate = False
+        if mode == 'exact':
+            self.count = queryset.count()
+        elif mode == 'approx':
+            self.count, self.count_is_approximate = approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        # El ViewSet declara su orden (con desempate por id) en cursor_ordering
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is not None:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_approximate'] = self.count_is_approximate
+        payload.update({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+        return Response(payload)
@@ -72,6 +72,7 @@ INSTALLED_APPS = [
 
 # MIDDLEWARE
 MIDDLEWARE = [
+    'backend_salessmart.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -146,11 +147,39 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # WEBSOCKETS (Condicional)
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# CHANNEL_LAYER=memory (por defecto) solo dentro de un proceso; redis requiere channels_redis y
+# REDIS_URL; sqlite comparte canales y grupos entre los procesos de una máquina sin Redis (archivo
+# CHANNEL_LAYER_PATH, para desarrollo o pocos sockets: cada uno consulta el archivo periódicamente).
+# CHANNEL_LAYER_CAPACITY: mensajes pendientes por cliente antes de descartar (contrapresión).
+CHANNEL_LAYER = os.getenv('CHANNEL_LAYER', 'memory')
+CHANNEL_LAYER_CAPACITY = int(os.getenv('CHANNEL_LAYER_CAPACITY', '100'))
+if CHANNEL_LAYER == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')],
+                'capacity': CHANNEL_LAYER_CAPACITY,
+            },
+        }
+    }
+elif CHANNEL_LAYER == 'sqlite':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'backend_salessmart.channel_layers.SQLiteChannelLayer',
+            'CONFIG': {
+                'path': os.getenv('CHANNEL_LAYER_PATH', os.path.join(BASE_DIR, 'channels.sqlite3')),
+                'capacity': CHANNEL_LAYER_CAPACITY,
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': {'capacity': CHANNEL_LAYER_CAPACITY},
+        }
     }
-}
 
 # REST FRAMEWORK
 REST_FRAMEWORK = {
@@ -164,6 +193,70 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# IA: TrainView encola el entrenamiento para run_training_worker (proceso training_worker del
+# Procfile) y responde 202; IA_TRAINING_ASYNC=False entrena dentro de la petición (desarrollo)
+IA_TRAINING_ASYNC = os.getenv('IA_TRAINING_ASYNC', 'True') == 'True'
+# Núcleos usados al entrenar (-1 = todos); el modelo publicado predice con uno
+IA_TRAINING_N_JOBS = int(os.getenv('IA_TRAINING_N_JOBS', '-1'))
+# Árboles agregados por cada reentrenamiento incremental y tope del bosque
+IA_INCREMENTAL_ESTIMATORS = int(os.getenv('IA_INCREMENTAL_ESTIMATORS', '10'))
+IA_MAX_ESTIMATORS = int(os.getenv('IA_MAX_ESTIMATORS', '500'))
+
+# Bitácora: escritura en segundo plano por lotes (False = INSERT en la petición)
+AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', 'True') == 'True'
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+# Minutos que un carrito mantiene apartado el stock (release_expired_reservations lo libera)
+CART_RESERVATION_TTL_MINUTES = int(os.getenv('CART_RESERVATION_TTL_MINUTES', '15'))
+# Días de bitácora en la tabla; los meses anteriores se archivan con archive_logs
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '180'))
+# Segundos que se cachea "mis órdenes para devolución" (se invalida al cambiar órdenes/devoluciones)
+RETURNABLE_ORDERS_CACHE_SECONDS = int(os.getenv('RETURNABLE_ORDERS_CACHE_SECONDS', '60'))
+# Conteo de consultas por petición (cabeceras X-DB-*); topes por nombre de ruta
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', str(DEBUG)) == 'True'
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', '50'))
+QUERY_BUDGETS = {}
+# Eventos de órdenes por WebSocket: se publican tras el commit desde un hilo; cola llena = se descartan
+EVENT_BUS_ASYNC = os.getenv('EVENT_BUS_ASYNC', 'True') == 'True'
+EVENT_BUS_QUEUE_SIZE = int(os.getenv('EVENT_BUS_QUEUE_SIZE', '1000'))
+# Notificaciones de estado de órdenes: ventana de agrupación (ms), eventos máximos al reconectar
+# (más = 'resync') y días que se guardan los eventos (prune_order_events)
+NOTIFICATION_BATCH_WINDOW_MS = int(os.getenv('NOTIFICATION_BATCH_WINDOW_MS', '250'))
+NOTIFICATION_REPLAY_LIMIT = int(os.getenv('NOTIFICATION_REPLAY_LIMIT', '500'))
+ORDER_EVENT_RETENTION_DAYS = int(os.getenv('ORDER_EVENT_RETENTION_DAYS', '7'))
+# Paginación por cursor: tope de filas que cuenta el total aproximado de la primera página
+PAGINATION_COUNT_CAP = int(os.getenv('PAGINATION_COUNT_CAP', '10000'))
+# Descarga de comprobantes en lote: tope de órdenes y procesos que renderizan en paralelo
+RECEIPT_BATCH_MAX_ORDERS = int(os.getenv('RECEIPT_BATCH_MAX_ORDERS', '500'))
+RECEIPT_BATCH_WORKERS = int(os.getenv('RECEIPT_BATCH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Reportes: generación en run_report_worker (proceso report_worker del Procfile, 202 + status_url);
+# {"async": false} o REPORTS_ASYNC=False la hacen en la petición
+REPORTS_ASYNC = os.getenv('REPORTS_ASYNC', 'True') == 'True'
+REPORT_WORKER_CONCURRENCY = int(os.getenv('REPORT_WORKER_CONCURRENCY', '2'))
+# Segundos en PROCESSING tras los cuales un reporte se considera abandonado y vuelve a PENDING
+REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv('REPORT_JOB_TIMEOUT_SECONDS', '600'))
+# Días que se conservan los archivos exportados de reportes (gc_report_artifacts)
+REPORT_ARTIFACT_MAX_AGE_DAYS = int(os.getenv('REPORT_ARTIFACT_MAX_AGE_DAYS', '30'))
+# CACHE: 'reports' guarda resultados de reportes (LRU al llegar a MAX_ENTRIES, vencen a los TIMEOUT s).
+# Para compartirlo entre procesos: REPORT_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# y REPORT_CACHE_LOCATION con un directorio.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': os.getenv('REPORT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('REPORT_CACHE_LOCATION', 'salessmart-reports'),
+        'TIMEOUT': int(os.getenv('REPORT_CACHE_TTL', '300')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '200')),
+        },
+    },
+}
+
 # JWT CONFIGURACIÓN
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
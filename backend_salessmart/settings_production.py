@@ -163,7 +163,8 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    'reports': CACHES['reports'],
 }
 
 # Configuración de email (opcional)
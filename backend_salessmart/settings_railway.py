@@ -198,6 +198,10 @@ WSGI_APPLICATION = "backend_salessmart.wsgi.application"
 
 # ASGI solo si activas websockets
 # ASGI_APPLICATION = "backend_salessmart.asgi.application"
+# Railway no soporta Channels sin Redis: sin CHANNEL_LAYER=redis no hay capa de canales
+# (asgi en modo simple y los eventos de órdenes no se publican)
+if CHANNEL_LAYER != 'redis':
+    CHANNEL_LAYERS = {}
 
 
 # -------------------------------------------------------
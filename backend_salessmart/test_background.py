@@ -0,0 +1,49 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .background import BackgroundWriter
+
+
+class _Collector(BackgroundWriter):
+    def __init__(self):
+        super().__init__(stats=('processed',))
+        self.batches = []
+
+    def batch_size(self):
+        return 3
+
+    def process(self, batch):
+        self.batches.append(batch)
+        self.count('processed', len(batch))
+
+
+class BackgroundWriterTests(SimpleTestCase):
+    def test_thread_processes_in_batches_and_close_flushes(self):
+        writer = _Collector()
+        # Sin hilo que vacíe la cola: close() procesa lo pendiente en un lote
+        with mock.patch.object(BackgroundWriter, '_run'):
+            for i in range(4):
+                self.assertTrue(writer.submit(i))
+        writer.close()
+        self.assertEqual(writer.batches, [[0, 1, 2, 3]])
+
+        writer = _Collector()
+        for i in range(7):
+            writer.submit(i)
+        deadline = time.monotonic() + 5
+        while writer.stats['processed'] < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        self.assertEqual(sum(writer.batches, []), list(range(7)))
+        self.assertTrue(all(len(batch) <= 3 for batch in writer.batches))
+
+    def test_new_process_gets_a_new_queue(self):
+        writer = _Collector()
+        self.addCleanup(writer.close)
+        writer.submit(1)
+        first_queue = writer._queue
+        with mock.patch('os.getpid', return_value=-1):
+            writer.submit(2)
+            self.assertIsNot(writer._queue, first_queue)
@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.test import SimpleTestCase
+
+from .channel_layers import SQLiteChannelLayer
+
+
+def _group_send_from_other_process(path, group, message):
+    async_to_sync(SQLiteChannelLayer(path=path).group_send)(group, message)
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.path = str(Path(tmp) / 'channels.sqlite3')
+        self.layer = SQLiteChannelLayer(path=self.path, capacity=3, poll_interval=0.01)
+
+    def _receive(self, layer, channel):
+        return async_to_sync(layer.receive)(channel)
+
+    def test_group_send_reaches_channels_in_other_processes(self):
+        async_to_sync(self.layer.group_add)('orders', 'consumer.a')
+        async_to_sync(self.layer.group_add)('orders', 'consumer.b')
+        process = multiprocessing.Process(
+            target=_group_send_from_other_process,
+            args=(self.path, 'orders', {'type': 'order_created', 'order_id': 1}),
+        )
+        process.start()
+        process.join(10)
+        self.assertEqual(process.exitcode, 0)
+        for channel in ('consumer.a', 'consumer.b'):
+            self.assertEqual(self._receive(self.layer, channel)['order_id'], 1)
+
+    def test_slow_channel_drops_without_blocking_the_group(self):
+        async_to_sync(self.layer.group_add)('orders', 'slow')
+        async_to_sync(self.layer.group_add)('orders', 'fast')
+        for i in range(5):
+            async_to_sync(self.layer.group_send)('orders', {'type': 'x', 'n': i})
+            self.assertEqual(self._receive(self.layer, 'fast')['n'], i)
+        self.assertEqual([self._receive(self.layer, 'slow')['n'] for _ in range(3)], [0, 1, 2])
+        self.assertEqual(self.layer.stats['dropped'], 2)
+        for _ in range(3):
+            async_to_sync(self.layer.send)('direct', {'type': 'x'})
+        with self.assertRaises(ChannelFull):
+            async_to_sync(self.layer.send)('direct', {'type': 'x'})
+
+    def test_pending_events_with_the_same_key_are_coalesced(self):
+        async_to_sync(self.layer.group_add)('orders', 'slow')
+        for status in ('PAID', 'SHIPPED', 'DELIVERED'):
+            async_to_sync(self.layer.group_send)('orders', {'type': 'x', 'coalesce_key': 'order:1', 'status': status})
+        async_to_sync(self.layer.group_send)('orders', {'type': 'x', 'coalesce_key': 'order:2', 'status': 'PAID'})
+        self.assertEqual(self._receive(self.layer, 'slow')['status'], 'DELIVERED')
+        self.assertEqual(self._receive(self.layer, 'slow')['coalesce_key'], 'order:2')
+        self.assertEqual(self.layer.stats['coalesced'], 2)
+
+    def test_idle_receive_does_not_take_the_write_lock(self):
+        async def receive_for(channel, seconds):
+            try:
+                return await asyncio.wait_for(self.layer.receive(channel), seconds)
+            except asyncio.TimeoutError:
+                return None
+
+        with mock.patch.object(self.layer, '_transaction', wraps=self.layer._transaction) as transaction:
+            self.assertIsNone(async_to_sync(receive_for)('idle', 0.1))
+            transaction.assert_not_called()
+            async_to_sync(self.layer.send)('idle', {'type': 'x'})
+            sends = transaction.call_count
+            self.assertEqual(async_to_sync(receive_for)('idle', 1)['type'], 'x')
+            self.assertEqual(transaction.call_count, sends + 1)
+
+    def test_expired_channel_leaves_its_groups(self):
+        layer = SQLiteChannelLayer(path=self.path, expiry=0, cleanup_interval=0)
+        async_to_sync(layer.group_add)('orders', 'gone')
+        async_to_sync(layer.group_send)('orders', {'type': 'x'})
+        async_to_sync(layer.group_send)('orders', {'type': 'x'})
+        self.assertEqual(layer.stats['sent'], 1)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from sales.models import Order
+from users.models import User
+from .pagination import approximate_count
+
+
+@override_settings(AUDIT_ASYNC=False)
+class KeysetPaginationTests(TestCase):
+    URL = '/api/v1/ordenes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('cursor_admin', 'cursor@example.com', 'x')
+        customer = User.objects.create_user('cursor_client', 'cc@example.com', 'x', role='CLIENT')
+        created_at = timezone.now()
+        for i in range(7):
+            order = Order.objects.create(user=customer, total=Decimal('1.00'), address='x')
+            # Dos órdenes por instante: el desempate por id no debe repetir ni saltar filas
+            Order.objects.filter(pk=order.pk).update(created_at=created_at - timedelta(minutes=i // 2))
+        cls.expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_walks_every_row_once_and_counts_only_the_first_page(self):
+        response = self.client.get(self.URL, {'page_size': 2}).json()
+        self.assertEqual((response['count'], response['count_is_approximate']), (7, False))
+        seen = [row['id'] for row in response['results']]
+        while response['next']:
+            response = self.client.get(response['next']).json()
+            self.assertNotIn('count', response)
+            seen += [row['id'] for row in response['results']]
+        self.assertEqual(seen, self.expected)
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        first = self.client.get(self.URL, {'page_size': 2, 'count': 'none'})
+        with CaptureQueriesContext(connection) as first_ctx:
+            self.client.get(self.URL, {'page_size': 2, 'count': 'none'})
+        next_url = first.json()['next']
+        for _ in range(2):
+            next_url = self.client.get(next_url).json()['next']
+        with CaptureQueriesContext(connection) as deep_ctx:
+            self.client.get(next_url)
+        self.assertEqual(len(deep_ctx.captured_queries), len(first_ctx.captured_queries))
+        self.assertFalse(any('OFFSET' in q['sql'] for q in deep_ctx.captured_queries))
+        self.assertFalse(any('COUNT' in q['sql'] for q in deep_ctx.captured_queries))
+
+    def _exact_counts(self, params):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.URL, params)
+        # El conteo aproximado se acota con LIMIT cap + 1; el exacto recorre la tabla
+        return [q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql'] and 'LIMIT' not in q['sql']]
+
+    def test_approx_count_does_not_run_an_exact_count(self):
+        self.assertEqual(self._exact_counts({'page_size': 2}), [])
+        self.assertEqual(self._exact_counts({'page_size': 2, 'count': 'approx'}), [])
+        self.assertEqual(len(self._exact_counts({'page_size': 2, 'count': 'exact'})), 1)
+
+    def test_page_number_still_supported(self):
+        response = self.client.get(self.URL, {'page': 1}).json()
+        self.assertEqual(response['count'], 7)
+        self.assertEqual([row['id'] for row in response['results']], self.expected)
+        self.assertNotIn('count_is_approximate', response)
+
+    def test_approximate_count_is_capped(self):
+        self.assertEqual(approximate_count(Order.objects.all(), cap=3), (3, True))
+        self.assertEqual(approximate_count(Order.objects.filter(pk__in=self.expected[:2]), cap=3), (2, False))
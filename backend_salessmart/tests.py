@@ -0,0 +1,232 @@
+"""
+Presupuestos de consultas por endpoint (QueryBudgetMiddleware).
+
+Cada ruta GET de los routers de backend_salessmart/urls.py tiene un tope
+en BUDGETS. Las peticiones corren con QUERY_BUDGET_STRICT, así que un
+N+1 nuevo hace fallar el test con QueryBudgetExceeded. Los topes están
+medidos con los datos de setUpTestData; si una optimización los baja,
+bajar también el número aquí.
+
+    python -m pytest backend_salessmart
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from logistics.models import Alert, InventoryMovement as StockMovement, Recommendation
+from logs.models import LogEntry
+from posventa.models import Return as PosventaReturn
+from products.models import Category, InventoryMovement, Price, Product
+from reports.models import GeneratedReport, ReportTemplate
+from sales.models import Cart, CartItem, Order, OrderItem, Return
+from users.models import User
+
+from .middleware import QueryBudgetExceeded
+
+# Topes por nombre de ruta. Los marcados con N+1 crecen con los datos.
+BUDGETS = {
+    'category-list': 2,
+    'product-list': 9,
+    'price-list': 2,
+    'inventorymovement-list': 8,
+    'user-management-list': 2,
+    'user-detail-list': 2,
+    'clientes-list': 2,
+    'cart-list': 9,  # N+1: total del CartSerializer
+    'cart-en-list': 9,  # N+1: total del CartSerializer
+    'order-list': 14,
+    'order-historial': 14,
+    'ventas-list': 14,
+    'ventas-historial': 14,
+    'order-management-list': 38,  # N+1
+    'order-management-alt-list': 38,  # N+1
+    # Sin ids ni fechas responde 400 antes de consultar
+    'order-management-comprobantes': 0,
+    'order-management-alt-comprobantes': 0,
+    'returns-list': 38,  # N+1
+    'returns-my-orders-for-return': 4,
+    'returns-available-orders': 15,  # N+1: ítems y devolución de cada orden (posventa)
+    'alert-list': 2,
+    'recommendation-list': 2,
+    'inventory-list': 8,
+    'alertas-list': 2,
+    'recomendaciones-list': 2,
+    'warranty-list': 42,  # N+1
+    'return-management-list': 29,  # N+1
+    'warranty-management-list': 42,  # N+1
+    'warranty-management-active': 55,  # N+1
+    'warranty-management-expired': 1,
+    'report-templates-list': 2,
+    'reports-list': 3,
+    'reports-cache-stats': 0,
+    'logentry-list': 2,
+    'logentry-export': 1,
+    'reports-generate-predefined': 4,
+}
+
+# Respuesta esperada del administrador cuando no es 200 (la ruta responde sin consultar)
+EXPECTED_STATUS = {
+    'order-management-comprobantes': 400,
+    'order-management-alt-comprobantes': 400,
+}
+
+
+def _walk(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern
+
+
+def router_get_routes():
+    """(ruta, nombre) de las rutas GET de colección de los ViewSets."""
+    routes = {}
+    for route, pattern in _walk(get_resolver().url_patterns):
+        actions = getattr(pattern.callback, 'actions', None)
+        if not actions or 'get' not in actions:
+            continue
+        path = '/' + route.replace('^', '').replace('$', '')
+        # Solo colección: las de detalle llevan pk y las de formato .json/.api
+        if '(?P<' in path or '<' in path:
+            continue
+        routes[path] = pattern.name
+    return sorted(routes.items())
+
+
+@override_settings(
+    QUERY_BUDGET_ENABLED=True,
+    QUERY_BUDGET_STRICT=True,
+    QUERY_BUDGETS=BUDGETS,
+    QUERY_BUDGET_DEFAULT=None,
+    AUDIT_ASYNC=False,
+)
+class QueryBudgetTests(TestCase):
+    CUSTOMERS = 3
+    ORDERS_PER_CUSTOMER = 3
+    PRODUCTS = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('budget_admin', 'admin@example.com', 'x')
+        cls.operator = User.objects.create_user('budget_operator', 'op@example.com', 'x', role='OPERATOR')
+        cls.customers = [
+            User.objects.create_user(f'budget_client{i}', f'client{i}@example.com', 'x', role='CLIENT')
+            for i in range(cls.CUSTOMERS)
+        ]
+
+        categories = [Category.objects.create(name=f'Categoría {i}') for i in range(2)]
+        products = [
+            Product.objects.create(
+                name=f'Producto {i}',
+                category=categories[i % 2],
+                sku=f'BUDGET-{i}',
+                price=Decimal('100.00') + i,
+                stock=50,
+            )
+            for i in range(cls.PRODUCTS)
+        ]
+        now = timezone.now()
+        for product in products:
+            Price.objects.create(product=product, price=product.price, fecha_inicio=now)
+            InventoryMovement.objects.create(
+                product=product, quantity=5, movement_type='IN', reason='Carga inicial', user=cls.admin
+            )
+            StockMovement.objects.create(producto=product, tipo_movimiento='ENTRADA', cantidad=5)
+            Alert.objects.create(product=product, alert_type='LOW_STOCK', message='Stock bajo')
+            Recommendation.objects.create(product=product, recommended_stock=10, reason='Demanda', priority='HIGH')
+
+        for customer in cls.customers:
+            cart = Cart.objects.create(user=customer)
+            for product in products[:3]:
+                CartItem.objects.create(cart=cart, product=product, quantity=1)
+            for n in range(cls.ORDERS_PER_CUSTOMER):
+                order = Order.objects.create(
+                    user=customer,
+                    status='DELIVERED' if n % 2 == 0 else 'PAID',
+                    total=Decimal('300.00'),
+                    address='Calle 1',
+                )
+                items = [
+                    OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+                    for product in products[n:n + 3]
+                ]
+                order.create_warranties()
+                Return.objects.create(
+                    order=order, order_item=items[0], user=customer,
+                    reason='DEFECTIVE', description='No enciende',
+                )
+                PosventaReturn.objects.create(order=order, product=items[1].product, quantity=1, reason='Dañado')
+
+        template = ReportTemplate.objects.create(
+            name='Clientes', description='Clientes', category='CUSTOMERS', query_template='customers'
+        )
+        cls.template = template
+        GeneratedReport.objects.create(
+            user=cls.admin, template=template, title='Clientes', query_text='-', query_sql='-',
+            format='JSON', status='COMPLETED',
+        )
+        LogEntry.objects.bulk_create([
+            LogEntry(user=cls.admin, ip_address='127.0.0.1', action=f'GET /api/v1/{i}/',
+                     timestamp=now - timedelta(minutes=i))
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        # Los topes se miden sin cache
+        for cache in caches.all():
+            cache.clear()
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _users(self):
+        return [self.admin, self.operator, self.customers[0]]
+
+    def test_every_router_route_has_a_budget(self):
+        missing = sorted({name for _, name in router_get_routes()} - set(BUDGETS))
+        self.assertEqual(missing, [], 'Rutas sin tope en BUDGETS')
+
+    def test_router_routes_within_budget(self):
+        for path, name in router_get_routes():
+            for user in self._users():
+                with self.subTest(path=path, user=user.username):
+                    try:
+                        response = self._client(user).get(path)
+                    except QueryBudgetExceeded as e:
+                        self.fail(str(e))
+                    if user is self.admin:
+                        self.assertEqual(response.status_code, EXPECTED_STATUS.get(name, 200))
+                    else:
+                        self.assertLess(response.status_code, 500)
+
+    def test_customers_report_within_budget(self):
+        response = self._client(self.admin).post(
+            '/api/v1/reports/generate_predefined/', {'template_id': self.template.id, 'async': False}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content[:500])
+
+    def test_headers(self):
+        response = self._client(self.admin).get('/api/v1/categorias/')
+        self.assertIn('X-DB-Query-Count', response)
+        self.assertIn('X-DB-Time-Ms', response)
+        self.assertEqual(response['X-DB-Query-Budget'], str(BUDGETS['category-list']))
+
+    @override_settings(QUERY_BUDGET_STRICT=False, QUERY_BUDGETS={'category-list': 0})
+    def test_exceeded_budget_is_reported_when_not_strict(self):
+        with self.assertLogs('backend_salessmart.middleware', level='WARNING'):
+            response = self._client(self.admin).get('/api/v1/categorias/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-DB-Query-Budget-Exceeded'], 'true')
+
+    @override_settings(QUERY_BUDGETS={'category-list': 0})
+    def test_exceeded_budget_raises_when_strict(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self._client(self.admin).get('/api/v1/categorias/')
@@ -7,7 +7,7 @@ from permissions import IsAdmin
 from django.conf import settings
 from django.core.management import call_command
 from django.utils import timezone
-from logs.models import LogEntry
+from logs.audit import audit_writer
 import os
 import io
 import zipfile
@@ -145,7 +145,7 @@ def create_backup(request):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"ERROR: Backup fallo error={str(e)}"
@@ -161,7 +161,7 @@ def create_backup(request):
             ip = ip.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        LogEntry.objects.create(
+        audit_writer.log(
             ip_address=ip or 'IP_UNKNOWN',
             user=request.user,
             action=f"Backup creado file={zip_name}"
@@ -183,7 +183,7 @@ def download_backup(request, filename: str):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"ERROR: Backup no encontrado file={filename}"
@@ -198,7 +198,7 @@ def download_backup(request, filename: str):
             ip = ip.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        LogEntry.objects.create(
+        audit_writer.log(
             ip_address=ip or 'IP_UNKNOWN',
             user=request.user,
             action=f"Backup descargado file={path.name}"
@@ -247,7 +247,7 @@ def restore_backup(request):
             else:
                 ip = request.META.get('REMOTE_ADDR')
             origen = f"upload:{getattr(upload, 'name', '')}" if upload else f"filename:{filename}"
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"ERROR: Backup restaurar fallo origen={origen} error={str(e)}"
@@ -263,7 +263,7 @@ def restore_backup(request):
         else:
             ip = request.META.get('REMOTE_ADDR')
         origen = f"upload:{getattr(upload, 'name', '')}" if upload else f"filename:{filename}"
-        LogEntry.objects.create(
+        audit_writer.log(
             ip_address=ip or 'IP_UNKNOWN',
             user=request.user,
             action=f"Backup restaurado origen={origen}"
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import ModeloConfiguracion, TrainingSession, HistoricalSale
+from .models import ModeloConfiguracion, TrainingSession, HistoricalSale, TrainingJob, DailyDemand
 
 # Register your models here.
 admin.site.register(ModeloConfiguracion)
 admin.site.register(TrainingSession)
 admin.site.register(HistoricalSale)
+admin.site.register(TrainingJob)
+admin.site.register(DailyDemand)
@@ -0,0 +1,141 @@
+"""
+Mantenimiento de DailyDemand, el agregado producto x día de HistoricalSale.
+
+Las órdenes pagadas o entregadas se registran como HistoricalSale (una fila
+por producto y orden) y solo se recalculan las celdas (producto, día)
+afectadas. rebuild_daily_demand reconstruye la tabla completa después de
+cargas masivas.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DailyDemand, HistoricalSale
+
+# Estados en los que una orden cuenta como venta
+SOLD_STATUSES = ('PAID', 'DELIVERED')
+DEMAND_WINDOWS = (7, 30, 90)
+BATCH_SIZE = 5000
+
+
+def refresh_daily_demand(cells):
+    """
+    Recalcula las celdas (product_id, date) indicadas a partir de
+    HistoricalSale. Las celdas sin ventas se eliminan.
+    """
+    cells = set(cells)
+    if not cells:
+        return 0
+    product_ids = {product_id for product_id, _ in cells}
+    dates = {day for _, day in cells}
+
+    totals = {
+        (row['product_id'], row['date']): row['total']
+        for row in HistoricalSale.objects.filter(product_id__in=product_ids, date__in=dates)
+        .values('product_id', 'date')
+        .annotate(total=Sum('quantity'))
+    }
+    rows = [
+        DailyDemand(product_id=product_id, date=day, quantity=totals[(product_id, day)])
+        for product_id, day in cells
+        if (product_id, day) in totals
+    ]
+
+    with transaction.atomic():
+        if rows:
+            DailyDemand.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['product', 'date'],
+                update_fields=['quantity', 'updated_at'],
+                batch_size=BATCH_SIZE,
+            )
+        empty = [cell for cell in cells if cell not in totals]
+        if empty:
+            condition = Q()
+            for product_id, day in empty:
+                condition |= Q(product_id=product_id, date=day)
+            DailyDemand.objects.filter(condition).delete()
+    return len(rows)
+
+
+def rebuild_daily_demand():
+    """Reconstruye DailyDemand completa con una sola agregación sobre HistoricalSale."""
+    aggregated = (
+        HistoricalSale.objects.values('product_id', 'date')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    now = timezone.now()
+    created = 0
+    with transaction.atomic():
+        DailyDemand.objects.all().delete()
+        while True:
+            batch = [
+                DailyDemand(product_id=row['product_id'], date=row['date'], quantity=row['total'], updated_at=now)
+                for row in islice(aggregated, BATCH_SIZE)
+            ]
+            if not batch:
+                break
+            DailyDemand.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def record_order_sales(order):
+    """
+    Registra los ítems de una orden pagada/entregada en HistoricalSale y
+    actualiza DailyDemand. Es idempotente: una orden que pasa de PAID a
+    DELIVERED no se cuenta dos veces.
+    """
+    if HistoricalSale.objects.filter(order=order).exists():
+        return 0
+    day = timezone.localdate(order.created_at)
+    quantities = {}
+    for product_id, quantity in order.items.values_list('product_id', 'quantity'):
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    if not quantities:
+        return 0
+
+    HistoricalSale.objects.bulk_create(
+        [HistoricalSale(order=order, product_id=product_id, date=day, quantity=quantity)
+         for product_id, quantity in quantities.items()],
+        ignore_conflicts=True,
+    )
+    refresh_daily_demand((product_id, day) for product_id in quantities)
+    return len(quantities)
+
+
+def remove_order_sales(order):
+    """Quita las ventas de una orden cancelada y actualiza DailyDemand."""
+    sales = HistoricalSale.objects.filter(order=order)
+    cells = set(sales.values_list('product_id', 'date'))
+    if not cells:
+        return 0
+    sales.delete()
+    refresh_daily_demand(cells)
+    return len(cells)
+
+
+def demand_windows(product_ids=None, as_of=None, windows=DEMAND_WINDOWS):
+    """
+    Demanda acumulada de los últimos N días (7/30/90 por defecto) por
+    producto, en una sola consulta sobre DailyDemand:
+    {product_id: {'last_7': .., 'last_30': .., 'last_90': ..}}.
+    Los productos sin ventas en la ventana más larga no aparecen.
+    """
+    as_of = as_of or timezone.localdate()
+    queryset = DailyDemand.objects.filter(date__gt=as_of - timedelta(days=max(windows)), date__lte=as_of)
+    if product_ids is not None:
+        queryset = queryset.filter(product_id__in=product_ids)
+    sums = {
+        f'last_{days}': Coalesce(Sum('quantity', filter=Q(date__gt=as_of - timedelta(days=days))), 0)
+        for days in windows
+    }
+    rows = queryset.values('product_id').annotate(**sums).order_by()
+    return {row.pop('product_id'): row for row in rows}
@@ -0,0 +1,109 @@
+"""
+Motor de inferencia por lotes para el modelo de demanda (ia_model.pkl).
+
+En lugar de construir un DataFrame de una fila y llamar a model.predict por
+cada par (fecha, producto), se arma la matriz completa de features en NumPy
+y se predice por bloques.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import pandas as pd
+    import numpy as np
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    pd = None
+    np = None
+
+from products.models import Product
+
+FEATURES = ['month', 'day_of_week', 'product_id', 'category_id']
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def load_product_catalog(queryset=None):
+    """
+    Devuelve (ids, category_ids, names) de los productos con una sola consulta
+    values_list, sin tocar product.category fila por fila.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    rows = list(queryset.order_by('id').values_list('id', 'category_id', 'name'))
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    category_ids = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    names = [r[2] for r in rows]
+    return ids, category_ids, names
+
+
+def build_feature_matrix(dates, product_ids, category_ids):
+    """
+    Matriz (len(dates) * len(product_ids), 4) en orden fecha-mayor, con las
+    columnas de FEATURES. Fila i -> fecha i // n_products, producto i % n_products.
+    """
+    dates = pd.DatetimeIndex(dates)
+    n_dates, n_products = len(dates), len(product_ids)
+    X = np.empty((n_dates * n_products, len(FEATURES)), dtype=np.int64)
+    X[:, 0] = np.repeat(dates.month.to_numpy(), n_products)
+    X[:, 1] = np.repeat(dates.dayofweek.to_numpy(), n_products)
+    X[:, 2] = np.tile(product_ids, n_dates)
+    X[:, 3] = np.tile(category_ids, n_dates)
+    return X
+
+
+def predict_matrix(model, X, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Predice X por bloques de chunk_size filas. Genera (offset, predicciones)
+    para que el llamador pueda ir emitiendo resultados a medida que salen.
+    """
+    for start in range(0, len(X), chunk_size):
+        block = pd.DataFrame(X[start:start + chunk_size], columns=FEATURES)
+        yield start, model.predict(block)
+
+
+def iter_predictions(model, dates, product_ids, category_ids, names, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Genera un dict por cada par (fecha, producto) con el mismo formato que
+    devolvía PredictView, calculando las predicciones en bloques.
+    """
+    dates = pd.DatetimeIndex(dates)
+    n_products = len(product_ids)
+    if n_products == 0 or len(dates) == 0:
+        return
+    iso_dates = [d.date().isoformat() for d in dates]
+    X = build_feature_matrix(dates, product_ids, category_ids)
+    for start, preds in predict_matrix(model, X, chunk_size):
+        for offset, pred in enumerate(np.round(preds, 2).tolist()):
+            row = start + offset
+            p = row % n_products
+            yield {
+                'date': iso_dates[row // n_products],
+                'product_id': int(product_ids[p]),
+                'product_name': names[p],
+                'predicted_quantity': pred,
+            }
+
+
+def forecast_horizon(model, product_ids, category_ids, start_date, horizon=30,
+                     quantiles=(0.5, 0.9), chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Predice la grilla completa (horizon días x productos) con predict_matrix
+    y resume la demanda diaria por producto. Devuelve un dict de arreglos
+    alineados con product_ids: 'mean', 'peak' y 'q50', 'q90', ... según
+    quantiles.
+    """
+    dates = pd.date_range(start=start_date, periods=horizon, freq='D')
+    n_products = len(product_ids)
+    X = build_feature_matrix(dates, product_ids, category_ids)
+    preds = np.empty(len(X), dtype=np.float64)
+    for start, block in predict_matrix(model, X, chunk_size):
+        preds[start:start + len(block)] = block
+
+    # Date-major layout: row d holds the predictions of every product for day d
+    grid = preds.reshape(horizon, n_products)
+    summary = {
+        'mean': grid.mean(axis=0),
+        'peak': grid.max(axis=0),
+    }
+    for q in quantiles:
+        summary[f'q{round(q * 100)}'] = np.quantile(grid, q, axis=0)
+    return summary
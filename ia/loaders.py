@@ -0,0 +1,111 @@
+"""
+Carga de ventas (HistoricalSale o el agregado DailyDemand, que comparten las
+columnas date/product/quantity) para entrenamiento sin pasar por listas de dicts.
+
+Las filas se leen por bloques con values_list().iterator() (cursor del lado
+del servidor en PostgreSQL) y se copian a arreglos NumPy preasignados con
+tipos compactos.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import pandas as pd
+    import numpy as np
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    pd = None
+    np = None
+
+from datetime import date
+from itertools import islice
+
+from django.db.models import Count, Max
+
+from .inference import FEATURES
+from .models import HistoricalSale
+
+DEFAULT_CHUNK_SIZE = 20000
+UINT16_MAX = 65535
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def load_sales_arrays(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Devuelve un dict de arreglos NumPy con las columnas de HistoricalSale
+    (o DailyDemand, según el queryset): id (int64), date (datetime64[D]), product_id / category_id (int32) y
+    quantity (uint16, o uint32 si algún valor no entra en 16 bits).
+    """
+    if queryset is None:
+        queryset = HistoricalSale.objects.all()
+
+    # Size the arrays up front; rows inserted after this point are ignored
+    stats = queryset.aggregate(n=Count('id'), max_id=Max('id'), max_quantity=Max('quantity'))
+    n = stats['n'] or 0
+    quantity_dtype = np.uint16 if (stats['max_quantity'] or 0) <= UINT16_MAX else np.uint32
+
+    arrays = {
+        'id': np.empty(n, dtype=np.int64),
+        'date': np.empty(n, dtype='datetime64[D]'),
+        'product_id': np.empty(n, dtype=np.int32),
+        'category_id': np.empty(n, dtype=np.int32),
+        'quantity': np.empty(n, dtype=quantity_dtype),
+    }
+    if n == 0:
+        return arrays
+
+    rows = (
+        queryset.filter(id__lte=stats['max_id'])
+        .order_by('id')
+        .values_list('id', 'date', 'product_id', 'product__category_id', 'quantity')
+        .iterator(chunk_size=chunk_size)
+    )
+    filled = 0
+    while filled < n:
+        chunk = list(islice(rows, min(chunk_size, n - filled)))
+        if not chunk:
+            break
+        ids, dates, product_ids, category_ids, quantities = zip(*chunk)
+        end = filled + len(chunk)
+        arrays['id'][filled:end] = ids
+        arrays['date'][filled:end] = (
+            np.fromiter(map(date.toordinal, dates), dtype=np.int64, count=len(dates)) - EPOCH_ORDINAL
+        ).astype('datetime64[D]')
+        arrays['product_id'][filled:end] = product_ids
+        arrays['category_id'][filled:end] = category_ids
+        arrays['quantity'][filled:end] = quantities
+        filled = end
+
+    # Rows deleted while streaming leave the tail unfilled
+    if filled < n:
+        arrays = {name: values[:filled] for name, values in arrays.items()}
+    return arrays
+
+
+def date_features(dates):
+    """(month, day_of_week) como uint8 a partir de datetime64[D], lunes = 0."""
+    days = dates.astype(np.int64)
+    month = (dates.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.uint8)
+    # 1970-01-01 was a Thursday (weekday 3)
+    day_of_week = ((days + 3) % 7).astype(np.uint8)
+    return month, day_of_week
+
+
+def load_training_frame(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    DataFrame de features (columnas FEATURES) y serie objetivo quantity, con
+    los mismos valores que construía TrainView pero tipos compactos.
+    """
+    return training_frame(load_sales_arrays(queryset, chunk_size))
+
+
+def training_frame(arrays):
+    """(X, y) a partir de los arreglos de load_sales_arrays, fila por fila."""
+    month, day_of_week = date_features(arrays['date'])
+    X = pd.DataFrame({
+        'month': month,
+        'day_of_week': day_of_week,
+        'product_id': arrays['product_id'],
+        'category_id': arrays['category_id'],
+    }, columns=FEATURES, copy=False)
+    y = pd.Series(arrays['quantity'], name='quantity', copy=False)
+    return X, y
@@ -0,0 +1,115 @@
+import multiprocessing
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ia.loaders import HAS_ML_LIBS, load_training_frame
+from ia.models import HistoricalSale
+from products.models import Product
+
+if HAS_ML_LIBS:
+    import numpy as np
+    import pandas as pd
+
+SEED_BATCH = 50000
+
+
+def _load_legacy(queryset):
+    """Carga original de TrainView: lista de dicts y DataFrame de tipo object."""
+    sales = queryset.values('date', 'product__id', 'product__category__id', 'quantity')
+    df = pd.DataFrame(list(sales))
+    df['date'] = pd.to_datetime(df['date'])
+    df['month'] = df['date'].dt.month
+    df['day_of_week'] = df['date'].dt.dayofweek
+    df['product_id'] = df['product__id']
+    df['category_id'] = df['product__category__id']
+    return df[['month', 'day_of_week', 'product_id', 'category_id']], df['quantity']
+
+
+def _load_chunked(queryset):
+    return load_training_frame(queryset)
+
+
+LOADERS = {
+    'legacy': _load_legacy,
+    'chunked': _load_chunked,
+}
+
+
+def _peak_rss_bytes():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _measure(loader_name, max_id, results):
+    """Se ejecuta en un proceso hijo para que el pico de RSS sea independiente."""
+    connections.close_all()
+    baseline = _peak_rss_bytes()
+    start = time.perf_counter()
+    X, y = LOADERS[loader_name](HistoricalSale.objects.filter(id__lte=max_id))
+    elapsed = time.perf_counter() - start
+    results.put({
+        'rows': len(X),
+        'seconds': elapsed,
+        'peak_rss_delta': _peak_rss_bytes() - baseline,
+        'frame_bytes': int(X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo de carga y pico de RSS del cargador por bloques frente a la carga original.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 5000000, 20000000])
+        parser.add_argument('--loaders', nargs='+', choices=sorted(LOADERS), default=sorted(LOADERS))
+        parser.add_argument('--seed', action='store_true',
+                            help='Inserta HistoricalSale sintéticos hasta cubrir el tamaño mayor.')
+
+    def handle(self, *args, **options):
+        if not HAS_ML_LIBS:
+            raise CommandError('pandas y numpy son necesarios para el benchmark')
+
+        sizes = sorted(options['rows'])
+        available = HistoricalSale.objects.count()
+        if available < sizes[-1]:
+            if not options['seed']:
+                raise CommandError(
+                    f'Solo hay {available} filas de HistoricalSale; use --seed para generar {sizes[-1]}'
+                )
+            self._seed(sizes[-1] - available)
+
+        ctx = multiprocessing.get_context('fork')
+        for size in sizes:
+            max_id = HistoricalSale.objects.order_by('id').values_list('id', flat=True)[size - 1]
+            for loader_name in options['loaders']:
+                connections.close_all()
+                results = ctx.Queue()
+                proc = ctx.Process(target=_measure, args=(loader_name, max_id, results))
+                proc.start()
+                result = results.get()
+                proc.join()
+                self.stdout.write(
+                    f"{size:>10,} filas  {loader_name:<8} {result['seconds']:8.2f}s  "
+                    f"pico RSS +{result['peak_rss_delta'] / 2**20:8.1f} MiB  "
+                    f"DataFrame {result['frame_bytes'] / 2**20:8.1f} MiB"
+                )
+
+    def _seed(self, missing):
+        all_product_ids = list(Product.objects.values_list('id', flat=True))
+        if not all_product_ids:
+            raise CommandError('No hay productos para generar ventas sintéticas')
+
+        self.stdout.write(f'Generando {missing:,} ventas sintéticas...')
+        rng = np.random.default_rng(42)
+        start_day = np.datetime64('2020-01-01')
+        product_ids = np.array(all_product_ids)
+        while missing > 0:
+            batch = min(SEED_BATCH, missing)
+            dates = start_day + rng.integers(0, 365 * 5, size=batch).astype('timedelta64[D]')
+            HistoricalSale.objects.bulk_create([
+                HistoricalSale(date=d.item(), product_id=int(p), quantity=int(q))
+                for d, p, q in zip(dates, rng.choice(product_ids, size=batch), rng.integers(1, 51, size=batch))
+            ], batch_size=SEED_BATCH)
+            missing -= batch
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ia.inference import FEATURES, HAS_ML_LIBS, build_feature_matrix, iter_predictions
+
+if HAS_ML_LIBS:
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+
+
+def _predict_per_row(model, dates, product_ids, category_ids, names):
+    """Bucle original de PredictView: un DataFrame y un predict por fila."""
+    predictions = []
+    for date in dates:
+        for pid, cid, name in zip(product_ids, category_ids, names):
+            features = pd.DataFrame({
+                'month': [date.month],
+                'day_of_week': [date.dayofweek],
+                'product_id': [pid],
+                'category_id': [cid]
+            })
+            pred = model.predict(features)[0]
+            predictions.append({
+                'date': date.date().isoformat(),
+                'product_id': int(pid),
+                'product_name': name,
+                'predicted_quantity': round(pred, 2)
+            })
+    return predictions
+
+
+class Command(BaseCommand):
+    help = 'Compara el motor de inferencia por lotes contra el bucle fila por fila de PredictView.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--n-estimators', type=int, default=100)
+        parser.add_argument('--chunk-size', type=int, default=50000)
+        parser.add_argument('--skip-per-row', action='store_true',
+                            help='Solo mide el motor por lotes (útil para catálogos grandes).')
+
+    def handle(self, *args, **options):
+        if not HAS_ML_LIBS:
+            raise CommandError('scikit-learn, pandas y numpy son necesarios para el benchmark')
+
+        rng = np.random.default_rng(42)
+        n_products = options['products']
+        product_ids = np.arange(1, n_products + 1, dtype=np.int64)
+        category_ids = rng.integers(1, options['categories'] + 1, size=n_products)
+        names = [f'Producto {pid}' for pid in product_ids]
+        dates = pd.date_range(start='2025-01-01', periods=options['days'], freq='D')
+
+        # Synthetic model with the same feature layout as TrainView
+        train_dates = pd.date_range(start='2024-01-01', periods=60, freq='D')
+        X_train = build_feature_matrix(train_dates, product_ids, category_ids)
+        y_train = rng.integers(1, 51, size=len(X_train))
+        model = RandomForestRegressor(n_estimators=options['n_estimators'], random_state=42, n_jobs=-1)
+        model.fit(pd.DataFrame(X_train, columns=FEATURES), y_train)
+        # Inference itself runs single-threaded, as it does inside a request
+        model.set_params(n_jobs=None)
+
+        n_rows = len(dates) * n_products
+        self.stdout.write(f'{len(dates)} días x {n_products} productos = {n_rows} predicciones')
+
+        start = time.perf_counter()
+        batch = list(iter_predictions(model, dates, product_ids, category_ids, names,
+                                      chunk_size=options['chunk_size']))
+        batch_seconds = time.perf_counter() - start
+        self.stdout.write(f'Lotes:        {batch_seconds:8.3f}s ({n_rows / batch_seconds:,.0f} filas/s)')
+
+        if options['skip_per_row']:
+            return
+
+        start = time.perf_counter()
+        per_row = _predict_per_row(model, dates, product_ids, category_ids, names)
+        per_row_seconds = time.perf_counter() - start
+        self.stdout.write(f'Fila por fila: {per_row_seconds:8.3f}s ({n_rows / per_row_seconds:,.0f} filas/s)')
+
+        max_diff = max(abs(a['predicted_quantity'] - b['predicted_quantity']) for a, b in zip(batch, per_row))
+        self.stdout.write(f'Aceleración: x{per_row_seconds / batch_seconds:.1f} (diferencia máxima {max_diff:.4f})')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ia.demand import rebuild_daily_demand
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el agregado DailyDemand a partir de HistoricalSale (tras cargas masivas).'
+
+    def handle(self, *args, **options):
+        created = rebuild_daily_demand()
+        self.stdout.write(self.style.SUCCESS(f'DailyDemand reconstruida: {created} celdas producto/día'))
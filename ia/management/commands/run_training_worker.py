@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ia.training import HAS_ML_LIBS, claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos de entrenamiento encolados por TrainView.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Procesa los trabajos pendientes y termina.')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Segundos de espera cuando la cola está vacía.')
+
+    def handle(self, *args, **options):
+        if not HAS_ML_LIBS:
+            raise CommandError('scikit-learn, pandas y numpy son necesarios para entrenar')
+
+        self.stdout.write('Worker de entrenamiento iniciado')
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f'Entrenando job {job.id} (n_jobs={job.n_jobs})')
+                job = run_job(job)
+                if job.status == 'COMPLETED':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Job {job.id} completado en {job.timings.get("total")}s'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Job {job.id} falló: {job.error_message}'))
+        except KeyboardInterrupt:
+            self.stdout.write('Worker detenido')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingsession',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0003_trainingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingjob',
+            name='mode',
+            field=models.CharField(choices=[('FULL', 'Completo'), ('INCREMENTAL', 'Incremental')], default='FULL', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='trainingsession',
+            name='high_water_mark',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trainingsession',
+            name='mode',
+            field=models.CharField(choices=[('FULL', 'Completo'), ('INCREMENTAL', 'Incremental')], default='FULL', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='trainingsession',
+            name='n_estimators',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trainingsession',
+            name='rows_trained',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trainingsession',
+            name='test_rows',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
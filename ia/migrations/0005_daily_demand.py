@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_daily_demand(apps, schema_editor):
+    HistoricalSale = apps.get_model('ia', 'HistoricalSale')
+    DailyDemand = apps.get_model('ia', 'DailyDemand')
+    rows = (
+        HistoricalSale.objects.values('product_id', 'date')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    DailyDemand.objects.bulk_create(
+        (DailyDemand(product_id=row['product_id'], date=row['date'], quantity=row['total']) for row in rows.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0004_incremental_training'),
+        ('products', '0005_product_warranty_months'),
+        ('sales', '0005_order_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='historicalsale',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historical_sales', to='sales.order'),
+        ),
+        migrations.AddConstraint(
+            model_name='historicalsale',
+            constraint=models.UniqueConstraint(fields=('order', 'product'), name='unique_historical_sale_order_product'),
+        ),
+        migrations.AddField(
+            model_name='dailydemand',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_demand', to='products.product'),
+        ),
+        migrations.AddIndex(
+            model_name='dailydemand',
+            index=models.Index(fields=['date', 'product'], name='ia_dailydem_date_a2e3d6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailydemand',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='unique_daily_demand_product_date'),
+        ),
+        migrations.RunPython(populate_daily_demand, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from products.models import Product
+from users.models import User
 
 class ModeloConfiguracion(models.Model):
     n_estimators = models.PositiveIntegerField(default=100, validators=[MinValueValidator(1)])
@@ -14,15 +15,88 @@ class HistoricalSale(models.Model):
     date = models.DateField()
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    # Orden de la que proviene la venta (None para datos históricos/sintéticos)
+    order = models.ForeignKey('sales.Order', on_delete=models.CASCADE, null=True, blank=True, related_name='historical_sales')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='unique_historical_sale_order_product'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.date} - {self.quantity}"
 
+class DailyDemand(models.Model):
+    """
+    Agregado producto x día de HistoricalSale. Se mantiene al día desde
+    ia.demand cuando cambian las ventas, para que alertas y entrenamiento
+    lean sumas precalculadas en vez de recorrer HistoricalSale.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_demand')
+    date = models.DateField()
+    quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_daily_demand_product_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'product']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.date} - {self.quantity}"
+
 class TrainingSession(models.Model):
+    MODE_CHOICES = [
+        ('FULL', 'Completo'),
+        ('INCREMENTAL', 'Incremental'),
+    ]
+
     last_training_datetime = models.DateTimeField(auto_now=True)
     rmse = models.FloatField()
     mae = models.FloatField()
     r2 = models.FloatField()
+    model_version = models.CharField(max_length=64, blank=True)
+    mode = models.CharField(max_length=15, choices=MODE_CHOICES, default='FULL')
+    # Mayor id de HistoricalSale visto por el modelo publicado
+    high_water_mark = models.BigIntegerField(default=0)
+    n_estimators = models.PositiveIntegerField(default=0)
+    rows_trained = models.PositiveBigIntegerField(default=0)
+    test_rows = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return f"Training {self.last_training_datetime}: RMSE={self.rmse}, MAE={self.mae}, R2={self.r2}"
+
+class TrainingJob(models.Model):
+    """Trabajo de entrenamiento encolado por TrainView y ejecutado por run_training_worker."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('PROCESSING', 'Procesando'),
+        ('COMPLETED', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='training_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    mode = models.CharField(max_length=15, choices=TrainingSession.MODE_CHOICES, default='FULL')
+    stage = models.CharField(max_length=50, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    n_jobs = models.IntegerField(default=-1)
+    timings = models.JSONField(default=dict)
+    worker = models.CharField(max_length=100, blank=True)
+    error_message = models.TextField(blank=True)
+    session = models.ForeignKey(TrainingSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"TrainingJob {self.id} - {self.status} ({self.progress}%)"
@@ -0,0 +1,138 @@
+"""
+Registro en memoria del modelo entrenado (ia_model.pkl).
+
+Carga el modelo una sola vez por proceso y lo comparte entre hilos. La
+versión publicada se detecta por (mtime, tamaño) del archivo, así que cuando
+TrainView publica un modelo nuevo todos los procesos lo recargan en su
+siguiente uso sin volver a leer el disco en cada petición.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import joblib
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    joblib = None
+
+import os
+import threading
+import time
+
+from django.utils import timezone
+
+MODEL_PATH = 'ia_model.pkl'
+
+
+def _current_rss_bytes():
+    """RSS actual del proceso (solo Linux); None si no se puede leer."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    def __init__(self, path=MODEL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # (version, model) se reemplaza de una vez para que la lectura sin lock sea segura
+        self._entry = (None, None)
+        self._metrics = {
+            'loads': 0,
+            'hits': 0,
+            'last_load_seconds': None,
+            'total_load_seconds': 0.0,
+            'model_file_bytes': None,
+            'rss_delta_bytes': None,
+            'loaded_at': None,
+        }
+
+    def _stat_version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def exists(self):
+        return self._stat_version() is not None
+
+    @property
+    def version(self):
+        return self._entry[0]
+
+    def get(self):
+        """
+        Devuelve el modelo vigente, recargándolo solo si el archivo cambió.
+        None si todavía no hay modelo entrenado.
+        """
+        if not HAS_ML_LIBS:
+            return None
+        version = self._stat_version()
+        if version is None:
+            return None
+
+        cached_version, model = self._entry
+        if model is not None and cached_version == version:
+            self._metrics['hits'] += 1
+            return model
+
+        with self._lock:
+            # Otro hilo pudo haberlo cargado mientras esperábamos el lock
+            cached_version, model = self._entry
+            if model is not None and cached_version == version:
+                self._metrics['hits'] += 1
+                return model
+
+            rss_before = _current_rss_bytes()
+            start = time.perf_counter()
+            model = joblib.load(self.path)
+            elapsed = time.perf_counter() - start
+            rss_after = _current_rss_bytes()
+
+            self._entry = (version, model)
+            self._metrics.update({
+                'loads': self._metrics['loads'] + 1,
+                'last_load_seconds': elapsed,
+                'total_load_seconds': self._metrics['total_load_seconds'] + elapsed,
+                'model_file_bytes': os.path.getsize(self.path),
+                'rss_delta_bytes': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                'loaded_at': timezone.now().isoformat(),
+            })
+            return model
+
+    def load_copy(self):
+        """
+        Copia privada del modelo publicado, para reentrenarla sin modificar
+        la instancia compartida que atiende las peticiones.
+        """
+        if not HAS_ML_LIBS or not self.exists():
+            return None
+        return joblib.load(self.path)
+
+    def publish(self, model):
+        """
+        Escribe el modelo de forma atómica (archivo temporal + os.replace) y
+        lo deja cargado en este proceso. Devuelve la versión publicada.
+        """
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        joblib.dump(model, tmp_path)
+        with self._lock:
+            os.replace(tmp_path, self.path)
+            version = self._stat_version()
+            self._entry = (version, model)
+            self._metrics['model_file_bytes'] = os.path.getsize(self.path)
+            self._metrics['loaded_at'] = timezone.now().isoformat()
+        return version
+
+    def metrics(self):
+        return {
+            'path': self.path,
+            'version': self.version,
+            'published_version': self._stat_version(),
+            **self._metrics,
+        }
+
+
+model_registry = ModelRegistry()
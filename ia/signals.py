@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sales.models import Order
+from .demand import SOLD_STATUSES, record_order_sales, refresh_daily_demand, remove_order_sales
+from .models import HistoricalSale
+
+
+@receiver(post_save, sender=Order)
+def update_demand_on_order_status(sender, instance, created, **kwargs):
+    # Se ejecuta al confirmar la transacción para ver los ítems ya guardados
+    if instance.status in SOLD_STATUSES:
+        transaction.on_commit(lambda: record_order_sales(instance))
+    elif instance.status == 'CANCELLED':
+        transaction.on_commit(lambda: remove_order_sales(instance))
+
+
+@receiver(post_save, sender=HistoricalSale)
+def update_demand_on_sale_change(sender, instance, **kwargs):
+    # bulk_create no dispara señales; las cargas masivas usan rebuild_daily_demand
+    transaction.on_commit(lambda: refresh_daily_demand([(instance.product_id, instance.date)]))
+
+
+@receiver(post_delete, sender=HistoricalSale)
+def update_demand_on_sale_delete(sender, instance, **kwargs):
+    # También cubre el borrado en cascada de la orden o del producto
+    transaction.on_commit(lambda: refresh_daily_demand([(instance.product_id, instance.date)]))
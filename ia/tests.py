@@ -1,3 +1,313 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from sales.models import Order, OrderItem
+from users.models import User
+from . import training
+from .inference import iter_predictions, load_product_catalog
+from .loaders import load_sales_arrays, load_training_frame
+from .training import HAS_ML_LIBS, np
+from .demand import rebuild_daily_demand
+from .models import DailyDemand, HistoricalSale, ModeloConfiguracion, TrainingJob
+from .registry import ModelRegistry
+
+
+class RegistryMixin:
+    """Registro de modelos sobre un archivo temporal en vez de ia_model.pkl."""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.registry = ModelRegistry(os.path.join(tmp, 'model.pkl'))
+        for target in ('ia.training.model_registry', 'ia.views.model_registry'):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+def create_sales(days=60, start=date(2025, 1, 1), products=3):
+    category = Category.objects.create(name='IA')
+    items = [
+        Product.objects.create(name=f'IA{i}', category=category, sku=f'IA-{i}', price=10, stock=100)
+        for i in range(products)
+    ]
+    HistoricalSale.objects.bulk_create([
+        HistoricalSale(product=product, date=start + timedelta(days=d), quantity=1 + (d + i) % 7)
+        for d in range(days)
+        for i, product in enumerate(items)
+    ])
+    rebuild_daily_demand()
+    return items
+
+
+@skipUnless(HAS_ML_LIBS, 'scikit-learn, pandas y numpy son necesarios para entrenar')
+class TrainViewTests(RegistryMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('ia_admin', 'ia@example.com', 'x', role='ADMIN')
+        create_sales()
+        ModeloConfiguracion.objects.create(
+            n_estimators=10, date_range_start=date(2025, 1, 1), date_range_end=date(2025, 3, 1)
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(IA_TRAINING_ASYNC=False)
+    def test_trains_in_the_request_when_async_is_off(self):
+        response = self.client.post('/api/v1/ia/train/', {'n_jobs': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'COMPLETED')
+        self.assertIn('rmse', response.json())
+        # Entrenado con 2 núcleos, publicado para predecir con uno
+        self.assertEqual(self.registry.get().n_jobs, 1)
+
+    def test_training_is_queued_for_the_worker_by_default(self):
+        response = self.client.post('/api/v1/ia/train/', {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        job = TrainingJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual(job.status, 'PENDING')
+
+        training.run_job(training.claim_next_job('test'))
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], 'COMPLETED')
+        self.assertEqual(status['progress'], 100)
+        self.assertIsNone(training.claim_next_job('test'))
+
+
+@skipUnless(HAS_ML_LIBS, 'scikit-learn, pandas y numpy son necesarios para entrenar')
+class IncrementalTrainingTests(RegistryMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_sales()
+        ModeloConfiguracion.objects.create(
+            n_estimators=10, date_range_start=date(2025, 1, 1), date_range_end=date(2025, 3, 1)
+        )
+
+    def test_full_and_incremental_runs_share_the_holdout(self):
+        full, _ = training.train_model(n_jobs=1)
+        HistoricalSale.objects.bulk_create([
+            HistoricalSale(product=product, date=date(2025, 3, 2) + timedelta(days=d), quantity=3)
+            for d in range(10)
+            for product in self.products
+        ])
+        rebuild_daily_demand()
+        holdout_before = full.test_rows
+
+        incremental, _ = training.train_model(n_jobs=1, mode='INCREMENTAL')
+        self.assertEqual(incremental.mode, 'INCREMENTAL')
+        self.assertEqual(incremental.n_estimators, full.n_estimators + training.incremental_estimators())
+        # Solo las celdas nuevas fuera del holdout se entrenan
+        self.assertLess(incremental.rows_trained, 30)
+        full_again, _ = training.train_model(n_jobs=1)
+        self.assertEqual(incremental.test_rows, full_again.test_rows)
+        self.assertGreaterEqual(incremental.test_rows, holdout_before)
+        self.assertEqual(
+            full_again.rows_trained + full_again.test_rows, DailyDemand.objects.count()
+        )
+
+    def test_holdout_is_stable_per_cell(self):
+        arrays = {
+            'product_id': np.array([1, 1, 2, 7], dtype=np.int32),
+            'date': np.array(['2025-01-01', '2025-01-02', '2025-01-01', '2030-06-30'], dtype='datetime64[D]'),
+        }
+        mask = training.holdout_mask(arrays)
+        reordered = {name: values[::-1] for name, values in arrays.items()}
+        self.assertEqual(list(training.holdout_mask(reordered)), list(mask[::-1]))
+
+
+class _FeatureModel:
+    """Modelo falso: la predicción codifica las features de la fila."""
+
+    def predict(self, X):
+        return (X['product_id'] * 1000 + X['category_id'] * 100 + X['month'] + X['day_of_week'] / 10).to_numpy()
+
+
+@skipUnless(HAS_ML_LIBS, 'pandas y numpy son necesarios para predecir')
+class BatchInferenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_sales(days=1)
+
+    def test_catalog_is_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            ids, category_ids, names = load_product_catalog()
+        self.assertEqual(ids.tolist(), [p.id for p in self.products])
+        self.assertEqual(category_ids.tolist(), [p.category_id for p in self.products])
+        self.assertEqual(names, ['IA0', 'IA1', 'IA2'])
+
+    def test_chunked_predictions_match_one_row_at_a_time(self):
+        import pandas as pd
+
+        dates = [date(2025, 1, 31), date(2025, 2, 1), date(2025, 2, 2)]
+        catalog = load_product_catalog()
+        model = _FeatureModel()
+        expected = []
+        for day in dates:
+            for product in self.products:
+                row = pd.DataFrame([{
+                    'month': day.month, 'day_of_week': day.weekday(),
+                    'product_id': product.id, 'category_id': product.category_id,
+                }])
+                expected.append({
+                    'date': day.isoformat(),
+                    'product_id': product.id,
+                    'product_name': product.name,
+                    'predicted_quantity': round(float(model.predict(row)[0]), 2),
+                })
+        # Bloques de 4 filas: los cortes caen en medio de una fecha
+        self.assertEqual(list(iter_predictions(model, dates, *catalog, chunk_size=4)), expected)
+        self.assertEqual(list(iter_predictions(model, [], *catalog)), [])
+
+
+@skipUnless(HAS_ML_LIBS, 'joblib es necesario para cargar el modelo')
+class ModelRegistryTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.path = os.path.join(tmp, 'model.pkl')
+        self.publisher = ModelRegistry(self.path)
+        # Otro proceso: comparte el archivo pero no la instancia cargada
+        self.reader = ModelRegistry(self.path)
+
+    def test_missing_model_returns_none(self):
+        self.assertIsNone(self.reader.get())
+        self.assertFalse(self.reader.exists())
+
+    def test_model_is_loaded_once_and_reloaded_after_publish(self):
+        version = self.publisher.publish({'version': 1})
+        self.assertEqual(self.publisher.get(), {'version': 1})
+        self.assertEqual(self.publisher.metrics()['loads'], 0)
+
+        first = self.reader.get()
+        self.assertEqual(first, {'version': 1})
+        self.assertIs(self.reader.get(), first)
+        self.assertEqual((self.reader.metrics()['loads'], self.reader.metrics()['hits']), (1, 1))
+
+        new_version = self.publisher.publish({'version': 2, 'trees': list(range(100))})
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(self.reader.get()['version'], 2)
+        self.assertEqual(self.reader.version, new_version)
+        self.assertEqual(self.reader.metrics()['loads'], 2)
+        # La publicación es atómica: no quedan temporales junto al modelo
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['model.pkl'])
+
+    def test_load_copy_is_private(self):
+        self.publisher.publish({'trees': [1]})
+        copy = self.publisher.load_copy()
+        copy['trees'].append(2)
+        self.assertEqual(self.publisher.get(), {'trees': [1]})
+
+
+@skipUnless(HAS_ML_LIBS, 'pandas y numpy son necesarios para entrenar')
+class LoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_sales(days=10)
+
+    def test_chunks_are_copied_in_id_order(self):
+        arrays = load_sales_arrays(chunk_size=7)
+        rows = list(HistoricalSale.objects.order_by('id').values_list(
+            'id', 'date', 'product_id', 'product__category_id', 'quantity'
+        ))
+        self.assertEqual(len(arrays['id']), 30)
+        self.assertEqual(
+            list(zip(
+                arrays['id'].tolist(), arrays['date'].tolist(), arrays['product_id'].tolist(),
+                arrays['category_id'].tolist(), arrays['quantity'].tolist(),
+            )),
+            rows,
+        )
+        self.assertEqual(arrays['quantity'].dtype, np.uint16)
+        self.assertEqual(arrays['product_id'].dtype, np.int32)
+
+    def test_large_quantities_widen_the_dtype(self):
+        HistoricalSale.objects.create(product=self.products[0], date=date(2025, 6, 1), quantity=70000)
+        arrays = load_sales_arrays(chunk_size=7)
+        self.assertEqual(arrays['quantity'].dtype, np.uint32)
+        self.assertEqual(arrays['quantity'][-1], 70000)
+
+    def test_daily_demand_frame_has_the_training_features(self):
+        X, y = load_training_frame(DailyDemand.objects.all(), chunk_size=4)
+        first = DailyDemand.objects.order_by('id').first()
+        self.assertEqual(list(X.columns), ['month', 'day_of_week', 'product_id', 'category_id'])
+        self.assertEqual(len(X), DailyDemand.objects.count())
+        self.assertEqual(
+            X.iloc[0].tolist(),
+            [first.date.month, first.date.weekday(), first.product_id, first.product.category_id],
+        )
+        self.assertEqual(int(y.iloc[0]), first.quantity)
+
+    def test_empty_queryset(self):
+        arrays = load_sales_arrays(HistoricalSale.objects.none())
+        self.assertEqual(len(arrays['id']), 0)
+
+
+class DailyDemandSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Demanda')
+        cls.product = Product.objects.create(name='D', category=category, sku='DEM-1', price=10, stock=100)
+        cls.customer = User.objects.create_user('demand_client', 'd@example.com', 'x')
+
+    def _demand(self):
+        return dict(DailyDemand.objects.filter(product=self.product).values_list('date', 'quantity'))
+
+    def _sale(self, day, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            return HistoricalSale.objects.create(product=self.product, date=day, quantity=quantity)
+
+    def test_saved_and_deleted_sales_refresh_their_cell(self):
+        day = date(2025, 5, 1)
+        first = self._sale(day, 2)
+        self._sale(day, 3)
+        self.assertEqual(self._demand(), {day: 5})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self._demand(), {day: 3})
+        with self.captureOnCommitCallbacks(execute=True):
+            HistoricalSale.objects.filter(product=self.product).delete()
+        self.assertEqual(self._demand(), {})
+
+    def _set_status(self, order, state):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = state
+            order.save()
+
+    def test_orders_are_counted_once_and_removed_when_cancelled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.customer, total=20, address='x')
+            OrderItem.objects.create(order=order, product=self.product, quantity=2, price=10)
+        self.assertEqual(self._demand(), {})
+
+        self._set_status(order, 'PAID')
+        self._set_status(order, 'DELIVERED')
+        day = order.created_at.date()
+        self.assertEqual(self._demand(), {day: 2})
+        self.assertEqual(HistoricalSale.objects.filter(order=order).count(), 1)
+
+        self._set_status(order, 'CANCELLED')
+        self.assertEqual(self._demand(), {})
+
+    def test_deleting_an_order_cascades_to_its_demand(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.customer, total=20, address='x')
+            OrderItem.objects.create(order=order, product=self.product, quantity=4, price=10)
+        self._set_status(order, 'PAID')
+        self.assertEqual(sum(self._demand().values()), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(self._demand(), {})
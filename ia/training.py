@@ -0,0 +1,297 @@
+"""
+Pipeline de entrenamiento fuera del ciclo HTTP.
+
+TrainView solo encola un TrainingJob y el comando run_training_worker
+(proceso training_worker del Procfile) toma los trabajos pendientes de la
+base de datos; con IA_TRAINING_ASYNC=False el trabajo se ejecuta dentro de
+la petición. En ambos casos train_model reporta progreso y tiempos por
+etapa sobre el propio TrainingJob.
+
+El entrenamiento usa n_jobs núcleos, pero el modelo se publica con
+n_jobs=1: cada predict de los procesos web corre en un solo núcleo.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import pandas as pd
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    pd = None
+    np = None
+    RandomForestRegressor = None
+    mean_squared_error = None
+    mean_absolute_error = None
+    r2_score = None
+
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .loaders import load_sales_arrays, training_frame
+from .models import DailyDemand, HistoricalSale, ModeloConfiguracion, TrainingSession, TrainingJob
+from .registry import model_registry
+
+# Number of warm-start rounds used to grow the forest, so progress can be
+# reported while fitting. A full fit grown this way is identical to a single fit.
+FIT_ROUNDS = 10
+# Percentage of (product, day) cells held out for evaluation
+HOLDOUT_PERCENT = 20
+
+
+def default_n_jobs():
+    return getattr(settings, 'IA_TRAINING_N_JOBS', -1)
+
+
+def enqueue_training(user=None, n_jobs=None, mode='FULL'):
+    return TrainingJob.objects.create(
+        requested_by=user,
+        mode=mode,
+        n_jobs=default_n_jobs() if n_jobs is None else n_jobs,
+    )
+
+
+def training_async():
+    return getattr(settings, 'IA_TRAINING_ASYNC', True)
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def train_now(user=None, n_jobs=None, mode='FULL'):
+    """Crea el TrainingJob ya tomado por este proceso y lo ejecuta en el momento."""
+    job = TrainingJob.objects.create(
+        requested_by=user,
+        mode=mode,
+        n_jobs=default_n_jobs() if n_jobs is None else n_jobs,
+        status='PROCESSING',
+        stage='queued',
+        started_at=timezone.now(),
+        worker=default_worker_name(),
+    )
+    return run_job(job)
+
+
+def claim_next_job(worker_name=None):
+    """
+    Toma el trabajo pendiente más antiguo. El UPDATE condicional sobre
+    status='PENDING' garantiza que dos workers nunca tomen el mismo trabajo.
+    """
+    worker_name = worker_name or default_worker_name()
+    while True:
+        job = TrainingJob.objects.filter(status='PENDING').order_by('created_at').first()
+        if job is None:
+            return None
+        claimed = TrainingJob.objects.filter(pk=job.pk, status='PENDING').update(
+            status='PROCESSING',
+            stage='queued',
+            started_at=timezone.now(),
+            worker=worker_name,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+class _JobReporter:
+    """Guarda etapa, progreso y tiempos en el TrainingJob (si lo hay)."""
+
+    def __init__(self, job=None):
+        self.job = job
+        self.timings = {}
+        self._stage = None
+        self._stage_started = None
+
+    def stage(self, name, progress):
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.timings[self._stage] = round(now - self._stage_started, 3)
+        self._stage, self._stage_started = name, now
+        self.progress(progress)
+
+    def progress(self, progress):
+        if self.job is None:
+            return
+        TrainingJob.objects.filter(pk=self.job.pk).update(
+            stage=self._stage or '', progress=progress, timings=self.timings
+        )
+
+    def finish(self):
+        if self._stage is not None:
+            self.timings[self._stage] = round(time.perf_counter() - self._stage_started, 3)
+            self._stage = None
+        return self.timings
+
+
+def _fit_forest(model, X_train, y_train, target_estimators, reporter):
+    """
+    Hace crecer el bosque (warm_start) hasta target_estimators en FIT_ROUNDS
+    rondas, reportando progreso entre 25% y 90%.
+    """
+    current = len(getattr(model, 'estimators_', []))
+    rounds = max(1, min(FIT_ROUNDS, target_estimators - current))
+    for i in range(1, rounds + 1):
+        model.set_params(n_estimators=current + (target_estimators - current) * i // rounds)
+        model.fit(X_train, y_train)
+        reporter.progress(25 + 65 * i // rounds)
+    model.set_params(warm_start=False)
+    return model
+
+
+def _incremental_base(previous):
+    """
+    Modelo publicado sobre el que se pueden agregar árboles, o None si hay
+    que entrenar desde cero (sin sesión previa o bosque ya en el máximo).
+    """
+    if previous is None or not previous.high_water_mark or not previous.n_estimators:
+        return None
+    max_estimators = getattr(settings, 'IA_MAX_ESTIMATORS', 500)
+    if previous.n_estimators + incremental_estimators() > max_estimators:
+        return None
+    return model_registry.load_copy()
+
+
+def incremental_estimators():
+    return getattr(settings, 'IA_INCREMENTAL_ESTIMATORS', 10)
+
+
+def holdout_mask(arrays):
+    """
+    Celdas (producto, día) reservadas para evaluar. Dependen solo del
+    producto y la fecha, así que entrenamientos completos e incrementales
+    se miden sobre las mismas celdas y sus métricas son comparables.
+    """
+    # Multiplicative hash of (product, day); uint64 arithmetic wraps around
+    days = arrays['date'].astype(np.int64).astype(np.uint64)
+    key = (arrays['product_id'].astype(np.uint64) * np.uint64(1_000_003) + days) * np.uint64(2_654_435_761)
+    return (key >> np.uint64(16)) % np.uint64(100) < HOLDOUT_PERCENT
+
+
+def train_model(n_jobs=None, job=None, mode='FULL'):
+    """
+    Entrena el RandomForestRegressor, publica el modelo en el registro y
+    crea el TrainingSession. Devuelve (session, timings).
+
+    Se entrena sobre el agregado diario DailyDemand, sin las celdas de
+    holdout_mask, y cada sesión se evalúa sobre todas las celdas de
+    holdout. En modo INCREMENTAL solo se entrena con las celdas (producto,
+    día) con ventas de HistoricalSale posteriores a la marca de agua de la
+    última sesión y se agregan árboles nuevos al bosque publicado
+    (warm_start); si no es posible se entrena completo. Filas con id menor
+    a la marca que se confirmen tarde solo entran en el siguiente
+    entrenamiento completo.
+    """
+    reporter = _JobReporter(job)
+    n_jobs = default_n_jobs() if n_jobs is None else n_jobs
+    previous = TrainingSession.objects.order_by('-id').first()
+
+    model = None
+    if mode == 'INCREMENTAL':
+        model = _incremental_base(previous)
+        if model is None:
+            mode = 'FULL'
+    if job is not None and job.mode != mode:
+        TrainingJob.objects.filter(pk=job.pk).update(mode=mode)
+
+    # Load data: every cell, the holdout is evaluated in both modes
+    reporter.stage('loading', 5)
+    high_water_mark = HistoricalSale.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    arrays = load_sales_arrays(DailyDemand.objects.all())
+    X, y = training_frame(arrays)
+
+    # Split on the fixed holdout
+    reporter.stage('splitting', 20)
+    holdout = holdout_mask(arrays)
+    train = ~holdout
+    if mode == 'INCREMENTAL':
+        new_sales = HistoricalSale.objects.filter(
+            id__gt=previous.high_water_mark,
+            id__lte=high_water_mark,
+            product_id=OuterRef('product_id'),
+            date=OuterRef('date'),
+        )
+        touched = DailyDemand.objects.filter(Exists(new_sales)).values_list('id', flat=True)
+        train &= np.isin(arrays['id'], np.fromiter(touched, dtype=np.int64))
+    X_train, y_train = X[train], y[train]
+    X_test, y_test = X[holdout], y[holdout]
+    if mode == 'INCREMENTAL' and len(X_train) == 0:
+        # Nothing new to learn from; the published model stays current
+        return previous, reporter.finish()
+    if len(X_train) == 0 or len(X_test) < 2:
+        raise ValueError('Not enough historical sales to train the model')
+
+    # Train model, growing the forest in rounds to report progress
+    reporter.stage('fitting', 25)
+    if mode == 'INCREMENTAL':
+        model.set_params(warm_start=True, n_jobs=n_jobs)
+        target_estimators = len(model.estimators_) + incremental_estimators()
+    else:
+        # Get config
+        config = ModeloConfiguracion.objects.first()
+        if not config:
+            config = ModeloConfiguracion.objects.create(n_estimators=100, date_range_start=datetime.now().date() - timedelta(days=365), date_range_end=datetime.now().date())
+        model = RandomForestRegressor(n_estimators=0, random_state=42, n_jobs=n_jobs, warm_start=True)
+        target_estimators = config.n_estimators
+    _fit_forest(model, X_train, y_train, target_estimators, reporter)
+
+    # Predict and metrics
+    reporter.stage('evaluating', 90)
+    y_pred = model.predict(X_test)
+    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    mae = float(mean_absolute_error(y_test, y_pred))
+    r2 = float(r2_score(y_test, y_pred))
+
+    # Publish model (atomic write, other processes reload on next use).
+    # Predictions run inside web workers: one core each, not n_jobs
+    reporter.stage('publishing', 95)
+    model.set_params(n_jobs=1)
+    model_version = model_registry.publish(model)
+
+    # Save session
+    if mode == 'INCREMENTAL':
+        high_water_mark = max(high_water_mark, previous.high_water_mark)
+    session = TrainingSession.objects.create(
+        rmse=rmse,
+        mae=mae,
+        r2=r2,
+        model_version=model_version,
+        mode=mode,
+        high_water_mark=high_water_mark,
+        n_estimators=len(model.estimators_),
+        rows_trained=len(X_train),
+        test_rows=len(X_test),
+    )
+    return session, reporter.finish()
+
+
+def run_job(job):
+    """Ejecuta un TrainingJob ya reclamado y deja su estado final guardado."""
+    started = time.perf_counter()
+    try:
+        session, timings = train_model(n_jobs=job.n_jobs, job=job, mode=job.mode)
+    except Exception as e:
+        job.refresh_from_db()
+        job.status = 'ERROR'
+        job.error_message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at'])
+        return job
+
+    timings['total'] = round(time.perf_counter() - started, 3)
+    job.refresh_from_db()
+    job.status = 'COMPLETED'
+    job.stage = 'done'
+    job.progress = 100
+    job.session = session
+    job.timings = timings
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'stage', 'progress', 'session', 'timings', 'finished_at'])
+    return job
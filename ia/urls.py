@@ -5,6 +5,7 @@ urlpatterns = [
     path('configurar/', views.ConfigureModelView.as_view(), name='configure_model'),
     path('data/generate/', views.GenerateDataView.as_view(), name='generate_data'),
     path('train/', views.TrainView.as_view(), name='train'),
+    path('train/<int:job_id>/status/', views.TrainingJobStatusView.as_view(), name='training_job_status'),
     path('predict/', views.PredictView.as_view(), name='predict'),
     path('status/', views.StatusView.as_view(), name='status'),
 ]
@@ -2,36 +2,54 @@
 try:
     import pandas as pd
     import numpy as np
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-    from sklearn.model_selection import train_test_split
+    import sklearn
     import joblib
     HAS_ML_LIBS = True
 except ImportError:
     HAS_ML_LIBS = False
     pd = None
     np = None
-    RandomForestRegressor = None
-    mean_squared_error = None
-    mean_absolute_error = None
-    r2_score = None
-    train_test_split = None
+    sklearn = None
     joblib = None
 
-import os
+import json
 from datetime import datetime, timedelta
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from .models import HistoricalSale, ModeloConfiguracion, TrainingSession
+from .models import HistoricalSale, ModeloConfiguracion, TrainingSession, TrainingJob
+from .inference import FEATURES, load_product_catalog, iter_predictions
+from .demand import rebuild_daily_demand
+from .registry import model_registry
+from .training import enqueue_training, train_now, training_async
 from products.models import Product
 from permissions import IsAdmin
 
-MODEL_PATH = 'ia_model.pkl'
+STREAM_BATCH_ROWS = 1000
+
+
+def _stream_predictions(rows, feature_importances):
+    """
+    Emite la respuesta JSON de PredictView por partes, a medida que el motor
+    de inferencia va produciendo filas.
+    """
+    yield '{"predictions": ['
+    buffer = []
+    first = True
+    for row in rows:
+        buffer.append(json.dumps(row))
+        if len(buffer) >= STREAM_BATCH_ROWS:
+            yield ('' if first else ',') + ','.join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield ('' if first else ',') + ','.join(buffer)
+    yield '], "feature_importances": ' + json.dumps(feature_importances) + '}'
 
 class ConfigureModelView(APIView):
     """
@@ -109,11 +127,19 @@ class GenerateDataView(APIView):
 
         # Bulk create
         HistoricalSale.objects.bulk_create(data)
+        rebuild_daily_demand()
 
         return Response({"message": f"Generated {len(data)} synthetic sales records"}, status=status.HTTP_201_CREATED)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class TrainView(APIView):
+    """
+    Encola un entrenamiento y responde de inmediato (202) con el id del
+    trabajo; el comando run_training_worker ejecuta el ajuste fuera de la
+    petición. Con IA_TRAINING_ASYNC=False entrena dentro de la petición y
+    responde con las métricas.
+    POST body (opcional): { n_jobs, mode: "full" | "incremental" }
+    """
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def post(self, request):
@@ -122,46 +148,50 @@ class TrainView(APIView):
                 'error': 'Machine learning libraries not available',
                 'message': 'scikit-learn, pandas, and joblib are required for training'
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Load data
-        sales = HistoricalSale.objects.all().values('date', 'product__id', 'product__category__id', 'quantity')
-        df = pd.DataFrame(list(sales))
-        df['date'] = pd.to_datetime(df['date'])
-        df['month'] = df['date'].dt.month
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['product_id'] = df['product__id']
-        df['category_id'] = df['product__category__id']
-
-        # Features and target
-        features = ['month', 'day_of_week', 'product_id', 'category_id']
-        X = df[features]
-        y = df['quantity']
-
-        # Train-test split
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-        # Get config
-        config = ModeloConfiguracion.objects.first()
-        if not config:
-            config = ModeloConfiguracion.objects.create(n_estimators=100, date_range_start=datetime.now().date() - timedelta(days=365), date_range_end=datetime.now().date())
-
-        # Train model
-        model = RandomForestRegressor(n_estimators=config.n_estimators, random_state=42)
-        model.fit(X_train, y_train)
-
-        # Predict and metrics
-        y_pred = model.predict(X_test)
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-
-        # Save model
-        joblib.dump(model, MODEL_PATH)
-
-        # Save session
-        TrainingSession.objects.create(rmse=rmse, mae=mae, r2=r2)
-
-        return Response({"message": "Model trained successfully", "rmse": rmse, "mae": mae, "r2": r2}, status=status.HTTP_200_OK)
+
+        n_jobs = request.data.get('n_jobs')
+        if n_jobs is not None:
+            try:
+                n_jobs = int(n_jobs)
+            except (TypeError, ValueError):
+                return Response({"error": "n_jobs must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        mode = str(request.data.get('mode', 'full')).upper()
+        if mode not in dict(TrainingSession.MODE_CHOICES):
+            return Response({"error": "mode must be 'full' or 'incremental'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not training_async():
+            job = train_now(user=request.user, n_jobs=n_jobs, mode=mode)
+            status_url = reverse('training_job_status', kwargs={'job_id': job.id})
+            if job.status != 'COMPLETED':
+                return Response({
+                    "error": job.error_message,
+                    "job_id": job.id,
+                    "status": job.status,
+                    "status_url": status_url
+                }, status=status.HTTP_400_BAD_REQUEST)
+            session = job.session
+            return Response({
+                "message": "Model trained successfully",
+                "job_id": job.id,
+                "status": job.status,
+                "mode": job.mode,
+                "rmse": session.rmse if session else None,
+                "mae": session.mae if session else None,
+                "r2": session.r2 if session else None,
+                "timings": job.timings,
+                "status_url": status_url
+            }, status=status.HTTP_200_OK)
+
+        job = enqueue_training(user=request.user, n_jobs=n_jobs, mode=mode)
+
+        return Response({
+            "message": "Training job queued",
+            "job_id": job.id,
+            "status": job.status,
+            "mode": job.mode,
+            "status_url": reverse('training_job_status', kwargs={'job_id': job.id})
+        }, status=status.HTTP_202_ACCEPTED)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class PredictView(APIView):
@@ -182,51 +212,77 @@ class PredictView(APIView):
         start_date = datetime.fromisoformat(start_date)
         end_date = datetime.fromisoformat(end_date)
 
-        # Load model
-        if not os.path.exists(MODEL_PATH):
+        # Load model (cached per process, reloaded only when a new version is published)
+        model = model_registry.get()
+        if model is None:
             return Response({"error": "Model not trained yet"}, status=status.HTTP_400_BAD_REQUEST)
-        model = joblib.load(MODEL_PATH)
 
-        # Prepare prediction data
+        # Prepare prediction data: one values_list query for the catalog,
+        # the whole (date x product) feature matrix predicted in chunks
         dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        products = list(Product.objects.all())
-        predictions = []
-
-        for date in dates:
-            for product in products:
-                features = pd.DataFrame({
-                    'month': [date.month],
-                    'day_of_week': [date.dayofweek],
-                    'product_id': [product.id],
-                    'category_id': [product.category.id]
-                })
-                pred = model.predict(features)[0]
-                predictions.append({
-                    'date': date.date().isoformat(),
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'predicted_quantity': round(pred, 2)
-                })
+        product_ids, category_ids, names = load_product_catalog()
+        rows = iter_predictions(model, dates, product_ids, category_ids, names)
 
         # Feature importances
-        feature_importances = dict(zip(['month', 'day_of_week', 'product_id', 'category_id'], model.feature_importances_))
+        feature_importances = {name: float(value) for name, value in zip(FEATURES, model.feature_importances_)}
 
-        return Response({
-            "predictions": predictions,
-            "feature_importances": feature_importances
-        }, status=status.HTTP_200_OK)
+        response = StreamingHttpResponse(
+            _stream_predictions(rows, feature_importances),
+            content_type='application/json'
+        )
+        response.status_code = status.HTTP_200_OK
+        return response
 
 class StatusView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    def session_data(self, session):
+        return {
+            "last_training_datetime": session.last_training_datetime,
+            "rmse": session.rmse,
+            "mae": session.mae,
+            "r2": session.r2,
+            "model_version": session.model_version,
+            "mode": session.mode,
+            "high_water_mark": session.high_water_mark,
+            "n_estimators": session.n_estimators,
+            "rows_trained": session.rows_trained,
+            "test_rows": session.test_rows,
+        }
+
     def get(self, request):
         session = TrainingSession.objects.last()
         if not session:
             return Response({"error": "No training session found"}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({
-            "last_training_datetime": session.last_training_datetime,
-            "rmse": session.rmse,
-            "mae": session.mae,
-            "r2": session.r2
+            **self.session_data(session),
+            "model_registry": model_registry.metrics()
         }, status=status.HTTP_200_OK)
+
+class TrainingJobStatusView(StatusView):
+    """Progreso y tiempos por etapa de un trabajo encolado por TrainView."""
+
+    def get(self, request, job_id):
+        try:
+            job = TrainingJob.objects.select_related('session').get(id=job_id)
+        except TrainingJob.DoesNotExist:
+            return Response({"error": "Training job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {
+            "job_id": job.id,
+            "status": job.status,
+            "mode": job.mode,
+            "stage": job.stage,
+            "progress": job.progress,
+            "n_jobs": job.n_jobs,
+            "timings": job.timings,
+            "worker": job.worker,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "error": job.error_message or None,
+        }
+        if job.session:
+            data["session"] = self.session_data(job.session)
+        return Response(data, status=status.HTTP_200_OK)
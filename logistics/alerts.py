@@ -0,0 +1,136 @@
+"""
+Generación de alertas de inventario por conjuntos.
+
+En lugar de recorrer los productos uno por uno (get_or_create, conteo de
+ventas y predicción de una fila por producto), se hace:
+
+1. Una sola consulta anotada con stock, mínimo y demanda de los últimos
+   días (DailyDemand) de todos los productos.
+2. Una predicción vectorizada para todos los productos a la vez.
+3. Un bulk_create(ignore_conflicts=True); la restricción unique_open_alert
+   evita duplicar alertas abiertas del mismo tipo para un producto.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import numpy as np
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    np = None
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ia.inference import build_feature_matrix, predict_matrix
+from products.models import Product
+from .models import Alert
+
+OVERSTOCK_WINDOW_DAYS = 30
+PREDICTION_HORIZON_DAYS = 7
+BATCH_SIZE = 2000
+
+logger = logging.getLogger(__name__)
+
+
+def load_stock_snapshot(as_of=None):
+    """
+    (product_id, category_id, stock, min_stock, recent_demand) de todos los
+    productos en una sola consulta; recent_demand es la demanda de los
+    últimos OVERSTOCK_WINDOW_DAYS días según DailyDemand.
+    """
+    as_of = as_of or timezone.localdate()
+    window_start = as_of - timedelta(days=OVERSTOCK_WINDOW_DAYS)
+    return list(
+        Product.objects.annotate(
+            recent_demand=Coalesce(
+                Sum(
+                    'daily_demand__quantity',
+                    filter=Q(daily_demand__date__gt=window_start, daily_demand__date__lte=as_of),
+                ),
+                0,
+            )
+        )
+        .order_by('id')
+        .values_list('id', 'category_id', 'stock', 'min_stock', 'recent_demand')
+    )
+
+
+def stock_alerts(snapshot):
+    """Alertas LOW_STOCK y OVERSTOCK (sin guardar) a partir del snapshot."""
+    alerts = []
+    for product_id, _, stock, min_stock, recent_demand in snapshot:
+        if stock <= min_stock:
+            alerts.append(Alert(
+                product_id=product_id,
+                alert_type='LOW_STOCK',
+                message=f'Stock level ({stock}) is below minimum ({min_stock})',
+                threshold=min_stock,
+                current_stock=stock,
+            ))
+        if stock > min_stock * 2 and recent_demand == 0:
+            alerts.append(Alert(
+                product_id=product_id,
+                alert_type='OVERSTOCK',
+                message=f'Overstock detected: {stock} units with no sales in {OVERSTOCK_WINDOW_DAYS} days',
+                threshold=min_stock * 2,
+                current_stock=stock,
+            ))
+    return alerts
+
+
+def discrepancy_alerts(model, snapshot, as_of=None):
+    """
+    Alertas PREDICTION_DISCREPANCY (sin guardar): predice la demanda de
+    dentro de PREDICTION_HORIZON_DAYS días para todos los productos en un
+    solo lote y marca los que se alejan del stock más que su mínimo.
+    """
+    if model is None or not HAS_ML_LIBS or not snapshot:
+        return []
+    as_of = as_of or timezone.localdate()
+    target_date = as_of + timedelta(days=PREDICTION_HORIZON_DAYS)
+
+    columns = np.array([row[:4] for row in snapshot], dtype=np.int64)
+    product_ids, category_ids, stock, min_stock = columns.T
+    X = build_feature_matrix([target_date], product_ids, category_ids)
+    predicted = np.empty(len(X), dtype=np.float64)
+    for start, preds in predict_matrix(model, X):
+        predicted[start:start + len(preds)] = preds
+
+    discrepancy = np.abs(stock - predicted)
+    alerts = []
+    for i in np.flatnonzero(discrepancy > min_stock).tolist():
+        alerts.append(Alert(
+            product_id=int(product_ids[i]),
+            alert_type='PREDICTION_DISCREPANCY',
+            message=f'Stock ({stock[i]}) vs Predicted demand ({predicted[i]:.1f}) discrepancy',
+            threshold=int(discrepancy[i]),
+            current_stock=int(stock[i]),
+            predicted_demand=float(predicted[i]),
+        ))
+    return alerts
+
+
+def generate_alerts(model=None, as_of=None):
+    """
+    Genera todas las alertas y devuelve (alertas nuevas, candidatas).
+    Las candidatas que ya tienen una alerta abierta del mismo tipo se omiten.
+    """
+    snapshot = load_stock_snapshot(as_of)
+    alerts = stock_alerts(snapshot)
+    try:
+        alerts += discrepancy_alerts(model, snapshot, as_of)
+    except Exception:
+        # Sin predicción se guardan igual las alertas de stock
+        logger.exception('Error en la predicción de demanda para alertas')
+
+    open_alerts = Alert.objects.filter(resolved=False)
+    with transaction.atomic():
+        before = open_alerts.count()
+        Alert.objects.bulk_create(alerts, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        created = open_alerts.count() - before
+    return created, len(alerts)
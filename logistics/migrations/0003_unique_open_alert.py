@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:54
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def resolve_duplicate_open_alerts(apps, schema_editor):
+    """Conserva la alerta abierta más antigua por (producto, tipo) y resuelve el resto."""
+    Alert = apps.get_model('logistics', 'Alert')
+    duplicates = (
+        Alert.objects.filter(resolved=False)
+        .values('product_id', 'alert_type')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        Alert.objects.filter(
+            product_id=row['product_id'], alert_type=row['alert_type'], resolved=False
+        ).exclude(id=row['keep']).update(resolved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0002_inventorymovement'),
+        ('products', '0005_product_warranty_months'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_open_alerts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='alert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved', False)), fields=('product', 'alert_type'), name='unique_open_alert'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0003_unique_open_alert'),
+        ('products', '0005_product_warranty_months'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['created_at', 'id'], name='logistics_alert_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['fecha_movimiento', 'id'], name='logistics_mov_fecha_id_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from products.models import Product
+from products.stock import drain_stock, return_stock
 
 class InventoryMovement(models.Model):
     """
@@ -28,6 +29,13 @@ class InventoryMovement(models.Model):
         default='Ajuste manual'
     )
     fecha_movimiento = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Listado por cursor (-fecha_movimiento, -id)
+            models.Index(fields=['fecha_movimiento', 'id'], name='logistics_mov_fecha_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.tipo_movimiento} de {self.cantidad} para {self.producto.name}"
     
@@ -36,19 +44,14 @@ class InventoryMovement(models.Model):
     # actualiza el stock en el modelo 'Product')
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs) # Guarda el movimiento primero
-        
-        # Actualiza el stock en el producto relacionado
+
+        # UPDATE con F() en la base de datos: dos movimientos concurrentes no se pisan
         if self.tipo_movimiento == 'ENTRADA':
-            self.producto.stock += self.cantidad
+            return_stock(self.producto_id, self.cantidad)
         elif self.tipo_movimiento == 'SALIDA':
             # Evita stock negativo
-            if self.producto.stock >= self.cantidad:
-                self.producto.stock -= self.cantidad
-            else:
-                # (En un sistema real, lanzarías un error aquí)
-                self.producto.stock = 0
-        
-        self.producto.save(update_fields=['stock'])
+            drain_stock(self.producto_id, self.cantidad)
+        self.producto.refresh_from_db(fields=['stock'])
 
 
 
@@ -69,6 +72,20 @@ class Alert(models.Model):
     resolved = models.BooleanField(default=False)
     resolved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            # Una sola alerta abierta por producto y tipo (permite bulk_create con ignore_conflicts)
+            models.UniqueConstraint(
+                fields=['product', 'alert_type'],
+                condition=models.Q(resolved=False),
+                name='unique_open_alert',
+            ),
+        ]
+        indexes = [
+            # Listado por cursor (-created_at, -id)
+            models.Index(fields=['created_at', 'id'], name='logistics_alert_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.alert_type} - {self.product.name}"
 
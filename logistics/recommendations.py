@@ -0,0 +1,49 @@
+"""
+Recomendaciones de stock a partir del pronóstico de 30 días.
+
+Toda la grilla (productos x días) se predice con ia.inference.forecast_horizon
+en lugar de llamar a model.predict una vez por producto y día, y las
+recomendaciones se guardan con un único bulk_create.
+"""
+# Importaciones condicionales para machine learning
+try:
+    import numpy as np
+    HAS_ML_LIBS = True
+except ImportError:
+    HAS_ML_LIBS = False
+    np = None
+
+from django.utils import timezone
+
+from ia.inference import forecast_horizon
+from products.models import Product
+from .models import Recommendation
+
+HORIZON_DAYS = 30
+STOCK_BUFFER = 1.2  # 20% sobre la demanda media pronosticada
+BATCH_SIZE = 2000
+
+
+def generate_recommendations(model, start_date=None, horizon=HORIZON_DAYS):
+    """Crea las recomendaciones y devuelve cuántas se guardaron."""
+    rows = list(Product.objects.order_by('id').values_list('id', 'category_id', 'stock', 'min_stock'))
+    if not rows:
+        return 0
+    product_ids, category_ids, stock, min_stock = np.array(rows, dtype=np.int64).T
+
+    forecast = forecast_horizon(model, product_ids, category_ids, start_date or timezone.localdate(), horizon)
+    recommended = np.trunc(forecast['mean'] * STOCK_BUFFER).astype(np.int64)
+    gap = np.abs(stock - recommended)
+
+    # Create recommendation if stock is significantly different
+    recommendations = [
+        Recommendation(
+            product_id=int(product_ids[i]),
+            recommended_stock=int(recommended[i]),
+            reason=f'IA prediction suggests {recommended[i]} units for optimal stock level',
+            priority='HIGH' if gap[i] > min_stock[i] * 2 else 'MEDIUM',
+        )
+        for i in np.flatnonzero(gap > min_stock).tolist()
+    ]
+    Recommendation.objects.bulk_create(recommendations, batch_size=BATCH_SIZE)
+    return len(recommendations)
@@ -1,3 +1,77 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from users.models import User
+from .alerts import generate_alerts
+from .models import Alert, InventoryMovement
+
+
+class InventoryMovementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Logistics')
+        cls.product = Product.objects.create(
+            name='L', category=category, sku='LOG-0', price=Decimal('10.00'), stock=5
+        )
+
+    def _move(self, kind, quantity):
+        movement = InventoryMovement(producto=self.product, tipo_movimiento=kind, cantidad=quantity)
+        movement.save()
+        return movement
+
+    def test_movements_update_stock_in_the_database(self):
+        self._move('ENTRADA', 3)
+        self.assertEqual(self.product.stock, 8)
+        self._move('SALIDA', 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 6)
+
+    def test_outgoing_movement_never_goes_below_zero(self):
+        movement = self._move('SALIDA', 9)
+        self.assertEqual(movement.producto.stock, 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+
+class GenerateAlertsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Alertas')
+        for sku, stock in (('LOW', 1), ('OVER', 50), ('OK', 7)):
+            Product.objects.create(
+                name=sku, category=category, sku=sku, price=Decimal('1.00'), stock=stock, min_stock=5
+            )
+
+    def _open(self):
+        return sorted(Alert.objects.filter(resolved=False).values_list('product__sku', 'alert_type'))
+
+    def test_rerun_does_not_duplicate_open_alerts(self):
+        self.assertEqual(generate_alerts(), (2, 2))
+        self.assertEqual(generate_alerts(), (0, 2))
+        self.assertEqual(self._open(), [('LOW', 'LOW_STOCK'), ('OVER', 'OVERSTOCK')])
+
+        # Resuelta la alerta, la siguiente corrida la vuelve a abrir
+        Alert.objects.filter(alert_type='LOW_STOCK').update(resolved=True)
+        self.assertEqual(generate_alerts(), (1, 2))
+        self.assertEqual(Alert.objects.count(), 3)
+
+    def test_prediction_error_is_logged_and_stock_alerts_are_kept(self):
+        class BrokenModel:
+            def predict(self, X):
+                raise RuntimeError('modelo roto')
+
+        with self.assertLogs('logistics.alerts', level='ERROR'):
+            self.assertEqual(generate_alerts(model=BrokenModel()), (2, 2))
 
-# Create your tests here.
+    def test_model_load_error_is_logged_by_the_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('alerts_admin', 'al@example.com', 'x'))
+        with mock.patch('logistics.views.model_registry.get', side_effect=OSError('pkl dañado')), \
+                self.assertLogs('logistics.views', level='ERROR'):
+            response = client.post('/api/v1/alerts/generate_alerts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'alerts_created': 2, 'candidates': 2})
@@ -0,0 +1,110 @@
+"""
+Retención de la bitácora por meses.
+
+Los meses completos anteriores a LOG_RETENTION_DAYS se copian a
+MEDIA_ROOT/log_archives/logentry-AAAA-MM.jsonl.gz (una entrada JSON por
+línea) y luego se borran de la tabla LogEntry, que queda acotada a los
+meses recientes.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import LogEntry
+
+CHUNK_SIZE = 5000
+
+
+def archive_dir() -> Path:
+    base = Path(getattr(settings, 'MEDIA_ROOT', 'media')) / 'log_archives'
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(start):
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def expired_months(retention_days=None, now=None):
+    """
+    Meses (inicio, fin) en UTC, del más antiguo al más reciente, que
+    terminaron antes del límite de retención, desde el de la entrada más
+    antigua.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'LOG_RETENTION_DAYS', 180)
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    oldest = LogEntry.objects.aggregate(oldest=Min('timestamp'))['oldest']
+    if oldest is None:
+        return []
+    months = []
+    start = _month_start(oldest)
+    while _next_month(start) <= cutoff:
+        months.append((start, _next_month(start)))
+        start = _next_month(start)
+    return months
+
+
+def _archive_path(start):
+    # A rerun of a month already archived (e.g. late entries) gets its own file
+    base = archive_dir()
+    name = f"logentry-{start:%Y-%m}"
+    path = base / f"{name}.jsonl.gz"
+    n = 1
+    while path.exists():
+        path = base / f"{name}.{n}.jsonl.gz"
+        n += 1
+    return path
+
+
+def archive_month(start, end, chunk_size=CHUNK_SIZE):
+    """
+    Comprime las entradas de [start, end) a gzip JSONL y las borra de la
+    tabla. Devuelve (ruta, cantidad); (None, 0) si el mes no tiene entradas.
+    El archivo se escribe completo antes de borrar nada.
+    """
+    month_qs = LogEntry.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    max_id = month_qs.aggregate(max_id=Max('id'))['max_id']
+    if max_id is None:
+        return None, 0
+    month_qs = month_qs.filter(id__lte=max_id)
+
+    path = _archive_path(start)
+    tmp_path = path.with_name(path.name + '.tmp')
+    count = 0
+    rows = (
+        month_qs.order_by('id')
+        .values_list('id', 'timestamp', 'user_id', 'user__username', 'ip_address', 'action')
+        .iterator(chunk_size=chunk_size)
+    )
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for entry_id, timestamp, user_id, username, ip_address, action in rows:
+            f.write(json.dumps({
+                'id': entry_id,
+                'timestamp': timestamp.isoformat(),
+                'user_id': user_id,
+                'username': username,
+                'ip_address': ip_address,
+                'action': action,
+            }, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    os.replace(tmp_path, path)
+
+    # Delete in id chunks to keep each statement (and lock) short
+    while True:
+        ids = list(month_qs.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        LogEntry.objects.filter(id__in=ids).delete()
+    return path, count
@@ -0,0 +1,93 @@
+"""
+Escritura de la bitácora fuera del ciclo de la petición.
+
+audit_writer.log() solo encola el LogEntry; el hilo de BackgroundWriter
+(backend_salessmart.background) los guarda con bulk_create cuando se junta
+AUDIT_BATCH_SIZE o pasan AUDIT_FLUSH_INTERVAL segundos. Si la cola está
+llena (o AUDIT_ASYNC=False) la entrada se guarda en el momento, y al
+terminar el proceso se vacía lo pendiente.
+"""
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from backend_salessmart.background import BackgroundWriter
+from .models import ACTION_PREFIX_LENGTH, LogEntry
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(request):
+    """IP del cliente, considerando X-Forwarded-For (proxies como Daphne)."""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0]
+    return request.META.get('REMOTE_ADDR')
+
+
+class AuditWriter(BackgroundWriter):
+    thread_name = 'audit-writer'
+
+    def __init__(self):
+        super().__init__(stats=('queued', 'written', 'sync_writes', 'failed'))
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'AUDIT_ASYNC', True)
+
+    def queue_size(self):
+        return getattr(settings, 'AUDIT_QUEUE_SIZE', 10000)
+
+    def batch_size(self):
+        return getattr(settings, 'AUDIT_BATCH_SIZE', 200)
+
+    def batch_interval(self):
+        return getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0)
+
+    def log(self, action, user=None, ip_address=None):
+        """Registra una acción; devuelve sin esperar al INSERT."""
+        entry = LogEntry(
+            ip_address=ip_address or 'IP_UNKNOWN',
+            user=user if getattr(user, 'is_authenticated', False) else None,
+            action=action,
+            # bulk_create no pasa por LogEntry.save
+            action_prefix=(action or '')[:ACTION_PREFIX_LENGTH],
+            timestamp=timezone.now(),
+        )
+        if not self.enabled:
+            self._write_sync(entry)
+        elif self.submit(entry):
+            self.count('queued')
+        else:
+            # Backpressure: the request pays for its own INSERT instead of dropping it
+            self._write_sync(entry)
+
+    def process(self, batch):
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            LogEntry.objects.bulk_create(batch)
+            self.count('written', len(batch))
+        except Exception:
+            # One bad row must not lose the whole batch
+            for entry in batch:
+                self._write_one(entry)
+
+    def _write_sync(self, entry):
+        self.count('sync_writes')
+        self._write_one(entry)
+
+    def _write_one(self, entry):
+        try:
+            entry.save(force_insert=True)
+            self.count('written')
+        except Exception:
+            self.count('failed')
+            logger.exception('Error guardando bitácora')
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,70 @@
+"""
+Exportación de la bitácora en streaming.
+
+Las filas se leen con values_list().iterator() (cursor del lado del servidor
+en PostgreSQL), de modo que la memoria no crece con el tamaño de la tabla:
+el CSV se envía por partes con StreamingHttpResponse y el XLSX se escribe con
+openpyxl en modo write-only sobre un archivo temporal.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+# Importaciones condicionales para reportes
+try:
+    from openpyxl import Workbook
+    HAS_REPORT_LIBS = True
+except ImportError:
+    HAS_REPORT_LIBS = False
+    Workbook = None
+
+CHUNK_SIZE = 2000
+# Hasta este tamaño el XLSX se arma en memoria; a partir de ahí pasa a disco
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def iter_log_rows(queryset, empty_user='', chunk_size=CHUNK_SIZE):
+    """(fecha, usuario, ip, acción) por cada LogEntry, sin instanciar modelos."""
+    rows = queryset.values_list('timestamp', 'user__username', 'ip_address', 'action').iterator(chunk_size=chunk_size)
+    for timestamp, username, ip_address, action in rows:
+        yield [timestamp.strftime('%Y-%m-%d %H:%M:%S'), username or empty_user, ip_address, action]
+
+
+def stream_csv(queryset, filename='bitacora.csv', header=('timestamp', 'usuario', 'ip', 'accion')):
+    writer = csv.writer(_Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in iter_log_rows(queryset):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(queryset, filename, title='Bitácora del Sistema', header=('Fecha', 'Usuario', 'IP', 'Acción')):
+    """
+    XLSX en modo write-only: openpyxl no guarda las celdas en memoria y el
+    libro se escribe en un archivo temporal que FileResponse envía por bloques.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    ws.append(list(header))
+    for row in iter_log_rows(queryset, empty_user='-'):
+        ws.append(row)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    wb.save(spool)
+    spool.seek(0)
+    # FileResponse cierra (y borra) el temporal al terminar de enviarlo
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from logs.archive import archive_month, expired_months
+
+
+class Command(BaseCommand):
+    help = 'Archiva en gzip JSONL los meses de bitácora fuera del período de retención y los borra de LogEntry.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Días a conservar en la tabla (por defecto LOG_RETENTION_DAYS).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo muestra los meses que se archivarían.')
+
+    def handle(self, *args, **options):
+        months = expired_months(options['retention_days'])
+        if not months:
+            self.stdout.write('No hay meses vencidos para archivar')
+            return
+
+        total = 0
+        for start, end in months:
+            if options['dry_run']:
+                self.stdout.write(f'{start:%Y-%m}: se archivaría')
+                continue
+            path, count = archive_month(start, end)
+            total += count
+            if path is not None:
+                self.stdout.write(f'{start:%Y-%m}: {count} entradas -> {path}')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archivadas {total} entradas'))
@@ -1,6 +1,6 @@
 import logging
 from django.utils.deprecation import MiddlewareMixin
-from .models import LogEntry
+from .audit import audit_writer, client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -10,16 +10,12 @@ class LoggingMiddleware(MiddlewareMixin):
         if request.method in ['POST', 'PUT', 'DELETE'] and hasattr(request, 'user') and request.user.is_authenticated:
             ip = self.get_client_ip(request)
             action = f"{request.method} {request.path}"
-            LogEntry.objects.create(
+            # Encolado: el INSERT lo hace el hilo de logs.audit, fuera de la petición
+            audit_writer.log(
                 ip_address=ip,
                 user=request.user,
                 action=action
             )
 
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return client_ip(request)
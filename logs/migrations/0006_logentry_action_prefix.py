@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def populate_action_prefix(apps, schema_editor):
+    LogEntry = apps.get_model('logs', 'LogEntry')
+    LogEntry.objects.update(action_prefix=Substr('action', 1, 100))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0005_logentry_ts_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='logentry',
+            name='logs_entry_action_idx',
+        ),
+        migrations.AddField(
+            model_name='logentry',
+            name='action_prefix',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_action_prefix, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['action_prefix'], name='logs_entry_action_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
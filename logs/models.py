@@ -1,11 +1,34 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
+# Caracteres iniciales de 'action' copiados en action_prefix para la búsqueda por prefijo.
+# action no tiene tope (errores, diffs de productos): un índice sobre el texto completo
+# haría fallar en PostgreSQL los INSERT de más de ~2.7KB
+ACTION_PREFIX_LENGTH = 100
+
+
 class LogEntry(models.Model):
     ip_address = models.GenericIPAddressField()
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs_activity_logs')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Hora del evento, no del INSERT (logs.audit guarda las entradas en lotes)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     action = models.TextField()
+    # Inicio de action (se completa al guardar), indexado para ?action_prefix=
+    action_prefix = models.CharField(max_length=ACTION_PREFIX_LENGTH, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Orden de la bitácora (-timestamp, -id), también para las páginas por cursor
+            models.Index(fields=['timestamp', 'id'], name='logs_entry_ts_id_idx'),
+            models.Index(fields=['user', 'timestamp'], name='logs_entry_user_ts_idx'),
+            # Búsqueda por prefijo de acción (LIKE 'POST /api/%') en PostgreSQL
+            models.Index(fields=['action_prefix'], name='logs_entry_action_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.action_prefix = (self.action or '')[:ACTION_PREFIX_LENGTH]
+        super().save(*args, **kwargs)
 
     def get_client_ip(self, request):
         """Obtiene la IP del cliente, considerando proxies (como Daphne)."""
@@ -1,3 +1,113 @@
-from django.test import TestCase
+import csv
+import io
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+from .audit import AuditWriter
+from .exports import HAS_REPORT_LIBS
+from .models import ACTION_PREFIX_LENGTH, LogEntry
+
+URL = '/api/v1/admin/logs/'
+
+
+class ActionPrefixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('logs_admin', 'l@example.com', 'x', role='ADMIN')
+        cls.long_action = 'Error en producto: ' + 'x' * 5000
+        for action in ('POST /api/v1/pedidos/', 'GET /api/v1/pedidos/', cls.long_action):
+            LogEntry(ip_address='127.0.0.1', action=action).save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _actions(self, prefix):
+        response = self.client.get(URL, {'action_prefix': prefix, 'page': 1})
+        self.assertEqual(response.status_code, 200)
+        return [row['action'] for row in response.json()['results']]
+
+    def test_prefix_is_bounded_copy_of_action(self):
+        entry = LogEntry.objects.get(action=self.long_action)
+        self.assertEqual(entry.action_prefix, self.long_action[:ACTION_PREFIX_LENGTH])
+
+    def test_filter_by_short_and_long_prefix(self):
+        self.assertEqual(self._actions('POST /api/'), ['POST /api/v1/pedidos/'])
+        self.assertEqual(self._actions(self.long_action[:300]), [self.long_action])
+        self.assertEqual(self._actions(self.long_action[:299] + 'y'), [])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('export_admin', 'e@example.com', 'x', role='ADMIN')
+        LogEntry(ip_address='10.0.0.1', action='POST /api/v1/uno/', user=cls.admin).save()
+        LogEntry(ip_address='10.0.0.2', action='POST /api/v1/dos/, "con comas"').save()
+        LogEntry(ip_address='10.0.0.3', action='GET /api/v1/tres/').save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _export(self, fmt):
+        response = self.client.get(URL + 'export/', {'format': fmt, 'action_prefix': 'POST'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_is_streamed_with_the_filters_applied(self):
+        response, content = self._export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], ['timestamp', 'usuario', 'ip', 'accion'])
+        self.assertEqual(
+            sorted(row[1:] for row in rows[1:]),
+            [['', '10.0.0.2', 'POST /api/v1/dos/, "con comas"'], ['export_admin', '10.0.0.1', 'POST /api/v1/uno/']],
+        )
+
+    @skipUnless(HAS_REPORT_LIBS, 'openpyxl es necesario para exportar a Excel')
+    def test_xlsx_has_the_same_rows(self):
+        from openpyxl import load_workbook
+
+        _, content = self._export('xlsx')
+        sheet = load_workbook(io.BytesIO(content), read_only=True).active
+        rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows[0], ['Fecha', 'Usuario', 'IP', 'Acción'])
+        self.assertEqual(
+            sorted(row[1:] for row in rows[1:]),
+            [['-', '10.0.0.2', 'POST /api/v1/dos/, "con comas"'], ['export_admin', '10.0.0.1', 'POST /api/v1/uno/']],
+        )
+
+
+@override_settings(AUDIT_ASYNC=True, AUDIT_BATCH_SIZE=50, AUDIT_FLUSH_INTERVAL=0.05)
+class AuditWriterTests(TransactionTestCase):
+    def setUp(self):
+        self.writer = AuditWriter()
+        self.addCleanup(self.writer.close)
+
+    def test_queued_entries_are_written_in_batches(self):
+        with mock.patch('backend_salessmart.background.close_old_connections') as close_old:
+            for i in range(5):
+                self.writer.log(f'POST /api/v1/{i}/', ip_address='127.0.0.1')
+            deadline = time.monotonic() + 5
+            while self.writer.stats['written'] < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.writer.close()
+        self.assertEqual(LogEntry.objects.count(), 5)
+        self.assertEqual(LogEntry.objects.get(action='POST /api/v1/3/').action_prefix, 'POST /api/v1/3/')
+        self.assertEqual(self.writer.stats['queued'], 5)
+        self.assertEqual(self.writer.stats['written'], 5)
+        # El hilo revisa su conexión antes de cada lote
+        self.assertTrue(close_old.called)
+
+    def test_bad_row_does_not_lose_the_batch(self):
+        good = LogEntry(ip_address='127.0.0.1', action='ok')
+        bad = LogEntry(ip_address=None, action='bad')
+        with self.assertLogs('logs.audit', level='ERROR'):
+            self.writer._write([good, bad])
+        self.assertEqual(list(LogEntry.objects.values_list('action', flat=True)), ['ok'])
+        self.assertEqual((self.writer.stats['written'], self.writer.stats['failed']), (1, 1))
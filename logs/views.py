@@ -1,12 +1,14 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import LogEntry
+from .models import ACTION_PREFIX_LENGTH, LogEntry
 from .serializers import LogEntrySerializer
+from .exports import stream_csv, xlsx_response
+from .audit import audit_writer
 from permissions import IsAdmin
+from backend_salessmart.pagination import KeysetPagination
 from django.utils.dateparse import parse_date # Importar para las fechas
 from django.http import HttpResponse
-import csv
 from io import BytesIO
 import datetime
 
@@ -32,23 +34,27 @@ except ImportError:
     Workbook = None
 
 class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = LogEntry.objects.all().order_by('-timestamp')
+    queryset = LogEntry.objects.all().order_by('-timestamp', '-id')
     serializer_class = LogEntrySerializer
     permission_classes = [IsAdmin]
+    # Páginas por cursor sobre logs_entry_ts_id_idx
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-timestamp', '-id')
 
     # --- (NUEVO) AÑADIDO PARA FILTROS (CU-Bitácora) ---
     def get_queryset(self):
         """
         Sobrescribimos este método para aplicar filtros de la URL.
         """
-        # Empezamos con la consulta base
-        queryset = LogEntry.objects.all().order_by('-timestamp')
+        # Empezamos con la consulta base (con el usuario: una consulta por página, no una por entrada)
+        queryset = LogEntry.objects.select_related('user').order_by('-timestamp', '-id')
 
         # Obtenemos los parámetros de la URL (ej: /log/?user=admin)
         user_param = self.request.query_params.get('user', None)
         start_date_param = self.request.query_params.get('start_date', None)
         end_date_param = self.request.query_params.get('end_date', None)
         action_param = self.request.query_params.get('action', None)
+        action_prefix_param = self.request.query_params.get('action_prefix', None)
 
         # 1. Aplicar filtro de usuario (búsqueda parcial en username)
         if user_param:
@@ -69,9 +75,25 @@ class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
         # 4. Filtro por texto contenido en 'action'
         if action_param:
             queryset = queryset.filter(action__icontains=action_param)
+
+        # 5. Filtro por prefijo de 'action' (usa el índice logs_entry_action_prefix_idx)
+        if action_prefix_param:
+            if len(action_prefix_param) <= ACTION_PREFIX_LENGTH:
+                queryset = queryset.filter(action_prefix__startswith=action_prefix_param)
+            else:
+                queryset = queryset.filter(
+                    action_prefix=action_prefix_param[:ACTION_PREFIX_LENGTH],
+                    action__startswith=action_prefix_param,
+                )
                 
         return queryset
 
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=csv|xlsx|pdf selecciona el archivo de export, no un renderer de DRF
+        if self.action == 'export':
+            force = True
+        return super().perform_content_negotiation(request, force)
+
     @action(detail=False, methods=['get'], url_path='export')
     def export(self, request):
         """
@@ -87,7 +109,7 @@ class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Logs exportados formato={fmt} filtros={{user:{request.query_params.get('user','')}, action:{request.query_params.get('action','')}, start:{request.query_params.get('start_date','')}, end:{request.query_params.get('end_date','')}}}"
@@ -97,18 +119,7 @@ class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
 
         if fmt == 'csv':
             try:
-                response = HttpResponse(content_type='text/csv')
-                response['Content-Disposition'] = 'attachment; filename="bitacora.csv"'
-                writer = csv.writer(response)
-                writer.writerow(['timestamp', 'usuario', 'ip', 'accion'])
-                for l in logs_qs:
-                    writer.writerow([
-                        l.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                        (l.user.username if l.user else ''),
-                        l.ip_address,
-                        l.action,
-                    ])
-                return response
+                return stream_csv(logs_qs)
             except Exception as e:
                 return Response({'detail': 'Error generando CSV', 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -120,34 +131,7 @@ class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
             try:
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Bitácora del Sistema"
-                
-                # Headers
-                headers = ['Fecha', 'Usuario', 'IP', 'Acción']
-                ws.append(headers)
-                
-                # Data
-                for log in logs_qs:
-                    ws.append([
-                        log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                        log.user.username if log.user else '-',
-                        log.ip_address,
-                        log.action
-                    ])
-                
-                # Save to buffer
-                excel_buffer = BytesIO()
-                wb.save(excel_buffer)
-                excel_buffer.seek(0)
-                
-                response = HttpResponse(
-                    excel_buffer.read(),
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="bitacora_{datetime.datetime.now().strftime("%Y%m%d")}.xlsx"'
-                return response
+                return xlsx_response(logs_qs, f'bitacora_{datetime.datetime.now().strftime("%Y%m%d")}.xlsx')
             except Exception as e:
                 return Response({'detail': 'Error generando Excel', 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -176,7 +160,7 @@ class LogEntryViewSet(viewsets.ReadOnlyModelViewSet):
 
                 # Table data
                 data = [['Fecha', 'Usuario', 'IP', 'Acción']]
-                for log in logs_qs[:1000]:  # Limit for PDF
+                for log in logs_qs.select_related('user')[:1000]:  # Limit for PDF
                     data.append([
                         log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
                         log.user.username if log.user else '-',
@@ -0,0 +1,67 @@
+"""
+Operaciones atómicas sobre Product.stock.
+
+Todas se resuelven con un UPDATE usando F(), sin leer el stock a Python y
+volver a guardarlo, así que dos operaciones concurrentes no se pisan. Las
+salidas son condicionales (stock >= cantidad): o se descuenta todo o nada.
+"""
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Product
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def take_stock(product_id, quantity):
+    """Descuenta quantity si hay stock suficiente. Devuelve True si se descontó."""
+    return bool(
+        Product.objects.filter(id=product_id, stock__gte=quantity)
+        .update(stock=F('stock') - quantity, updated_at=timezone.now())
+    )
+
+
+def take_stock_bulk(quantities):
+    """
+    Descuenta {product_id: cantidad} con un solo UPDATE. Devuelve True si
+    se pudo descontar en todos los productos; si no, el llamador debe
+    revertir la transacción (los que sí alcanzaban ya se descontaron).
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    if not quantities:
+        return True
+    requested = _per_product(quantities)
+    updated = Product.objects.filter(id__in=list(quantities), stock__gte=requested).update(
+        stock=F('stock') - requested,
+        updated_at=timezone.now(),
+    )
+    return updated == len(quantities)
+
+
+def return_stock(product_id, quantity):
+    Product.objects.filter(id=product_id).update(stock=F('stock') + quantity, updated_at=timezone.now())
+
+
+def return_stock_bulk(quantities):
+    """Devuelve {product_id: cantidad} al stock con un solo UPDATE."""
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    if not quantities:
+        return
+    Product.objects.filter(id__in=list(quantities)).update(
+        stock=F('stock') + _per_product(quantities),
+        updated_at=timezone.now(),
+    )
+
+
+def drain_stock(product_id, quantity):
+    """Descuenta quantity sin bajar de cero (salidas manuales que recortan a 0)."""
+    Product.objects.filter(id=product_id).update(
+        stock=Greatest(F('stock') - quantity, Value(0)),
+        updated_at=timezone.now(),
+    )
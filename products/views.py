@@ -6,7 +6,7 @@ from django.db import transaction
 from .models import Category, Product, Price, InventoryMovement
 from .serializers import CategorySerializer, ProductSerializer, PriceSerializer, InventoryMovementSerializer
 from users.permissions import IsAdminUser, IsOperator
-from logs.models import LogEntry
+from logs.audit import audit_writer
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
@@ -56,7 +56,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         product = serializer.save()
         try:
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=self._get_ip(self.request) or 'IP_UNKNOWN',
                 user=self.request.user,
                 action=f"Producto creado id={product.id} name='{getattr(product, 'name', getattr(product, 'nombre', ''))}'"
@@ -78,7 +78,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 if old_val != new_val:
                     changes.append(f"{f}:{old_val}->{new_val}")
             diff_str = ", ".join(changes) if changes else "sin cambios"
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=self._get_ip(self.request) or 'IP_UNKNOWN',
                 user=self.request.user,
                 action=f"Producto actualizado id={product.id} diffs=[{diff_str}]"
@@ -91,7 +91,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         pname = getattr(instance, 'name', getattr(instance, 'nombre', ''))
         instance.delete()
         try:
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=self._get_ip(self.request) or 'IP_UNKNOWN',
                 user=self.request.user,
                 action=f"Producto eliminado id={pid} name='{pname}'"
@@ -106,7 +106,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             price = serializer.save(product=product)
             try:
-                LogEntry.objects.create(
+                audit_writer.log(
                     ip_address=self._get_ip(request) or 'IP_UNKNOWN',
                     user=request.user,
                     action=f"Precio agregado producto_id={product.id} price_id={price.id} precio={price.amount if hasattr(price,'amount') else ''}"
@@ -137,7 +137,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                     if before[k] != after[k]:
                         changes.append(f"{k}:{before[k]}->{after[k]}")
                 diff_str = ", ".join(changes) if changes else "sin cambios"
-                LogEntry.objects.create(
+                audit_writer.log(
                     ip_address=self._get_ip(request) or 'IP_UNKNOWN',
                     user=request.user,
                     action=f"Precio actualizado product_id={product.id} price_id={updated.id} diffs=[{diff_str}]"
@@ -179,7 +179,7 @@ class InventoryMovementViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Inventario movimiento={movement.movement_type} product_id={product.id} qty={movement.quantity} stock={prev_stock}->{product.stock}"
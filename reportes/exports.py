@@ -0,0 +1,95 @@
+"""
+Render de un ReporteDinamico a PDF (ReportLab) o XLSX (openpyxl).
+
+Devuelven (contenido en bytes, extensión, content type) para guardarlos
+como artefacto (reports.artifacts) y no volver a generarlos en cada descarga.
+"""
+import datetime
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+PDF_TYPE = 'application/pdf'
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def render_pdf(reporte, results):
+    # Crear buffer en memoria
+    buffer = BytesIO()
+    
+    # Crear documento PDF
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = []
+    
+    # Título
+    title = Paragraph(f"Reporte Dinámico - {reporte.prompt_original}", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+    
+    # Información del reporte
+    info = Paragraph(f"Generado el: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
+    elements.append(info)
+    elements.append(Spacer(1, 12))
+    
+    if results:
+        # Crear tabla con los datos
+        headers = list(results[0].keys())
+        data = [headers]
+        
+        for row in results:
+            data.append([str(value) for value in row.values()])
+        
+        # Crear tabla
+        table = Table(data)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ]))
+        elements.append(table)
+    else:
+        no_data = Paragraph("No se encontraron datos para mostrar.", styles['Normal'])
+        elements.append(no_data)
+    
+    # Construir PDF
+    doc.build(elements)
+    
+    # Obtener contenido del buffer
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_content, 'pdf', PDF_TYPE
+
+
+def render_xlsx(results):
+    # Generar Excel con openpyxl
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Reporte"
+
+    if results:
+        headers = list(results[0].keys())
+        ws.append(headers)
+        for row in results:
+            ws.append(list(row.values()))
+
+    excel_buffer = BytesIO()
+    wb.save(excel_buffer)
+    excel_buffer.seek(0)
+
+    return excel_buffer.getvalue(), 'xlsx', XLSX_TYPE
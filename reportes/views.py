@@ -3,13 +3,13 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
-from django.http import HttpResponse
 from .query_builder import parse_prompt, build_query
 from .models import ReporteDinamico
+from .exports import PDF_TYPE, XLSX_TYPE, render_pdf, render_xlsx
+from reports import artifacts
 from permissions import IsAdmin
 import json
 import datetime
-from io import BytesIO
 
 # Importaciones condicionales para reportes
 try:
@@ -109,70 +109,12 @@ class GenerateReportView(APIView):
                 page = paginator.paginate_queryset(results, request)
                 return paginator.get_paginated_response(page)
 
-            # --- (2) SOLUCIÓN PDF: Usando ReportLab ---
             elif formato == 'pdf':
-                from reportlab.pdfgen import canvas
-                from reportlab.lib.pagesizes import letter, A4
-                from reportlab.lib.styles import getSampleStyleSheet
-                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-                from reportlab.lib import colors
-                from io import BytesIO
-                
-                # Crear buffer en memoria
-                buffer = BytesIO()
-                
-                # Crear documento PDF
-                doc = SimpleDocTemplate(buffer, pagesize=A4)
-                styles = getSampleStyleSheet()
-                elements = []
-                
-                # Título
-                title = Paragraph(f"Reporte Dinámico - {reporte.prompt}", styles['Title'])
-                elements.append(title)
-                elements.append(Spacer(1, 12))
-                
-                # Información del reporte
-                info = Paragraph(f"Generado el: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
-                elements.append(info)
-                elements.append(Spacer(1, 12))
-                
-                if results:
-                    # Crear tabla con los datos
-                    headers = list(results[0].keys())
-                    data = [headers]
-                    
-                    for row in results:
-                        data.append([str(value) for value in row.values()])
-                    
-                    # Crear tabla
-                    table = Table(data)
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ]))
-                    elements.append(table)
-                else:
-                    no_data = Paragraph("No se encontraron datos para mostrar.", styles['Normal'])
-                    elements.append(no_data)
-                
-                # Construir PDF
-                doc.build(elements)
-                
-                # Obtener contenido del buffer
-                pdf_content = buffer.getvalue()
-                buffer.close()
-                
-                # Crear respuesta HTTP
-                response = HttpResponse(pdf_content, content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename="reporte_{query_id}.pdf"'
-                return response
+                # Se genera una vez por reporte; luego se sirve el archivo (ETag/Range)
+                path = artifacts.get_or_render(
+                    artifacts.reporte_stem(reporte, 'pdf'), lambda: render_pdf(reporte, results)
+                )
+                return artifacts.serve(request, path, f"reporte_{query_id}.pdf", PDF_TYPE)
 
             elif formato == 'xlsx':
                 if not HAS_REPORT_LIBS or not Workbook:
@@ -181,24 +123,10 @@ class GenerateReportView(APIView):
                         'message': 'openpyxl library is required for Excel exports'
                     }, status=status.HTTP_400_BAD_REQUEST)
                     
-                # Generar Excel con openpyxl
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Reporte"
-
-                if results:
-                    headers = list(results[0].keys())
-                    ws.append(headers)
-                    for row in results:
-                        ws.append(list(row.values()))
-
-                excel_buffer = BytesIO()
-                wb.save(excel_buffer)
-                excel_buffer.seek(0)
-
-                response = HttpResponse(excel_buffer.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-                response['Content-Disposition'] = f'attachment; filename="reporte_{query_id}.xlsx"'
-                return response
+                path = artifacts.get_or_render(
+                    artifacts.reporte_stem(reporte, 'xlsx'), lambda: render_xlsx(results)
+                )
+                return artifacts.serve(request, path, f"reporte_{query_id}.xlsx", XLSX_TYPE)
 
             else:
                 return Response({'error': 'Formato no soportado. Use pdf, xlsx o json.'}, status=status.HTTP_400_BAD_REQUEST)
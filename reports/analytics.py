@@ -0,0 +1,136 @@
+"""
+Consultas agregadas para los reportes predefinidos.
+
+Todo se calcula en la base de datos (Sum, Count, TruncDate) y se devuelven
+solo las filas ya agrupadas, sin recorrer órdenes ni ítems en Python.
+"""
+from django.db.models import Avg, Count, DecimalField, F, Max, Sum, Value, Window
+from django.db.models.functions import Coalesce, Ntile, TruncDate
+from django.utils import timezone
+
+from sales.models import Order, OrderItem
+from users.models import User
+
+SOLD_STATUSES = ('DELIVERED', 'PAID')
+
+
+def sales_summary(start_date, top=10):
+    """
+    Ventas desde start_date en tres consultas: totales, productos más
+    vendidos y serie diaria.
+    """
+    orders = Order.objects.filter(created_at__gte=start_date, status__in=SOLD_STATUSES)
+
+    totals = orders.aggregate(total_sales=Sum('total'), total_orders=Count('id'))
+
+    top_products = list(
+        OrderItem.objects.filter(order__created_at__gte=start_date, order__status__in=SOLD_STATUSES)
+        .values('product__name')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('-quantity', 'product__name')[:top]
+    )
+
+    daily_sales = list(
+        orders.annotate(date=TruncDate('created_at'))
+        .values('date')
+        .annotate(amount=Sum('total'))
+        .order_by('date')
+    )
+
+    return {
+        'total_sales': float(totals['total_sales'] or 0),
+        'total_orders': totals['total_orders'],
+        'top_products': [{'name': row['product__name'], 'quantity': row['quantity']} for row in top_products],
+        'daily_sales': [
+            {'date': row['date'].strftime('%Y-%m-%d'), 'amount': float(row['amount'])} for row in daily_sales
+        ],
+    }
+
+
+def _rfm_segment(r, f, m):
+    if r >= 4 and f >= 4 and m >= 4:
+        return 'Campeones'
+    if r >= 3 and f >= 3:
+        return 'Leales'
+    if r >= 4:
+        return 'Nuevos'
+    if f >= 3:
+        return 'En riesgo'
+    if r <= 2:
+        return 'Perdidos'
+    return 'Potenciales'
+
+
+def customer_analytics(limit=100, offset=0, rfm=False):
+    """
+    Clientes (no staff) ordenados por total gastado, con cantidad de
+    órdenes, total, última orden y ticket promedio en una consulta agrupada
+    paginada con LIMIT/OFFSET. Con rfm=True agrega puntajes 1-5 de
+    recencia, frecuencia y monto (NTILE sobre todos los clientes, en SQL)
+    y el segmento que resulta de ellos.
+
+    Devuelve (total de clientes, filas de la página).
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    customers = (
+        User.objects.filter(is_staff=False)
+        .annotate(
+            total_orders=Count('orders'),
+            total_spent=Coalesce(Sum('orders__total'), Value(0), output_field=money),
+            last_order=Max('orders__created_at'),
+            average_order_value=Coalesce(Avg('orders__total'), Value(0), output_field=money),
+        )
+        .order_by('-total_spent', 'id')
+    )
+    if rfm:
+        # Puntaje 5 = más reciente / más órdenes / más gastado; sin órdenes = 1.
+        # NTILE reparte los empates entre cuantiles, así que cada dimensión
+        # desempata por las otras dos (a igual recencia puntúa más alto quien
+        # compró más veces y gastó más) y solo al final por id, para que el
+        # resultado sea estable entre corridas.
+        recency = F('last_order').asc(nulls_first=True)
+        frequency = F('total_orders').asc()
+        monetary = F('total_spent').asc()
+        customers = customers.annotate(
+            r_score=Window(Ntile(5), order_by=[recency, frequency, monetary, F('id').asc()]),
+            f_score=Window(Ntile(5), order_by=[frequency, monetary, recency, F('id').asc()]),
+            m_score=Window(Ntile(5), order_by=[monetary, frequency, recency, F('id').asc()]),
+        )
+
+    fields = ['username', 'email', 'first_name', 'last_name', 'date_joined',
+              'total_orders', 'total_spent', 'last_order', 'average_order_value']
+    if rfm:
+        fields += ['r_score', 'f_score', 'm_score']
+    rows = customers.values(*fields)
+    if limit is not None:
+        rows = rows[offset:offset + limit]
+    else:
+        rows = rows[offset:]
+
+    now = timezone.now()
+    data = []
+    for row in rows:
+        last_order = row['last_order']
+        customer = {
+            'username': row['username'],
+            'email': row['email'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'total_orders': row['total_orders'],
+            'total_spent': float(row['total_spent']),
+            'average_order_value': round(float(row['average_order_value']), 2),
+            'last_order': last_order.isoformat() if last_order else None,
+            'date_joined': row['date_joined'].isoformat(),
+        }
+        if rfm:
+            customer['recency_days'] = (now - last_order).days if last_order else None
+            customer['rfm'] = {
+                'recency': row['r_score'],
+                'frequency': row['f_score'],
+                'monetary': row['m_score'],
+                'segment': _rfm_segment(row['r_score'], row['f_score'], row['m_score']),
+            }
+        data.append(customer)
+
+    total = User.objects.filter(is_staff=False).count()
+    return total, data
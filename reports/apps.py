@@ -4,3 +4,6 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
     verbose_name = 'Sistema de Reportes Inteligente'
+
+    def ready(self):
+        import reports.signals  # noqa
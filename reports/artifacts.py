@@ -0,0 +1,211 @@
+"""
+Archivos exportados de reportes, generados una sola vez.
+
+Cada exportación (GeneratedReport en PDF/Excel/CSV, ReporteDinamico en
+PDF/XLSX) se escribe en MEDIA_ROOT/reports con un nombre fijo por reporte
+y formato; las descargas siguientes sirven ese archivo con FileResponse,
+ETag (tamaño + mtime), 304 con If-None-Match y rangos de bytes (206), sin
+volver a renderizar. gc_report_artifacts borra los huérfanos y los que
+superan REPORT_ARTIFACT_MAX_AGE_DAYS; se regeneran si se vuelven a pedir.
+"""
+import os
+import re
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
+
+ARTIFACTS_SUBDIR = 'reports'
+NAME_RE = re.compile(r'^(?P<kind>report|reporte_dinamico)_(?P<id>\d+)_(?P<fmt>[a-z]+)\.[a-z]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def artifacts_dir() -> Path:
+    base = Path(getattr(settings, 'MEDIA_ROOT', 'media')) / ARTIFACTS_SUBDIR
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def _find(stem):
+    for path in artifacts_dir().glob(f'{stem}.*'):
+        if not path.name.endswith('.tmp'):
+            return path
+    return None
+
+
+def get_or_render(stem, render, force=False):
+    """
+    Devuelve la ruta del artefacto stem.<ext>; si no existe (o con force)
+    lo genera con render() -> (contenido, extensión, content type) y lo
+    escribe de forma atómica (dos peticiones simultáneas escriben el mismo
+    contenido).
+    """
+    path = _find(stem)
+    if path is not None:
+        if not force:
+            return path
+        path.unlink(missing_ok=True)
+    content, extension, _ = render()
+    path = artifacts_dir() / f'{stem}.{extension}'
+    write_atomic(path, content)
+    return path
+
+
+def write_atomic(path, content):
+    """
+    Escribe content en path sin que un lector vea el archivo a medias: un
+    temporal propio (único por llamada, no solo por proceso, así dos hilos
+    no se pisan) en el mismo directorio y os.replace.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'{path.name}.', suffix='.tmp')
+    try:
+        # mkstemp crea el archivo con 0600; se publica con los permisos habituales
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def relative_path(path):
+    return str(Path(path).relative_to(Path(settings.MEDIA_ROOT)))
+
+
+def report_stem(report, fmt):
+    return f'report_{report.id}_{fmt.lower()}'
+
+
+def reporte_stem(reporte, fmt):
+    return f'reporte_dinamico_{reporte.id}_{fmt.lower()}'
+
+
+def etag_for(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+class _FileRange:
+    """Lectura acotada a length bytes desde la posición actual."""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def _parse_range(header, size):
+    """(inicio, fin) inclusivo para un único rango 'bytes=a-b', None si no aplica, False si es inválido."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # Varios rangos u otra unidad: se sirve completo
+    start, end = match.groups()
+    if not start and not end:
+        return False
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve(request, path, filename, content_type=None):
+    path = Path(path)
+    stat = path.stat()
+    etag = etag_for(stat)
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    f = open(path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(
+            _FileRange(f, end - start + 1), status=206,
+            as_attachment=True, filename=filename, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(f, as_attachment=True, filename=filename, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
+
+def collect_garbage(max_age_days=None, dry_run=False, now=None):
+    """
+    Borra artefactos de reportes que ya no existen, temporales viejos y los
+    que superan max_age_days. Devuelve la lista de rutas borradas.
+    """
+    from reportes.models import ReporteDinamico
+    from .models import GeneratedReport
+
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'REPORT_ARTIFACT_MAX_AGE_DAYS', 30)
+    now = now or timezone.now()
+    cutoff = (now - timedelta(days=max_age_days)).timestamp()
+    tmp_cutoff = (now - timedelta(hours=1)).timestamp()
+
+    paths = [p for p in artifacts_dir().iterdir() if p.is_file()]
+    ids = {'report': set(), 'reporte_dinamico': set()}
+    for path in paths:
+        match = NAME_RE.match(path.name)
+        if match:
+            ids[match['kind']].add(int(match['id']))
+    existing = {
+        'report': set(GeneratedReport.objects.filter(id__in=ids['report']).values_list('id', flat=True)),
+        'reporte_dinamico': set(
+            ReporteDinamico.objects.filter(id__in=ids['reporte_dinamico']).values_list('id', flat=True)
+        ),
+    }
+
+    removed = []
+    for path in paths:
+        mtime = path.stat().st_mtime
+        match = NAME_RE.match(path.name)
+        if path.name.endswith('.tmp'):
+            stale = mtime < tmp_cutoff
+        elif match:
+            stale = int(match['id']) not in existing[match['kind']] or mtime < cutoff
+        else:
+            continue
+        if stale:
+            removed.append(path)
+            if not dry_run:
+                path.unlink(missing_ok=True)
+    return removed
@@ -0,0 +1,137 @@
+"""
+Cache de resultados de reportes.
+
+La clave combina el tipo de reporte, los parámetros con su tipo
+(coerce_parameters: '30' y 30 son el mismo days, 0 y '0' el mismo rfm
+falso) y una versión de datos que las señales de reports.signals incrementan cuando se
+guarda una Order, un OrderItem o un Product; al cambiar la versión las
+entradas anteriores dejan de usarse y el backend las desaloja.
+
+Usa el alias de cache 'reports' (CACHES en settings): LocMemCache, con
+desalojo LRU al llegar a MAX_ENTRIES y vencimiento por TIMEOUT, o
+FileBasedCache para compartirlo entre procesos. Aciertos y fallos se
+cuentan en el mismo backend (ver ReportsViewSet.cache_stats).
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = 'reports'
+VERSION_KEY = 'reports:data-version'
+HITS_KEY = 'reports:stats:hits'
+MISSES_KEY = 'reports:stats:misses'
+
+
+def _cache():
+    return caches[CACHE_ALIAS if CACHE_ALIAS in settings.CACHES else 'default']
+
+
+def _incr(key, initial=1):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # add() no pisa el valor si otro proceso lo creó entre medio
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def _new_version():
+    # Si la versión se desaloja, la nueva no coincide con entradas viejas
+    return time.time_ns() // 1000
+
+
+def data_version():
+    return _cache().get_or_set(VERSION_KEY, _new_version, timeout=None)
+
+
+def bump_data_version():
+    return _incr(VERSION_KEY, initial=_new_version())
+
+
+def parse_bool(value):
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('1', 'true', 'yes', 'si', 'sí'):
+            return True
+        if text in ('', '0', 'false', 'no'):
+            return False
+        raise ValueError(f'Valor booleano inválido: {value!r}')
+    return bool(value)
+
+
+def parse_int(value):
+    if isinstance(value, bool):
+        raise ValueError(f'Valor entero inválido: {value!r}')
+    return int(value)
+
+
+# Tipo de cada parámetro que leen los generadores, por tipo de reporte
+PARAMETER_TYPES = {
+    'SALES': {'days': parse_int},
+    'INVENTORY': {'low_stock_threshold': parse_int},
+    'CUSTOMERS': {'limit': parse_int, 'offset': parse_int, 'rfm': parse_bool},
+}
+
+
+def coerce_parameters(report_type, parameters):
+    """
+    Parámetros con el tipo con que los usa el generador del reporte; los
+    demás quedan como llegaron. None se conserva (p. ej. limit sin tope).
+    Lanza ValueError si alguno no se puede convertir.
+    """
+    parameters = dict(parameters or {})
+    for name, parse in PARAMETER_TYPES.get(report_type, {}).items():
+        if parameters.get(name) is not None:
+            try:
+                parameters[name] = parse(parameters[name])
+            except (TypeError, ValueError):
+                raise ValueError(f'Parámetro inválido {name}: {parameters[name]!r}') from None
+    return parameters
+
+
+def normalize_parameters(parameters):
+    """JSON canónico (mismo orden de claves) de parámetros ya convertidos con coerce_parameters."""
+    return json.dumps(parameters or {}, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def cache_key(report_type, parameters):
+    digest = hashlib.sha1(normalize_parameters(parameters).encode('utf-8')).hexdigest()
+    return f'reports:data:{report_type}:{data_version()}:{digest}'
+
+
+def get_or_build(report_type, parameters, build):
+    """
+    Devuelve el resultado cacheado o lo genera con build(parametros) y lo
+    guarda. build recibe los mismos parámetros convertidos que forman la
+    clave, así que dos pedidos con la misma clave generan el mismo reporte.
+    """
+    parameters = coerce_parameters(report_type, parameters)
+    cache = _cache()
+    key = cache_key(report_type, parameters)
+    data = cache.get(key)
+    if data is not None:
+        _incr(HITS_KEY)
+        return data
+    _incr(MISSES_KEY)
+    data = build(parameters)
+    cache.set(key, data)
+    return data
+
+
+def stats():
+    cache = _cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+        'data_version': data_version(),
+        'backend': settings.CACHES.get(CACHE_ALIAS, settings.CACHES['default'])['BACKEND'],
+    }
@@ -0,0 +1,194 @@
+"""
+Render de un GeneratedReport a PDF, Excel o CSV.
+
+Devuelven (contenido en bytes, extensión, content type). Sin WeasyPrint el
+PDF cae a HTML y sin openpyxl el Excel cae a CSV, igual que antes en
+ReportsViewSet.export_pdf / export_excel.
+"""
+import csv
+import io
+import json
+
+from django.utils import timezone
+
+# Importaciones condicionales para reportes
+try:
+    from weasyprint import HTML, CSS
+    import openpyxl
+    from openpyxl.utils.dataframe import dataframe_to_rows
+    import pandas as pd
+    HAS_REPORT_LIBS = True
+    WEASYPRINT_AVAILABLE = True
+    EXCEL_AVAILABLE = True
+except (ImportError, OSError) as e:
+    print(f"⚠️ Librerías de reportes no disponibles: {e}")
+    HAS_REPORT_LIBS = False
+    WEASYPRINT_AVAILABLE = False
+    EXCEL_AVAILABLE = False
+    HTML = None
+    CSS = None
+    openpyxl = None
+    dataframe_to_rows = None
+    pd = None
+
+PDF_TYPE = 'application/pdf'
+HTML_TYPE = 'text/html'
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_TYPE = 'text/csv'
+
+
+def render_html(report):
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Reporte - {report.title}</title>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                margin: 20px;
+                color: #333;
+            }}
+            .header {{
+                background: linear-gradient(135deg, #00BCD4, #0097A7);
+                color: white;
+                padding: 20px;
+                margin-bottom: 20px;
+                border-radius: 8px;
+            }}
+            .header h1 {{
+                margin: 0;
+                font-size: 24px;
+            }}
+            .header p {{
+                margin: 5px 0 0 0;
+                opacity: 0.9;
+            }}
+            .content {{
+                background: #f8f9fa;
+                padding: 20px;
+                border-radius: 8px;
+                border: 1px solid #e9ecef;
+            }}
+            .data-table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin-top: 20px;
+            }}
+            .data-table th, .data-table td {{
+                border: 1px solid #ddd;
+                padding: 12px;
+                text-align: left;
+            }}
+            .data-table th {{
+                background-color: #00BCD4;
+                color: white;
+            }}
+            .footer {{
+                margin-top: 30px;
+                text-align: center;
+                color: #666;
+                font-size: 12px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>📊 {report.title}</h1>
+            <p>Generado el: {report.created_at.strftime('%d/%m/%Y %H:%M')}</p>
+            <p>Estado: {report.status}</p>
+        </div>
+        
+        <div class="content">
+            <h2>Datos del Reporte:</h2>
+            <pre style="white-space: pre-wrap; font-size: 12px;">{json.dumps(report.data, indent=2, ensure_ascii=False)}</pre>
+        </div>
+        
+        <div class="footer">
+            <p>SmartSales - Sistema de Reportes Inteligente</p>
+            <p>Generado automáticamente el {timezone.now().strftime('%d/%m/%Y %H:%M')}</p>
+        </div>
+    </body>
+    </html>
+    """
+    return html_content
+
+
+def render_pdf(report):
+    html_content = render_html(report)
+    if WEASYPRINT_AVAILABLE:
+        return HTML(string=html_content).write_pdf(), 'pdf', PDF_TYPE
+    # Fallback: devolver HTML
+    return html_content.encode('utf-8'), 'html', HTML_TYPE
+
+
+def render_csv(report):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    
+    # Escribir encabezado
+    writer.writerow([report.title])
+    writer.writerow([f"Generado: {report.created_at.strftime('%d/%m/%Y %H:%M')}"])
+    writer.writerow([f"Estado: {report.status}"])
+    writer.writerow([])  # Línea vacía
+    
+    # Escribir datos
+    if isinstance(report.data, dict):
+        writer.writerow(['Campo', 'Valor'])
+        for key, value in report.data.items():
+            writer.writerow([key, value])
+    elif isinstance(report.data, list):
+        if report.data and isinstance(report.data[0], dict):
+            headers = list(report.data[0].keys())
+            writer.writerow(headers)
+            for item in report.data:
+                writer.writerow([item.get(header, '') for header in headers])
+    
+    return output.getvalue().encode('utf-8'), 'csv', CSV_TYPE
+
+
+def render_excel(report):
+    if not EXCEL_AVAILABLE:
+        return render_csv(report)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Reporte"
+    
+    # Encabezado
+    ws['A1'] = report.title
+    ws['A2'] = f"Generado: {report.created_at.strftime('%d/%m/%Y %H:%M')}"
+    ws['A3'] = f"Estado: {report.status}"
+    
+    # Datos
+    row = 5
+    if isinstance(report.data, dict):
+        for key, value in report.data.items():
+            ws[f'A{row}'] = str(key)
+            ws[f'B{row}'] = str(value)
+            row += 1
+    elif isinstance(report.data, list):
+        if report.data and isinstance(report.data[0], dict):
+            # Escribir encabezados
+            headers = list(report.data[0].keys())
+            for col, header in enumerate(headers, 1):
+                ws.cell(row=row, column=col, value=header)
+            row += 1
+            
+            # Escribir datos
+            for item in report.data:
+                for col, header in enumerate(headers, 1):
+                    ws.cell(row=row, column=col, value=str(item.get(header, '')))
+                row += 1
+    
+    # Guardar en memoria
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue(), 'xlsx', XLSX_TYPE
+
+
+RENDERERS = {
+    'PDF': render_pdf,
+    'EXCEL': render_excel,
+    'CSV': render_csv,
+}
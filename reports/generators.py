@@ -0,0 +1,174 @@
+"""
+Generadores de los reportes predefinidos y de las consultas interpretadas.
+
+Los usan tanto ReportsViewSet (generación dentro de la petición) como
+reports.jobs (run_report_worker), sin pasar por la capa de vistas. Los
+parámetros llegan ya convertidos por reports.cache.coerce_parameters.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from products.models import Product
+from . import analytics
+from . import cache as report_cache
+
+
+def sales_report(parameters):
+    """Generar reporte de ventas"""
+    # Parámetros por defecto
+    days = parameters.get('days', 30)
+    start_date = timezone.now() - timedelta(days=days)
+
+    # Totales, top de productos y serie diaria agregados en la base de datos
+    summary = analytics.sales_summary(start_date)
+    total_sales = summary['total_sales']
+    total_orders = summary['total_orders']
+    avg_order_value = total_sales / total_orders if total_orders > 0 else 0
+
+    return {
+        'period': f'Últimos {days} días',
+        'total_sales': total_sales,
+        'total_orders': total_orders,
+        'average_order_value': round(avg_order_value, 2),
+        'top_products': summary['top_products'],
+        'daily_sales': summary['daily_sales'],
+        'generated_at': timezone.now().isoformat()
+    }
+
+
+def inventory_report(parameters):
+    """Generar reporte de inventario"""
+    products = Product.objects.all()
+
+    low_stock_threshold = parameters.get('low_stock_threshold', 10)
+
+    inventory_data = []
+    low_stock_items = []
+    total_value = 0
+
+    for product in products:
+        stock_value = float(product.price) * product.stock
+        total_value += stock_value
+
+        product_data = {
+            'name': product.name,
+            'sku': product.sku,
+            'stock': product.stock,
+            'price': float(product.price),
+            'stock_value': stock_value,
+            'category': product.category.name if product.category else 'Sin categoría'
+        }
+
+        inventory_data.append(product_data)
+
+        if product.stock <= low_stock_threshold:
+            low_stock_items.append(product_data)
+
+    return {
+        'total_products': len(inventory_data),
+        'total_inventory_value': round(total_value, 2),
+        'low_stock_threshold': low_stock_threshold,
+        'low_stock_items': low_stock_items,
+        'inventory_details': inventory_data,
+        'generated_at': timezone.now().isoformat()
+    }
+
+
+def customers_report(parameters):
+    """Generar reporte de clientes"""
+    # Una consulta agrupada (y el conteo), paginada con limit/offset
+    limit = parameters.get('limit', 100)
+    offset = parameters.get('offset') or 0
+    total_customers, customers_data = analytics.customer_analytics(
+        limit=limit,
+        offset=offset,
+        rfm=parameters.get('rfm') or False,
+    )
+
+    return {
+        'total_customers': total_customers,
+        'limit': limit,
+        'offset': offset,
+        'customers': customers_data,
+        'generated_at': timezone.now().isoformat()
+    }
+
+
+GENERATORS = {
+    'SALES': sales_report,
+    'INVENTORY': inventory_report,
+    'CUSTOMERS': customers_report,
+}
+
+
+def template_report(category, parameters):
+    generate = GENERATORS.get(category)
+    if generate is None:
+        return {'error': 'Tipo de reporte no soportado'}
+    return generate(parameters)
+
+
+def cached_template_report(category, parameters):
+    """Reporte de una plantilla, reutilizando uno idéntico cacheado."""
+    return report_cache.get_or_build(category, parameters, lambda typed: template_report(category, typed))
+
+
+def interpret_query(query_text):
+    """Interpretar consulta en lenguaje natural (IA simple)"""
+    query_lower = query_text.lower()
+
+    # Patrones simples de reconocimiento
+    if any(word in query_lower for word in ['ventas', 'vendido', 'ingresos', 'facturación']):
+        if 'mes' in query_lower or 'mensual' in query_lower:
+            days = 30
+        elif 'semana' in query_lower or 'semanal' in query_lower:
+            days = 7
+        elif 'año' in query_lower or 'anual' in query_lower:
+            days = 365
+        else:
+            days = 30
+
+        return {
+            'type': 'sales',
+            'parameters': {'days': days},
+            'sql': f'Sales report for last {days} days'
+        }
+
+    elif any(word in query_lower for word in ['inventario', 'stock', 'productos']):
+        return {
+            'type': 'inventory',
+            'parameters': {},
+            'sql': 'Inventory report'
+        }
+
+    elif any(word in query_lower for word in ['clientes', 'usuarios', 'compradores']):
+        return {
+            'type': 'customers',
+            'parameters': {},
+            'sql': 'Customers report'
+        }
+
+    else:
+        return {
+            'type': 'general',
+            'parameters': {},
+            'sql': 'General query'
+        }
+
+
+def execute_interpreted_query(interpreted_query):
+    """Ejecutar consulta interpretada"""
+    generate = GENERATORS.get(str(interpreted_query.get('type', '')).upper())
+    if generate is None:
+        return {'message': 'Consulta no reconocida', 'query': interpreted_query}
+    return generate(interpreted_query.get('parameters', {}))
+
+
+def cached_interpreted_query(interpreted_query):
+    # Mismo tipo que las plantillas: 'sales' y SALES comparten entradas
+    return report_cache.get_or_build(
+        str(interpreted_query.get('type', '')).upper(),
+        interpreted_query.get('parameters', {}),
+        lambda typed: execute_interpreted_query({**interpreted_query, 'parameters': typed}),
+    )
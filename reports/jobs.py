@@ -0,0 +1,111 @@
+"""
+Generación de reportes fuera de la petición.
+
+Las vistas crean el GeneratedReport en PENDING y responden 202; el comando
+run_report_worker (proceso report_worker del Procfile) toma los pendientes
+con un UPDATE condicional sobre status (dos workers nunca generan el mismo
+reporte), calcula los datos, escribe el archivo de exportación si el
+formato lo pide y deja el reporte en COMPLETED o ERROR. Los reportes que
+quedan en PROCESSING más de REPORT_JOB_TIMEOUT_SECONDS (worker caído)
+vuelven a PENDING.
+"""
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import artifacts, generators
+from .exports import RENDERERS
+from .models import GeneratedReport
+
+
+def worker_concurrency():
+    return getattr(settings, 'REPORT_WORKER_CONCURRENCY', 2)
+
+
+def job_timeout():
+    return timedelta(seconds=getattr(settings, 'REPORT_JOB_TIMEOUT_SECONDS', 600))
+
+
+def requeue_stale(now=None):
+    """Devuelve a PENDING los reportes en PROCESSING que superaron el timeout."""
+    limit = (now or timezone.now()) - job_timeout()
+    return GeneratedReport.objects.filter(status='PROCESSING', started_at__lt=limit).update(
+        status='PENDING', worker='', started_at=None
+    )
+
+
+def claim_next_report(worker_name=None):
+    """
+    Toma el reporte pendiente más antiguo. El UPDATE condicional sobre
+    status='PENDING' garantiza que dos workers nunca tomen el mismo.
+    """
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        report = GeneratedReport.objects.filter(status='PENDING').order_by('created_at').first()
+        if report is None:
+            return None
+        claimed = GeneratedReport.objects.filter(pk=report.pk, status='PENDING').update(
+            status='PROCESSING',
+            started_at=timezone.now(),
+            worker=worker_name,
+        )
+        if claimed:
+            report.refresh_from_db()
+            return report
+
+
+def generate_data(report):
+    # Mismos generadores (y el mismo cache) que usan las vistas
+    if report.template_id:
+        return generators.cached_template_report(report.template.category, report.parameters)
+    return generators.cached_interpreted_query(generators.interpret_query(report.query_text))
+
+
+def write_export(report):
+    """Genera el artefacto del formato pedido y devuelve su ruta relativa a MEDIA_ROOT."""
+    render = RENDERERS.get(report.format)
+    if render is None:
+        return ''
+    # force: un reporte reencolado no debe servir el archivo de un intento anterior
+    path = artifacts.get_or_render(
+        artifacts.report_stem(report, report.format), lambda: render(report), force=True
+    )
+    return artifacts.relative_path(path)
+
+
+def run_report(report):
+    try:
+        report.data = generate_data(report)
+        report.status = 'COMPLETED'
+        report.file_path = write_export(report)
+        report.completed_at = timezone.now()
+        report.error_message = ''
+    except Exception as e:
+        report.status = 'ERROR'
+        report.error_message = str(e)
+        report.completed_at = timezone.now()
+    report.save(update_fields=['data', 'status', 'file_path', 'completed_at', 'error_message'])
+    return report
+
+
+def worker_loop(once=False, poll_interval=2.0, log=print):
+    """Procesa reportes hasta que se interrumpa (o hasta vaciar la cola con once)."""
+    while True:
+        close_old_connections()
+        requeue_stale()
+        report = claim_next_report()
+        if report is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        report = run_report(report)
+        if report.status == 'COMPLETED':
+            log(f"Reporte {report.id} completado ({report.format})")
+        else:
+            log(f"Reporte {report.id} falló: {report.error_message}")
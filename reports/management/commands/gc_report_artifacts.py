@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from reports.artifacts import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Borra los archivos exportados de reportes eliminados o más viejos que el período de retención.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=int, default=None,
+                            help='Antigüedad máxima de un archivo (por defecto REPORT_ARTIFACT_MAX_AGE_DAYS).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo muestra los archivos que se borrarían.')
+
+    def handle(self, *args, **options):
+        removed = collect_garbage(options['max_age_days'], dry_run=options['dry_run'])
+        for path in removed:
+            self.stdout.write(f"{'se borraría' if options['dry_run'] else 'borrado'}: {path.name}")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Borrados {len(removed)} archivos'))
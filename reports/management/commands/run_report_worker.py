@@ -0,0 +1,55 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reports.jobs import worker_concurrency, worker_loop
+
+
+def _process_main(once, poll_interval):
+    import django
+    django.setup()
+    try:
+        worker_loop(once=once, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Genera en segundo plano los reportes en estado PENDING.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Procesos en paralelo (por defecto REPORT_WORKER_CONCURRENCY).')
+        parser.add_argument('--once', action='store_true',
+                            help='Procesa los reportes pendientes y termina.')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Segundos de espera cuando la cola está vacía.')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'] or worker_concurrency())
+        once, poll_interval = options['once'], options['poll_interval']
+        self.stdout.write(f'Worker de reportes iniciado ({concurrency} procesos)')
+
+        if concurrency == 1:
+            try:
+                worker_loop(once=once, poll_interval=poll_interval, log=self.stdout.write)
+            except KeyboardInterrupt:
+                self.stdout.write('Worker detenido')
+            return
+
+        # Cada proceso abre su propia conexión; no heredar la del padre
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_process_main, args=(once, poll_interval), daemon=True)
+            for _ in range(concurrency)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            self.stdout.write('Worker detenido')
@@ -47,11 +47,16 @@ class GeneratedReport(models.Model):
         ('ERROR', 'Error'),
     ], default='PENDING')
     error_message = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)  # Worker que lo generó (run_report_worker)
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -14,7 +14,8 @@ class GeneratedReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'template_name', 
             'query_text', 'parameters', 'data', 'format', 
-            'status', 'created_at', 'completed_at'
+            'status', 'file_path', 'error_message',
+            'created_at', 'started_at', 'completed_at'
         ]
         read_only_fields = ['user', 'query_sql', 'file_path', 'error_message']
 
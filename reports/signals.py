@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product
+from sales.models import Order, OrderItem
+from . import cache as report_cache
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_delete, sender=Product)
+def bump_report_data_version(sender, **kwargs):
+    # Los reportes cacheados con la versión anterior dejan de usarse
+    transaction.on_commit(report_cache.bump_data_version)
@@ -0,0 +1,302 @@
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from sales.models import Order, OrderItem
+from users.models import User
+from .models import GeneratedReport, ReportTemplate
+from . import analytics, artifacts, jobs
+from . import cache as report_cache
+from .exports import render_csv
+
+
+class ReportCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('report_admin', 'a@example.com', 'x')
+        cls.client_user = User.objects.create_user('report_client', 'c@example.com', 'x')
+        cls.template = ReportTemplate.objects.create(
+            name='Ventas', description='Ventas', category='SALES', query_template='sales'
+        )
+        category = Category.objects.create(name='Reportes')
+        cls.product = Product.objects.create(name='P', category=category, sku='REP-1', price=Decimal('10.00'), stock=5)
+
+    def setUp(self):
+        caches['reports'].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def _generate(self, parameters):
+        response = self.api.post(
+            '/api/v1/reports/generate_predefined/',
+            {'template_id': self.template.id, 'parameters': parameters, 'async': False},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def _sell(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.client_user, status='PAID', total=Decimal('10.00'), address='x')
+            OrderItem.objects.create(order=order, product=self.product, quantity=1, price=Decimal('10.00'))
+
+    def test_identical_parameters_hit_the_cache(self):
+        first = self._generate({'days': 30})
+        self.assertEqual(self._generate({'days': '30'}), first)
+        stats = report_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self._generate({'days': 7})
+        self.assertEqual(report_cache.stats()['misses'], 2)
+
+    def test_parameters_are_keyed_by_their_typed_value(self):
+        built = []
+        build = lambda typed: built.append(typed) or typed['rfm']
+        for rfm in (0, '0', 'false', False):
+            self.assertIs(report_cache.get_or_build('CUSTOMERS', {'rfm': rfm}, build), False)
+        for rfm in ('true', True, 1):
+            self.assertIs(report_cache.get_or_build('CUSTOMERS', {'rfm': rfm}, build), True)
+        # '0' es falso como 0: antes bool('0') lo volvía True con la misma clave
+        self.assertEqual(built, [{'rfm': False}, {'rfm': True}])
+
+    def test_invalid_parameter_is_rejected(self):
+        response = self.api.post(
+            '/api/v1/reports/generate_predefined/',
+            {'template_id': self.template.id, 'parameters': {'days': 'treinta'}},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_order_writes_bump_the_data_version(self):
+        self.assertEqual(self._generate({'days': 30})['total_orders'], 0)
+        self._sell()
+        self.assertEqual(self._generate({'days': 30})['total_orders'], 1)
+        self.assertEqual(report_cache.stats()['misses'], 2)
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.api.get('/api/v1/reports/cache_stats/').status_code, 200)
+        client = APIClient()
+        client.force_authenticate(self.client_user)
+        self.assertEqual(client.get('/api/v1/reports/cache_stats/').status_code, 403)
+
+
+class AnalyticsEquivalenceTests(TestCase):
+    """Las consultas agregadas dan las mismas cifras que los recorridos fila a fila que reemplazaron."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        category = Category.objects.create(name='Analytics')
+        products = [
+            Product.objects.create(name=f'A{i}', category=category, sku=f'AN-{i}', price=Decimal('1.00'), stock=50)
+            for i in range(3)
+        ]
+        User.objects.create_user('an_staff', 'st@example.com', 'x', is_staff=True)
+        users = {
+            name: User.objects.create_user(name, f'{name}@example.com', 'x')
+            # beto antes que caro: el id no debe decidir su empate
+            for name in ('ana', 'beto', 'caro', 'dani', 'eli')
+        }
+        # (cliente, estado, total, días atrás, [(producto, cantidad)])
+        for name, state, total, days, items in (
+            ('ana', 'DELIVERED', '50.00', 5, [(0, 2), (1, 1)]),
+            ('ana', 'PAID', '100.00', 2, [(0, 4)]),
+            ('ana', 'PENDING', '20.00', 1, [(2, 9)]),
+            ('beto', 'PAID', '100.00', 10, [(1, 2)]),
+            ('caro', 'PAID', '10.00', 10, [(2, 1)]),
+            ('eli', 'PAID', '30.00', 40, [(2, 5)]),
+            ('eli', 'CANCELLED', '5.00', 3, [(0, 1)]),
+        ):
+            order = Order.objects.create(user=users[name], status=state, total=Decimal(total), address='x')
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days))
+            for product, quantity in items:
+                OrderItem.objects.create(order=order, product=products[product], quantity=quantity, price=Decimal('1.00'))
+
+    def _legacy_sales(self, start_date):
+        orders = Order.objects.filter(created_at__gte=start_date, status__in=['DELIVERED', 'PAID'])
+        top_products = {}
+        daily_sales = {}
+        for order in orders:
+            for item in order.items.all():
+                top_products[item.product.name] = top_products.get(item.product.name, 0) + item.quantity
+            date_key = order.created_at.strftime('%Y-%m-%d')
+            daily_sales[date_key] = daily_sales.get(date_key, 0) + float(order.total)
+        return {
+            'total_sales': sum(float(order.total) for order in orders),
+            'total_orders': orders.count(),
+            'top_products': [
+                {'name': name, 'quantity': qty}
+                for name, qty in sorted(top_products.items(), key=lambda x: x[1], reverse=True)[:10]
+            ],
+            'daily_sales': [{'date': date, 'amount': amount} for date, amount in sorted(daily_sales.items())],
+        }
+
+    def _legacy_customers(self):
+        customers_data = []
+        for user in User.objects.filter(is_staff=False):
+            orders = Order.objects.filter(user=user)
+            customers_data.append({
+                'username': user.username,
+                'total_orders': orders.count(),
+                'total_spent': sum(float(order.total) for order in orders),
+                'last_order': orders.last().created_at.isoformat() if orders.exists() else None,
+            })
+        customers_data.sort(key=lambda x: x['total_spent'], reverse=True)
+        return customers_data
+
+    def test_sales_summary_matches_the_row_loop(self):
+        start_date = timezone.now() - timedelta(days=30)
+        self.assertEqual(analytics.sales_summary(start_date), self._legacy_sales(start_date))
+
+    def test_customer_analytics_matches_the_row_loop(self):
+        total, rows = analytics.customer_analytics(limit=None)
+        self.assertEqual(total, 5)
+        fields = ('username', 'total_orders', 'total_spent', 'last_order')
+        self.assertEqual([{f: row[f] for f in fields} for row in rows], self._legacy_customers())
+        _, page = analytics.customer_analytics(limit=2, offset=1)
+        self.assertEqual([row['username'] for row in page], ['beto', 'eli'])
+
+    def test_rfm_ties_are_broken_by_the_other_dimensions(self):
+        _, rows = analytics.customer_analytics(limit=None, rfm=True)
+        scores = {
+            row['username']: (row['rfm']['recency'], row['rfm']['frequency'], row['rfm']['monetary'])
+            for row in rows
+        }
+        # beto y caro compraron una vez el mismo día: gastar más puntúa más alto
+        self.assertEqual(scores['beto'], (3, 3, 4))
+        self.assertEqual(scores['caro'], (2, 2, 2))
+        self.assertEqual(scores['ana'], (5, 5, 5))
+        self.assertEqual(scores['dani'], (1, 1, 1))
+        self.assertEqual(analytics.customer_analytics(limit=None, rfm=True)[1], rows)
+
+
+class ReportWorkerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('worker_client', 'w@example.com', 'x')
+        cls.template = ReportTemplate.objects.create(
+            name='Ventas', description='Ventas', category='SALES', query_template='sales'
+        )
+
+    def setUp(self):
+        caches['reports'].clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_report_is_generated_by_the_worker(self):
+        with override_settings(MEDIA_ROOT=self.media.name):
+            response = self.api.post(
+                '/api/v1/reports/generate_predefined/',
+                {'template_id': self.template.id, 'parameters': {'days': 7}, 'format': 'CSV'},
+                format='json',
+            )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['status'], 'PENDING')
+            status_url = response.json()['status_url']
+
+            jobs.worker_loop(once=True, log=lambda message: None)
+
+            report = self.api.get(status_url).json()
+            self.assertEqual(report['status'], 'COMPLETED')
+            self.assertEqual(report['data']['total_orders'], 0)
+            self.assertTrue((Path(self.media.name) / report['file_path']).exists())
+
+    def test_claim_is_exclusive(self):
+        report = GeneratedReport.objects.create(
+            user=self.user, template=self.template, title='x', query_text='x', query_sql='x'
+        )
+        self.assertEqual(jobs.claim_next_report('a').id, report.id)
+        self.assertIsNone(jobs.claim_next_report('b'))
+
+    def test_stale_reports_are_requeued(self):
+        report = GeneratedReport.objects.create(
+            user=self.user, template=self.template, title='x', query_text='x', query_sql='x'
+        )
+        jobs.claim_next_report('a')
+        self.assertEqual(jobs.requeue_stale(), 0)
+        self.assertEqual(jobs.requeue_stale(now=timezone.now() + jobs.job_timeout() * 2), 1)
+        self.assertEqual(jobs.claim_next_report('b').id, report.id)
+
+
+class ReportArtifactTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('artifact_client', 'f@example.com', 'x')
+        cls.report = GeneratedReport.objects.create(
+            user=cls.user, title='Ventas', query_text='x', query_sql='x',
+            data={'total_orders': 3}, status='COMPLETED', completed_at=timezone.now(),
+        )
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.url = f'/api/v1/reports/{self.report.id}/download/?tipo=csv'
+
+    def test_artifact_is_rendered_once(self):
+        with mock.patch('reports.views.EXPORT_RENDERERS', {'CSV': mock.Mock(wraps=render_csv)}) as renderers:
+            first = self.api.get(self.url)
+            second = self.api.get(self.url)
+        self.assertEqual(renderers['CSV'].call_count, 1)
+        self.assertEqual(b''.join(first.streaming_content), b''.join(second.streaming_content))
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_etag_and_range(self):
+        full = self.api.get(self.url)
+        body = b''.join(full.streaming_content)
+        self.assertEqual(self.api.get(self.url, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 304)
+
+        partial = self.api.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b''.join(partial.streaming_content), body[2:6])
+        self.assertEqual(partial['Content-Range'], f'bytes 2-5/{len(body)}')
+
+        self.assertEqual(self.api.get(self.url, HTTP_RANGE=f'bytes={len(body)}-').status_code, 416)
+
+    def test_pending_report_is_not_exported(self):
+        pending = GeneratedReport.objects.create(user=self.user, title='x', query_text='x', query_sql='x')
+        response = self.api.get(f'/api/v1/reports/{pending.id}/download/?tipo=csv')
+        self.assertEqual(response.status_code, 409)
+
+    def test_concurrent_writes_of_the_same_artifact(self):
+        path = artifacts.artifacts_dir() / 'report_1_csv.csv'
+        errors = []
+
+        def write(n):
+            try:
+                for _ in range(50):
+                    artifacts.write_atomic(path, str(n).encode() * 1000)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(path.read_bytes())), 1)
+        self.assertEqual([p.name for p in artifacts.artifacts_dir().iterdir()], [path.name])
+
+    def test_garbage_collection(self):
+        self.api.get(self.url)
+        orphan = artifacts.artifacts_dir() / 'report_999999_pdf.pdf'
+        orphan.write_bytes(b'x')
+        removed = artifacts.collect_garbage()
+        self.assertEqual([path.name for path in removed], [orphan.name])
+        removed = artifacts.collect_garbage(now=timezone.now() + timedelta(days=31))
+        self.assertEqual(len(removed), 1)
@@ -2,40 +2,25 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.reverse import reverse
+from django.conf import settings
 from django.db import connection
-from django.http import HttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import re
-import csv
-import io
 from django.template.loader import render_to_string
-# Importaciones condicionales para reportes
-try:
-    from weasyprint import HTML, CSS
-    import openpyxl
-    from openpyxl.utils.dataframe import dataframe_to_rows
-    import pandas as pd
-    HAS_REPORT_LIBS = True
-    WEASYPRINT_AVAILABLE = True
-    EXCEL_AVAILABLE = True
-except (ImportError, OSError) as e:
-    print(f"⚠️ Librerías de reportes no disponibles: {e}")
-    HAS_REPORT_LIBS = False
-    WEASYPRINT_AVAILABLE = False
-    EXCEL_AVAILABLE = False
-    HTML = None
-    CSS = None
-    openpyxl = None
-    dataframe_to_rows = None
-    pd = None
+from .exports import RENDERERS as EXPORT_RENDERERS, render_excel, render_pdf
 
 from .models import ReportTemplate, GeneratedReport, VoiceQuery
 from .serializers import ReportTemplateSerializer, GeneratedReportSerializer, VoiceQuerySerializer
-from sales.models import Order, OrderItem
-from products.models import Product
-from users.models import User
+from . import cache as report_cache
+from . import generators
+from . import jobs as report_jobs
+from . import artifacts
+from users.permissions import IsAdminUser
+
+REPORT_FORMATS = [choice for choice, _ in GeneratedReport._meta.get_field('format').choices]
 
 class ReportTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet para plantillas de reportes predefinidos"""
@@ -56,22 +41,18 @@ class ReportsViewSet(viewsets.ModelViewSet):
         """Generar reporte predefinido"""
         template_id = request.data.get('template_id')
         parameters = request.data.get('parameters', {})
+        report_format = str(request.data.get('format', 'JSON')).upper()
+        if report_format not in REPORT_FORMATS:
+            return Response({'error': f'Formato no soportado: {report_format}'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
             template = ReportTemplate.objects.get(id=template_id)
+            try:
+                report_cache.coerce_parameters(template.category, parameters)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Generar datos según el tipo de reporte
-            if template.category == 'SALES':
-                data = self._generate_sales_report(parameters)
-            elif template.category == 'INVENTORY':
-                data = self._generate_inventory_report(parameters)
-            elif template.category == 'CUSTOMERS':
-                data = self._generate_customers_report(parameters)
-            else:
-                data = {'error': 'Tipo de reporte no soportado'}
-            
-            # Crear registro del reporte
-            report = GeneratedReport.objects.create(
+            report_fields = dict(
                 user=request.user,
                 template=template,
                 title=template.name,
@@ -79,10 +60,23 @@ class ReportsViewSet(viewsets.ModelViewSet):
                 query_text=f"Reporte predefinido: {template.name}",
                 query_sql="Generated from template",
                 parameters=parameters,
+                format=report_format,
+            )
+            if self._run_async(request):
+                # Lo genera run_report_worker; el cliente consulta status_url
+                return self._accepted(request, GeneratedReport.objects.create(**report_fields))
+            
+            # Generar datos según el tipo de reporte (o reutilizar uno idéntico cacheado)
+            data = generators.cached_template_report(template.category, parameters)
+            
+            # Crear registro del reporte
+            report = GeneratedReport.objects.create(
+                **report_fields,
                 data=data,
                 status='COMPLETED',
                 completed_at=timezone.now()
             )
+            self._write_export(report)
             
             return Response({
                 'id': report.id,
@@ -114,22 +108,34 @@ class ReportsViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        report_format = str(request.data.get('format', 'JSON')).upper()
+        if report_format not in REPORT_FORMATS:
+            return Response({'error': f'Formato no soportado: {report_format}'}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             # Interpretar consulta con IA simple
-            interpreted_query = self._interpret_query(query_text)
-            data = self._execute_interpreted_query(interpreted_query)
-            
-            # Crear registro del reporte
-            report = GeneratedReport.objects.create(
+            interpreted_query = generators.interpret_query(query_text)
+            report_fields = dict(
                 user=request.user,
                 title=f"Reporte personalizado: {query_text[:50]}...",
                 query_text=query_text,
                 query_sql=interpreted_query.get('sql', ''),
                 parameters=interpreted_query.get('parameters', {}),
+                format=report_format,
+            )
+            if self._run_async(request):
+                return self._accepted(request, GeneratedReport.objects.create(**report_fields))
+            
+            data = generators.cached_interpreted_query(interpreted_query)
+            
+            # Crear registro del reporte
+            report = GeneratedReport.objects.create(
+                **report_fields,
                 data=data,
                 status='COMPLETED',
                 completed_at=timezone.now()
             )
+            self._write_export(report)
             
             return Response({
                 'id': report.id,
@@ -158,8 +164,8 @@ class ReportsViewSet(viewsets.ModelViewSet):
         
         try:
             # Interpretar consulta de voz
-            interpreted_query = self._interpret_query(transcribed_text)
-            data = self._execute_interpreted_query(interpreted_query)
+            interpreted_query = generators.interpret_query(transcribed_text)
+            data = generators.cached_interpreted_query(interpreted_query)
             
             # Crear reporte
             report = GeneratedReport.objects.create(
@@ -195,176 +201,53 @@ class ReportsViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _generate_sales_report(self, parameters):
-        """Generar reporte de ventas"""
-        # Parámetros por defecto
-        days = parameters.get('days', 30)
-        start_date = timezone.now() - timedelta(days=days)
-        
-        # Consultar ventas
-        orders = Order.objects.filter(
-            created_at__gte=start_date,
-            status__in=['DELIVERED', 'PAID']
-        )
-        
-        # Calcular métricas
-        total_sales = sum(float(order.total) for order in orders)
-        total_orders = orders.count()
-        avg_order_value = total_sales / total_orders if total_orders > 0 else 0
-        
-        # Productos más vendidos
-        top_products = {}
-        for order in orders:
-            for item in order.items.all():
-                product_name = item.product.name
-                if product_name in top_products:
-                    top_products[product_name] += item.quantity
-                else:
-                    top_products[product_name] = item.quantity
-        
-        top_products_list = sorted(top_products.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        # Ventas por día
-        daily_sales = {}
-        for order in orders:
-            date_key = order.created_at.strftime('%Y-%m-%d')
-            if date_key in daily_sales:
-                daily_sales[date_key] += float(order.total)
-            else:
-                daily_sales[date_key] = float(order.total)
-        
-        return {
-            'period': f'Últimos {days} días',
-            'total_sales': total_sales,
-            'total_orders': total_orders,
-            'average_order_value': round(avg_order_value, 2),
-            'top_products': [{'name': name, 'quantity': qty} for name, qty in top_products_list],
-            'daily_sales': [{'date': date, 'amount': amount} for date, amount in sorted(daily_sales.items())],
-            'generated_at': timezone.now().isoformat()
-        }
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Descargar el archivo del reporte (?tipo=pdf|excel|csv, por defecto su formato)"""
+        report = self.get_object()
+        fmt = str(request.query_params.get('tipo', report.format)).upper()
+        render = EXPORT_RENDERERS.get(fmt)
+        if render is None:
+            return Response({'error': f'Formato no soportado: {fmt}'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._serve_artifact(request, report, fmt, render)
     
-    def _generate_inventory_report(self, parameters):
-        """Generar reporte de inventario"""
-        products = Product.objects.all()
-        
-        low_stock_threshold = parameters.get('low_stock_threshold', 10)
-        
-        inventory_data = []
-        low_stock_items = []
-        total_value = 0
-        
-        for product in products:
-            stock_value = float(product.price) * product.stock
-            total_value += stock_value
-            
-            product_data = {
-                'name': product.name,
-                'sku': product.sku,
-                'stock': product.stock,
-                'price': float(product.price),
-                'stock_value': stock_value,
-                'category': product.category.name if product.category else 'Sin categoría'
-            }
-            
-            inventory_data.append(product_data)
-            
-            if product.stock <= low_stock_threshold:
-                low_stock_items.append(product_data)
-        
-        return {
-            'total_products': len(inventory_data),
-            'total_inventory_value': round(total_value, 2),
-            'low_stock_threshold': low_stock_threshold,
-            'low_stock_items': low_stock_items,
-            'inventory_details': inventory_data,
-            'generated_at': timezone.now().isoformat()
-        }
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def cache_stats(self, request):
+        """Aciertos/fallos del cache de reportes (solo administradores)"""
+        return Response(report_cache.stats())
     
-    def _generate_customers_report(self, parameters):
-        """Generar reporte de clientes"""
-        users = User.objects.filter(is_staff=False)
-        
-        customers_data = []
-        for user in users:
-            orders = Order.objects.filter(user=user)
-            total_spent = sum(float(order.total) for order in orders)
-            
-            customers_data.append({
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'total_orders': orders.count(),
-                'total_spent': total_spent,
-                'last_order': orders.last().created_at.isoformat() if orders.exists() else None,
-                'date_joined': user.date_joined.isoformat()
-            })
-        
-        # Ordenar por total gastado
-        customers_data.sort(key=lambda x: x['total_spent'], reverse=True)
-        
-        return {
-            'total_customers': len(customers_data),
-            'customers': customers_data,
-            'generated_at': timezone.now().isoformat()
-        }
+    def _run_async(self, request):
+        # {"async": false} mantiene la generación dentro de la petición
+        value = request.data.get('async', getattr(settings, 'REPORTS_ASYNC', True))
+        return value not in (False, 'false', 'False', '0', 0)
     
-    def _interpret_query(self, query_text):
-        """Interpretar consulta en lenguaje natural (IA simple)"""
-        query_lower = query_text.lower()
-        
-        # Patrones simples de reconocimiento
-        if any(word in query_lower for word in ['ventas', 'vendido', 'ingresos', 'facturación']):
-            if 'mes' in query_lower or 'mensual' in query_lower:
-                days = 30
-            elif 'semana' in query_lower or 'semanal' in query_lower:
-                days = 7
-            elif 'año' in query_lower or 'anual' in query_lower:
-                days = 365
-            else:
-                days = 30
-            
-            return {
-                'type': 'sales',
-                'parameters': {'days': days},
-                'sql': f'Sales report for last {days} days'
-            }
-        
-        elif any(word in query_lower for word in ['inventario', 'stock', 'productos']):
-            return {
-                'type': 'inventory',
-                'parameters': {},
-                'sql': 'Inventory report'
-            }
-        
-        elif any(word in query_lower for word in ['clientes', 'usuarios', 'compradores']):
-            return {
-                'type': 'customers',
-                'parameters': {},
-                'sql': 'Customers report'
-            }
-        
-        else:
-            return {
-                'type': 'general',
-                'parameters': {},
-                'sql': 'General query'
-            }
+    def _accepted(self, request, report):
+        status_url = reverse('reports-detail', kwargs={'pk': report.id}, request=request)
+        return Response({
+            'id': report.id,
+            'title': report.title,
+            'status': report.status,
+            'format': report.format,
+            'status_url': status_url,
+            'created_at': report.created_at,
+        }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+    
+    def _write_export(self, report):
+        if report.format != 'JSON':
+            report.file_path = report_jobs.write_export(report)
+            report.save(update_fields=['file_path'])
+    
+    def _serve_artifact(self, request, report, fmt, render):
+        # Se renderiza una vez; las descargas siguientes leen el archivo (ETag/Range)
+        if report.status != 'COMPLETED':
+            return Response(
+                {'error': 'El reporte todavía no está listo', 'status': report.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        path = artifacts.get_or_render(artifacts.report_stem(report, fmt), lambda: render(report))
+        filename = f"reporte_{report.id}_{report.completed_at:%Y%m%d}{path.suffix}"
+        return artifacts.serve(request, path, filename)
     
-    def _execute_interpreted_query(self, interpreted_query):
-        """Ejecutar consulta interpretada"""
-        query_type = interpreted_query.get('type')
-        parameters = interpreted_query.get('parameters', {})
-        
-        if query_type == 'sales':
-            return self._generate_sales_report(parameters)
-        elif query_type == 'inventory':
-            return self._generate_inventory_report(parameters)
-        elif query_type == 'customers':
-            return self._generate_customers_report(parameters)
-        else:
-            return {'message': 'Consulta no reconocida', 'query': interpreted_query}
-
     @action(detail=False, methods=['post'])
     def export_pdf(self, request):
         """Exportar reporte a PDF"""
@@ -378,94 +261,7 @@ class ReportsViewSet(viewsets.ModelViewSet):
             except GeneratedReport.DoesNotExist:
                 return Response({'error': 'Reporte no encontrado'}, status=status.HTTP_404_NOT_FOUND)
             
-            # Generar HTML para el PDF
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>Reporte - {report.title}</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        margin: 20px;
-                        color: #333;
-                    }}
-                    .header {{
-                        background: linear-gradient(135deg, #00BCD4, #0097A7);
-                        color: white;
-                        padding: 20px;
-                        margin-bottom: 20px;
-                        border-radius: 8px;
-                    }}
-                    .header h1 {{
-                        margin: 0;
-                        font-size: 24px;
-                    }}
-                    .header p {{
-                        margin: 5px 0 0 0;
-                        opacity: 0.9;
-                    }}
-                    .content {{
-                        background: #f8f9fa;
-                        padding: 20px;
-                        border-radius: 8px;
-                        border: 1px solid #e9ecef;
-                    }}
-                    .data-table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-top: 20px;
-                    }}
-                    .data-table th, .data-table td {{
-                        border: 1px solid #ddd;
-                        padding: 12px;
-                        text-align: left;
-                    }}
-                    .data-table th {{
-                        background-color: #00BCD4;
-                        color: white;
-                    }}
-                    .footer {{
-                        margin-top: 30px;
-                        text-align: center;
-                        color: #666;
-                        font-size: 12px;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>📊 {report.title}</h1>
-                    <p>Generado el: {report.created_at.strftime('%d/%m/%Y %H:%M')}</p>
-                    <p>Estado: {report.status}</p>
-                </div>
-                
-                <div class="content">
-                    <h2>Datos del Reporte:</h2>
-                    <pre style="white-space: pre-wrap; font-size: 12px;">{json.dumps(report.data, indent=2, ensure_ascii=False)}</pre>
-                </div>
-                
-                <div class="footer">
-                    <p>SmartSales - Sistema de Reportes Inteligente</p>
-                    <p>Generado automáticamente el {timezone.now().strftime('%d/%m/%Y %H:%M')}</p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            if WEASYPRINT_AVAILABLE:
-                # Usar WeasyPrint para generar PDF
-                pdf_file = HTML(string=html_content).write_pdf()
-                
-                response = HttpResponse(pdf_file, content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename="reporte_{report.id}_{timezone.now().strftime("%Y%m%d")}.pdf"'
-                return response
-            else:
-                # Fallback: devolver HTML
-                response = HttpResponse(html_content, content_type='text/html')
-                response['Content-Disposition'] = f'attachment; filename="reporte_{report.id}_{timezone.now().strftime("%Y%m%d")}.html"'
-                return response
+            return self._serve_artifact(request, report, 'PDF', render_pdf)
                 
         except Exception as e:
             return Response({'error': f'Error al generar PDF: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -483,75 +279,8 @@ class ReportsViewSet(viewsets.ModelViewSet):
             except GeneratedReport.DoesNotExist:
                 return Response({'error': 'Reporte no encontrado'}, status=status.HTTP_404_NOT_FOUND)
             
-            if EXCEL_AVAILABLE:
-                # Crear archivo Excel con openpyxl
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Reporte"
-                
-                # Encabezado
-                ws['A1'] = report.title
-                ws['A2'] = f"Generado: {report.created_at.strftime('%d/%m/%Y %H:%M')}"
-                ws['A3'] = f"Estado: {report.status}"
-                
-                # Datos
-                row = 5
-                if isinstance(report.data, dict):
-                    for key, value in report.data.items():
-                        ws[f'A{row}'] = str(key)
-                        ws[f'B{row}'] = str(value)
-                        row += 1
-                elif isinstance(report.data, list):
-                    if report.data and isinstance(report.data[0], dict):
-                        # Escribir encabezados
-                        headers = list(report.data[0].keys())
-                        for col, header in enumerate(headers, 1):
-                            ws.cell(row=row, column=col, value=header)
-                        row += 1
-                        
-                        # Escribir datos
-                        for item in report.data:
-                            for col, header in enumerate(headers, 1):
-                                ws.cell(row=row, column=col, value=str(item.get(header, '')))
-                            row += 1
-                
-                # Guardar en memoria
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                
-                response = HttpResponse(
-                    output.getvalue(),
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="reporte_{report.id}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-                return response
-            else:
-                # Fallback: generar CSV
-                output = io.StringIO()
-                writer = csv.writer(output)
-                
-                # Escribir encabezado
-                writer.writerow([report.title])
-                writer.writerow([f"Generado: {report.created_at.strftime('%d/%m/%Y %H:%M')}"])
-                writer.writerow([f"Estado: {report.status}"])
-                writer.writerow([])  # Línea vacía
-                
-                # Escribir datos
-                if isinstance(report.data, dict):
-                    writer.writerow(['Campo', 'Valor'])
-                    for key, value in report.data.items():
-                        writer.writerow([key, value])
-                elif isinstance(report.data, list):
-                    if report.data and isinstance(report.data[0], dict):
-                        headers = list(report.data[0].keys())
-                        writer.writerow(headers)
-                        for item in report.data:
-                            writer.writerow([item.get(header, '') for header in headers])
-                
-                response = HttpResponse(output.getvalue(), content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="reporte_{report.id}_{timezone.now().strftime("%Y%m%d")}.csv"'
-                return response
+            # Excel con openpyxl, o CSV si no está disponible
+            return self._serve_artifact(request, report, 'EXCEL', render_excel)
                 
         except Exception as e:
             return Response({'error': f'Error al generar Excel: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,141 @@
+"""
+Checkout en una sola transacción y con un número fijo de consultas.
+
+Los ítems del carrito se leen junto con sus productos (select_related), las
+reservas activas del carrito se convierten en la venta y solo lo que no
+estaba reservado se descuenta con un único UPDATE condicional
+(stock >= cantidad), que falla completo si algún producto no alcanza.
+OrderItem, Warranty y los movimientos de salida se insertan con bulk_create.
+
+cancel_order hace el camino inverso: en la misma transacción que pasa la
+orden a CANCELLED devuelve su stock con un UPDATE y registra las entradas.
+"""
+from django.db import transaction
+from django.db.models import Sum
+
+from products.models import InventoryMovement, Product
+from products.stock import return_stock_bulk, take_stock_bulk
+from .models import CartItem, Order, OrderItem
+from . import reservations
+
+SHIPPING_COST = 10.00  # Fixed shipping cost, can be calculated based on method
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        # {product_id: {'name', 'requested', 'available'}}
+        self.shortages = shortages
+        super().__init__('Insufficient stock')
+
+
+def _quantities_by_product(items):
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def _shortages(items, missing):
+    names = {item.product_id: item.product.name for item in items}
+    available = dict(Product.objects.filter(id__in=list(missing)).values_list('id', 'stock'))
+    return {
+        product_id: {'name': names[product_id], 'requested': quantity, 'available': available.get(product_id, 0)}
+        for product_id, quantity in missing.items()
+        if available.get(product_id, 0) < quantity
+    }
+
+
+def place_order(user, address, shipping_cost=SHIPPING_COST):
+    """
+    Convierte el carrito del usuario en una Order. Lanza EmptyCart si no hay
+    ítems e InsufficientStock (sin modificar nada) si falta stock.
+    """
+    items = list(CartItem.objects.filter(cart__user=user).select_related('product'))
+    if not items:
+        raise EmptyCart()
+    quantities = _quantities_by_product(items)
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                total=sum(item.product.price * item.quantity for item in items),
+                shipping_cost=shipping_cost,
+                address=address,
+            )
+
+            # Held stock is already out of Product.stock; take only what was not held
+            held = reservations.convert(items[0].cart_id, order)
+            missing = {
+                product_id: quantity - held.get(product_id, 0)
+                for product_id, quantity in quantities.items()
+                if quantity > held.get(product_id, 0)
+            }
+            if not take_stock_bulk(missing):
+                # Roll back the rows that did have enough stock
+                raise InsufficientStock(missing)
+            return_stock_bulk({
+                product_id: quantity - quantities.get(product_id, 0)
+                for product_id, quantity in held.items()
+            })
+
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=item.product, quantity=item.quantity, price=item.product.price)
+                for item in items
+            ])
+            InventoryMovement.objects.bulk_create([
+                InventoryMovement(
+                    product_id=product_id,
+                    quantity=quantity,
+                    movement_type='OUT',
+                    reason=f'Venta orden #{order.id}',
+                    user=user,
+                )
+                for product_id, quantity in quantities.items()
+            ])
+            CartItem.objects.filter(id__in=[item.id for item in items]).delete()  # Clear cart
+
+            # Crear garantías automáticas de 1 año para todos los productos
+            order.create_warranties(product_ids=quantities)
+    except InsufficientStock as e:
+        raise InsufficientStock(_shortages(items, e.shortages)) from None
+    return order
+
+
+def cancel_order(order, user=None):
+    """
+    Cancela la orden y devuelve al stock las cantidades de sus ítems.
+    Devuelve False (sin modificar nada) si el estado de la orden cambió
+    desde que se leyó, p. ej. otra cancelación concurrente.
+    """
+    with transaction.atomic():
+        # Bloquea la fila: dos cancelaciones concurrentes no devuelven el stock dos veces
+        current = Order.objects.select_for_update().filter(pk=order.pk).values_list('status', flat=True).first()
+        if current != order.status:
+            return False
+        order.status = 'CANCELLED'
+        order.save()
+
+        quantities = {
+            row['product_id']: row['total']
+            for row in OrderItem.objects.filter(order=order)
+            .values('product_id')
+            .annotate(total=Sum('quantity'))
+            .order_by()
+        }
+        return_stock_bulk(quantities)
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                product_id=product_id,
+                quantity=quantity,
+                movement_type='IN',
+                reason=f'Cancelación orden #{order.id}',
+                user=user,
+            )
+            for product_id, quantity in quantities.items()
+        ])
+    return True
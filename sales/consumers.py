@@ -1,7 +1,11 @@
+import asyncio
 import json
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.layers import get_channel_layer
 
+from . import notifications
+
 class OrderConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -31,9 +35,19 @@ class OrderConsumer(AsyncWebsocketConsumer):
         }))
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Notificaciones para administradores: mensajes generales del grupo
+    notificaciones_admin y cambios de estado de órdenes filtrados por la
+    suscripción del usuario y agrupados por ventana (ver sales.notifications).
+    """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.channel_layer = get_channel_layer()
+        self.event_groups = []
+        self.pending = {}
+        self.flush_task = None
+        self.cursor = None
+        self.replayed_until = None
 
     async def connect(self):
         user = self.scope['user']
@@ -42,15 +56,27 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 "notificaciones_admin",
                 self.channel_name
             )
+            self.filters, self.batch_window = await database_sync_to_async(notifications.subscription_settings)(user)
+            self.event_groups = notifications.groups_for(self.filters)
+            for group in self.event_groups:
+                await self.channel_layer.group_add(group, self.channel_name)
             await self.accept()
+            # Reconexión: primero lo que se perdió, después los eventos en vivo
+            cursor = notifications.parse_cursor(self.scope.get('query_string', b''))
+            if cursor is not None:
+                await self.replay(cursor)
         else:
             await self.close()
 
     async def disconnect(self, close_code):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
         await self.channel_layer.group_discard(
             "notificaciones_admin",
             self.channel_name
         )
+        for group in self.event_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
 
     async def receive(self, text_data):
         pass
@@ -60,3 +86,42 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'type': 'notification',
             'message': event['message']
         }))
+
+    async def replay(self, cursor):
+        events = await database_sync_to_async(notifications.replay)(self.filters, cursor)
+        if events is None:
+            await self.send(text_data=json.dumps({'type': 'resync'}))
+            return
+        self.cursor = self.replayed_until = events[-1]['id'] if events else cursor
+        await self.send(text_data=json.dumps({
+            'type': 'order_events',
+            'replay': True,
+            'events': events,
+            'cursor': self.cursor,
+        }))
+
+    async def order_event(self, event):
+        payload = event['event']
+        if not notifications.matches(self.filters, payload):
+            return
+        # Ya enviado en el replay
+        if self.replayed_until is not None and payload['id'] <= self.replayed_until:
+            return
+        # Dentro de la ventana solo importa el último estado de cada orden
+        self.pending[payload['order_id']] = payload
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        events = sorted(self.pending.values(), key=lambda payload: payload['id'])
+        self.pending = {}
+        self.flush_task = None
+        if not events:
+            return
+        self.cursor = max(self.cursor or 0, events[-1]['id'])
+        await self.send(text_data=json.dumps({
+            'type': 'order_events',
+            'events': events,
+            'cursor': self.cursor,
+        }))
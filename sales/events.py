@@ -0,0 +1,94 @@
+"""
+Publicación de eventos de órdenes hacia los WebSockets.
+
+event_bus.publish() no toca la capa de canales dentro de la petición:
+registra un on_commit (si la transacción se revierte no se publica nada)
+que deja el evento en la cola de BackgroundWriter
+(backend_salessmart.background), y su hilo hace el group_send en la capa
+configurada en CHANNEL_LAYERS. Con una capa compartida (Redis, o SQLite en
+un solo host) el evento llega a los consumidores de cualquier proceso.
+
+Los eventos son descartables: si la cola del proceso está llena
+(EVENT_BUS_QUEUE_SIZE) el evento se pierde en vez de frenar la petición.
+La contrapresión hacia cada cliente la hace la capa (capacity por canal y
+coalesce_key para reemplazar eventos pendientes de la misma orden).
+Con EVENT_BUS_ASYNC=False el group_send se hace en el momento (tests).
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from backend_salessmart.background import BackgroundWriter
+
+# Importaciones condicionales para channels
+try:
+    from channels.layers import get_channel_layer
+    from asgiref.sync import async_to_sync
+    HAS_CHANNELS = True
+except ImportError:
+    HAS_CHANNELS = False
+    get_channel_layer = None
+    async_to_sync = None
+
+logger = logging.getLogger(__name__)
+
+ORDERS_GROUP = 'orders'
+
+
+class EventBus(BackgroundWriter):
+    thread_name = 'event-bus'
+
+    def __init__(self):
+        super().__init__(stats=('published', 'sent', 'dropped', 'failed'))
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'EVENT_BUS_ASYNC', True)
+
+    def queue_size(self):
+        return getattr(settings, 'EVENT_BUS_QUEUE_SIZE', 1000)
+
+    def batch_size(self):
+        # Sin espera entre eventos: se envía lo que ya esté en la cola
+        return 100
+
+    def publish(self, group, message):
+        """Publica message en group cuando la transacción actual confirme; no espera al envío."""
+        if not HAS_CHANNELS:
+            return
+        transaction.on_commit(lambda: self._enqueue(group, message))
+
+    def process(self, batch):
+        for group, message in batch:
+            self._send(group, message)
+
+    def _enqueue(self, group, message):
+        self.count('published')
+        if not self.enabled:
+            self._send(group, message)
+        elif not self.submit((group, message)):
+            self.count('dropped')
+
+    def _send(self, group, message):
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer is None:
+                return
+            async_to_sync(channel_layer.group_send)(group, message)
+            self.count('sent')
+        except Exception:
+            # Un evento perdido no debe afectar a la orden
+            self.count('failed')
+            logger.exception('WebSocket notification failed')
+
+
+event_bus = EventBus()
+
+
+def order_created(order, username):
+    event_bus.publish(ORDERS_GROUP, {
+        'type': 'order_created',
+        'message': f"New order #{order.id} created by {username}",
+        'order_id': order.id,
+    })
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from sales.notifications import prune_events
+
+
+class Command(BaseCommand):
+    help = 'Borra los eventos de órdenes (cursor de notificaciones) más viejos que el período de retención.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Días que se conservan (por defecto ORDER_EVENT_RETENTION_DAYS).')
+
+    def handle(self, *args, **options):
+        deleted = prune_events(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Borrados {deleted} eventos de órdenes'))
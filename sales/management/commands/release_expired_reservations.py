@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Devuelve al stock las reservas de carrito vencidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Sigue ejecutándose y barre cada --interval segundos.')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Segundos entre barridos con --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired()
+            if released or not options['loop']:
+                self.stdout.write(f'Reservas vencidas liberadas: {released}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
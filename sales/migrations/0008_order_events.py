@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_order_status_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.IntegerField(db_index=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('CONFIRMED', 'Confirmado'), ('PAID', 'Pagado'), ('SHIPPED', 'Enviado'), ('DELIVERED', 'Entregado'), ('CANCELLED', 'Cancelado')], max_length=10)),
+                ('previous_status', models.CharField(blank=True, max_length=10)),
+                ('payment_method', models.CharField(choices=[('CASH', 'Efectivo (Pago contra entrega)'), ('PAYPAL', 'PayPal'), ('STRIPE', 'Tarjeta de crédito')], max_length=10)),
+                ('warehouse', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statuses', models.JSONField(blank=True, default=list)),
+                ('payment_methods', models.JSONField(blank=True, default=list)),
+                ('warehouses', models.JSONField(blank=True, default=list)),
+                ('batch_window_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_subscription', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -27,6 +27,37 @@ class CartItem(models.Model):
     def subtotal(self):
         return self.product.price * self.quantity
 
+class StockReservation(models.Model):
+    """
+    Stock apartado por un carrito durante CART_RESERVATION_TTL_MINUTES.
+    Product.stock ya tiene descontada la cantidad mientras esté ACTIVE; el
+    checkout la convierte en venta y el barrido de vencidas la devuelve.
+    """
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Activa'),
+        ('CONVERTED', 'Convertida en orden'),
+        ('RELEASED', 'Liberada'),
+        ('EXPIRED', 'Vencida'),
+    ]
+
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    expires_at = models.DateTimeField()
+    order = models.ForeignKey('Order', on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['cart', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Reserva {self.product_id} x {self.quantity} ({self.status})"
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pendiente'),
@@ -52,31 +83,50 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Reportes de ventas: filtro por estado y rango de fechas
+            models.Index(fields=['status', 'created_at'], name='sales_order_status_ts_idx'),
+            # Gestión de órdenes: páginas por cursor (-created_at, -id)
+            models.Index(fields=['created_at', 'id'], name='sales_order_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado leído de la base: las señales publican un OrderEvent solo si cambia
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
     
-    def create_warranties(self):
+    def create_warranties(self, product_ids=None):
         """Crear garantías de 1 año para todos los productos de la orden"""
         from posventa.models import Warranty
         from datetime import datetime, timedelta
         from django.utils import timezone
-        
-        for item in self.items.all():
-            # Crear garantía de 1 año para cada producto
-            start_date = timezone.now()
-            end_date = start_date + timedelta(days=365)  # 1 año
-            
-            Warranty.objects.get_or_create(
-                product=item.product,
+
+        if product_ids is None:
+            product_ids = self.items.values_list('product_id', flat=True)
+        # Una sola consulta para las existentes y un solo INSERT para las nuevas
+        existing = set(Warranty.objects.filter(order=self).values_list('product_id', flat=True))
+        start_date = timezone.now()
+        end_date = start_date + timedelta(days=365)  # 1 año
+        Warranty.objects.bulk_create([
+            Warranty(
+                product_id=product_id,
                 order=self,
-                defaults={
-                    'duration_months': 12,
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'is_active': True,
-                    'resolution_status': 'PENDING'
-                }
+                duration_months=12,
+                start_date=start_date,
+                end_date=end_date,
+                is_active=True,
+                resolution_status='PENDING'
             )
+            for product_id in dict.fromkeys(product_ids)
+            if product_id not in existing
+        ])
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
@@ -183,8 +233,8 @@ class Return(models.Model):
         self.save()
         
         # Log de la acción
-        from logs.models import LogEntry
-        LogEntry.objects.create(
+        from logs.audit import audit_writer
+        audit_writer.log(
             user=admin_user,
             action=f"Devolución #{self.id} aprobada - Producto: {self.order_item.product.name} - Monto: ${self.refund_amount}",
             ip_address='SYSTEM'
@@ -199,9 +249,45 @@ class Return(models.Model):
         self.save()
         
         # Log de la acción
-        from logs.models import LogEntry
-        LogEntry.objects.create(
+        from logs.audit import audit_writer
+        audit_writer.log(
             user=admin_user,
             action=f"Devolución #{self.id} rechazada - Producto: {self.order_item.product.name} - Razón: {reason}",
             ip_address='SYSTEM'
         )
+
+
+class OrderEvent(models.Model):
+    """
+    Cambio de estado de una orden, en el orden en que ocurrió. El id sirve
+    de cursor: un cliente que se reconecta pide los eventos posteriores al
+    último que recibió (ver sales.notifications). Guarda order_id y no una
+    FK para que el historial no dependa de que la orden siga existiendo.
+    """
+    order_id = models.IntegerField(db_index=True)
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    previous_status = models.CharField(max_length=10, blank=True)
+    payment_method = models.CharField(max_length=10, choices=Order.PAYMENT_METHOD_CHOICES)
+    # Clave opaca de almacén; las órdenes todavía no tienen almacén y queda vacía
+    warehouse = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"OrderEvent {self.id} - {self.order_id} {self.previous_status or '-'} -> {self.status}"
+
+
+class NotificationSubscription(models.Model):
+    """
+    Filtros de notificaciones de órdenes de un administrador. Lista vacía =
+    sin filtro en ese campo; batch_window_ms agrupa los eventos en un solo
+    mensaje por ventana.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_subscription')
+    statuses = models.JSONField(default=list, blank=True)
+    payment_methods = models.JSONField(default=list, blank=True)
+    warehouses = models.JSONField(default=list, blank=True)
+    batch_window_ms = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Suscripción de {self.user.username}"
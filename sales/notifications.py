@@ -0,0 +1,138 @@
+"""
+Notificaciones de cambios de estado de órdenes para administradores.
+
+Cada cambio de estado se guarda como OrderEvent (en la misma transacción
+que la orden) y, tras el commit, se publica por sales.events en el grupo
+del estado (order_events.<ESTADO>) con coalesce_key por orden. Cada
+administrador se une solo a los grupos de los estados que le interesan y
+NotificationConsumer aplica el resto de sus filtros (medio de pago,
+almacén), junta los eventos de cada ventana (batch_window_ms, por defecto
+NOTIFICATION_BATCH_WINDOW_MS), se queda con el último de cada orden y los
+envía en un solo mensaje junto con el cursor (id del último evento).
+
+Al reconectarse el cliente manda ?cursor=<último id recibido> y recibe los
+eventos posteriores que pasan sus filtros. Si son más de
+NOTIFICATION_REPLAY_LIMIT, o el cursor es anterior a los eventos que se
+conservan (prune_order_events), recibe 'resync' y debe recargar la lista.
+
+Un filtro por almacén solo deja pasar eventos con ese almacén; los eventos
+sin almacén pasan únicamente a suscripciones sin filtro de almacén.
+"""
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.utils import timezone
+
+from .events import event_bus
+from .models import NotificationSubscription, Order, OrderEvent
+
+GROUP_PREFIX = 'order_events'
+STATUSES = [code for code, _ in Order.STATUS_CHOICES]
+# Campo del filtro en NotificationSubscription -> campo del evento
+FILTER_FIELDS = {
+    'statuses': 'status',
+    'payment_methods': 'payment_method',
+    'warehouses': 'warehouse',
+}
+
+
+def status_group(status):
+    return f'{GROUP_PREFIX}.{status}'
+
+
+def default_batch_window_ms():
+    return getattr(settings, 'NOTIFICATION_BATCH_WINDOW_MS', 250)
+
+
+def replay_limit():
+    return getattr(settings, 'NOTIFICATION_REPLAY_LIMIT', 500)
+
+
+def event_payload(event):
+    return {
+        'id': event.id,
+        'order_id': event.order_id,
+        'status': event.status,
+        'previous_status': event.previous_status,
+        'payment_method': event.payment_method,
+        'warehouse': event.warehouse,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+def record_status_change(order, previous_status):
+    """Guarda el OrderEvent y lo publica cuando la transacción confirme."""
+    event = OrderEvent.objects.create(
+        order_id=order.id,
+        status=order.status,
+        previous_status=previous_status or '',
+        payment_method=order.payment_method,
+    )
+    event_bus.publish(status_group(event.status), {
+        'type': 'order_event',
+        'event': event_payload(event),
+        # Cliente atrasado: solo le queda pendiente el último estado de cada orden
+        'coalesce_key': f'order:{event.order_id}',
+    })
+    return event
+
+
+def subscription_settings(user):
+    """(filtros, ventana en segundos) del usuario; sin suscripción no hay filtros."""
+    subscription = NotificationSubscription.objects.filter(user=user).first()
+    filters = {name: [] for name in FILTER_FIELDS}
+    window_ms = default_batch_window_ms()
+    if subscription is not None:
+        filters = {name: list(getattr(subscription, name) or []) for name in FILTER_FIELDS}
+        if subscription.batch_window_ms is not None:
+            window_ms = subscription.batch_window_ms
+    return filters, window_ms / 1000
+
+
+def groups_for(filters):
+    return [status_group(status) for status in (filters.get('statuses') or STATUSES)]
+
+
+def matches(filters, payload):
+    for name, field in FILTER_FIELDS.items():
+        allowed = filters.get(name)
+        if allowed and payload.get(field) not in allowed:
+            return False
+    return True
+
+
+def parse_cursor(query_string):
+    values = parse_qs(query_string.decode() if isinstance(query_string, bytes) else query_string).get('cursor')
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+def replay(filters, cursor, limit=None):
+    """
+    Eventos posteriores a cursor que pasan los filtros, o None si el
+    cliente tiene que recargar (demasiados eventos o cursor ya depurado).
+    """
+    limit = replay_limit() if limit is None else limit
+    oldest = OrderEvent.objects.order_by('id').values_list('id', flat=True).first()
+    if oldest is not None and cursor < oldest - 1:
+        return None
+    events = OrderEvent.objects.filter(id__gt=cursor).order_by('id')
+    for name, field in FILTER_FIELDS.items():
+        if filters.get(name):
+            events = events.filter(**{f'{field}__in': filters[name]})
+    events = list(events[:limit + 1])
+    if len(events) > limit:
+        return None
+    return [event_payload(event) for event in events]
+
+
+def prune_events(days=None, now=None):
+    """Borra los eventos más viejos que days (por defecto ORDER_EVENT_RETENTION_DAYS)."""
+    if days is None:
+        days = getattr(settings, 'ORDER_EVENT_RETENTION_DAYS', 7)
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    deleted, _ = OrderEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,132 @@
+"""
+Descarga de comprobantes en lote (cierre del día).
+
+Los comprobantes se toman del cache en disco de sales.receipts; los que
+faltan se renderizan en paralelo en un ProcessPoolExecutor (cada proceso
+escribe su PDF a disco y devuelve solo la ruta) por tandas de
+BATCH_CHUNK_SIZE órdenes, así que el proceso web nunca tiene todos los PDF
+en memoria. Los procesos se crean con spawn, no con fork: un hijo
+forkeado heredaría las conexiones a la base y el estado de los hilos del
+proceso web (AuditWriter, EventBus); sales.receipt_worker prepara Django en
+cada hijo.
+
+El ZIP se escribe en streaming con zipfile sobre un pseudo-archivo que
+entrega lo escrito a StreamingHttpResponse, copiando cada PDF por bloques.
+No se ofrece un PDF único: unir las páginas obliga a tener todos los
+comprobantes en memoria antes de escribirlo.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from reports.artifacts import write_atomic
+from .models import OrderItem
+from . import receipts
+from .receipt_worker import init_worker
+
+BATCH_CHUNK_SIZE = 50
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+def batch_max_orders():
+    return getattr(settings, 'RECEIPT_BATCH_MAX_ORDERS', 500)
+
+
+def batch_workers():
+    return getattr(settings, 'RECEIPT_BATCH_WORKERS', min(4, os.cpu_count() or 1))
+
+
+def _render_to(path, data):
+    # Corre en el proceso hijo: solo datos planos, sin base de datos
+    write_atomic(path, receipts.render_pdf(data))
+    return path
+
+
+def _items_by_order(order_ids):
+    items = {}
+    for item in OrderItem.objects.filter(order_id__in=order_ids).select_related('product').order_by('id'):
+        items.setdefault(item.order_id, []).append(item)
+    return items
+
+
+def iter_receipts(orders, variant=receipts.OPERATOR, workers=None):
+    """
+    (orden, ruta del PDF) en el orden de orders; orders debe traer user
+    (select_related). Los faltantes de cada tanda se renderizan en paralelo.
+    """
+    workers = batch_workers() if workers is None else workers
+    executor = None
+    try:
+        for start in range(0, len(orders), BATCH_CHUNK_SIZE):
+            chunk = orders[start:start + BATCH_CHUNK_SIZE]
+            paths = {order.id: receipts.receipt_path(order, variant) for order in chunk}
+            missing = [order for order in chunk if not paths[order.id].exists()]
+            missing_ids = {order.id for order in missing}
+            items = _items_by_order(missing_ids) if missing else {}
+
+            pending = {}
+            for order in missing:
+                data = receipts.receipt_data(order, items.get(order.id, []), variant)
+                if workers > 1 and len(missing) > 1:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(
+                            max_workers=workers,
+                            mp_context=multiprocessing.get_context('spawn'),
+                            initializer=init_worker,
+                        )
+                    pending[order.id] = executor.submit(_render_to, str(paths[order.id]), data)
+                else:
+                    _render_to(str(paths[order.id]), data)
+
+            for order in chunk:
+                if order.id in pending:
+                    pending[order.id].result()
+                if order.id in missing_ids:
+                    receipts.remove_old_versions(order, variant, paths[order.id])
+                yield order, paths[order.id]
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+class _ZipSink:
+    """Pseudo-archivo no posicionable: junta lo que escribe zipfile hasta que se retira."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def stream_zip(receipt_iter, filename):
+    def generate():
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for order, path in receipt_iter:
+                with open(path, 'rb') as src, archive.open(receipts.receipt_filename(order), 'w') as dest:
+                    while True:
+                        block = src.read(COPY_BLOCK_SIZE)
+                        if not block:
+                            break
+                        dest.write(block)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+
+    response = StreamingHttpResponse(generate(), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
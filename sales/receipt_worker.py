@@ -0,0 +1,16 @@
+"""
+Inicialización de los procesos que renderizan comprobantes en lote
+(sales.receipt_batch).
+
+Se importa en el proceso hijo antes que Django, así que no puede depender
+de modelos ni de settings a nivel de módulo.
+"""
+import django
+
+
+def init_worker():
+    # spawn: intérprete nuevo sin apps cargadas; DJANGO_SETTINGS_MODULE llega por el entorno
+    django.setup()
+    from django.db import connections
+    # El hijo nunca usa la base; no debe conservar conexiones abiertas
+    connections.close_all()
@@ -0,0 +1,141 @@
+"""
+Comprobantes PDF (nota de venta) de las órdenes.
+
+Estilos, TableStyle y anchos de columna se arman una vez por proceso. La
+orden se lee con su usuario y los ítems con sus productos en una consulta,
+y el PDF se escribe en MEDIA_ROOT/receipts con un nombre que incluye
+updated_at: mientras la orden no cambie, las descargas siguientes sirven
+ese archivo (con ETag y rangos, ver reports.artifacts.serve) sin volver a
+renderizar. Al guardarse la orden cambia el nombre y la versión anterior se
+borra cuando se genera la nueva.
+
+render_pdf recibe solo datos planos (receipt_data) para poder ejecutarse
+en otro proceso (ver sales.receipt_batch).
+"""
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from reports.artifacts import write_atomic
+from .models import OrderItem
+
+RECEIPTS_SUBDIR = 'receipts'
+CONTENT_TYPE = 'application/pdf'
+
+STYLES = getSampleStyleSheet()
+ORDER_COL_WIDTHS = [150, 300]
+ITEMS_COL_WIDTHS = [200, 80, 100, 100]
+ITEMS_HEADER = ['Producto', 'Cantidad', 'Precio Unitario', 'Subtotal']
+
+
+def _table_style(align):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+
+
+ORDER_TABLE_STYLE = _table_style('LEFT')
+ITEMS_TABLE_STYLE = _table_style('CENTER')
+
+# Comprobante del cliente (OrderViewSet) y del operador (OrderManagementViewSet)
+CLIENT = 'client'
+OPERATOR = 'operator'
+VARIANTS = (CLIENT, OPERATOR)
+
+
+def receipts_dir() -> Path:
+    base = Path(getattr(settings, 'MEDIA_ROOT', 'media')) / RECEIPTS_SUBDIR
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def receipt_filename(order):
+    return f'nota_venta_{order.id}.pdf'
+
+
+def receipt_path(order, variant=CLIENT):
+    version = int(order.updated_at.timestamp() * 1_000_000)
+    return receipts_dir() / f'order_{order.id}_{variant}_{version}.pdf'
+
+
+def receipt_data(order, items, variant=CLIENT):
+    """Textos del comprobante; order debe traer user (select_related)."""
+    user = order.user
+    if variant == OPERATOR:
+        money = 'Bs {}'.format
+        client = f"{user.first_name} {user.last_name} (@{user.username})"
+        total_with_shipping = float(order.total) + float(order.shipping_cost)
+    else:
+        money = '${}'.format
+        client = user.username
+        total_with_shipping = order.total + order.shipping_cost
+    return {
+        'order_info': [
+            ['Número de Orden:', str(order.id)],
+            ['Fecha:', order.created_at.strftime('%Y-%m-%d %H:%M:%S')],
+            ['Cliente:', client],
+            ['Dirección de Envío:', order.address],
+            ['Estado:', order.status],
+            ['Total:', money(order.total)],
+            ['Costo de Envío:', money(order.shipping_cost)],
+            ['Total con Envío:', money(total_with_shipping)],
+        ],
+        'items': [
+            [item.product.name, str(item.quantity), money(item.price), money(item.subtotal)]
+            for item in items
+        ],
+    }
+
+
+def render_pdf(data):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+
+    order_table = Table(data['order_info'], colWidths=ORDER_COL_WIDTHS)
+    order_table.setStyle(ORDER_TABLE_STYLE)
+    items_table = Table([ITEMS_HEADER] + data['items'], colWidths=ITEMS_COL_WIDTHS)
+    items_table.setStyle(ITEMS_TABLE_STYLE)
+
+    doc.build([
+        Paragraph("Nota de Venta", STYLES['Title']),
+        Spacer(1, 12),
+        order_table,
+        Spacer(1, 12),
+        Paragraph("Productos", STYLES['Heading2']),
+        Spacer(1, 12),
+        items_table,
+    ])
+    return buffer.getvalue()
+
+
+def load_items(order):
+    return list(OrderItem.objects.filter(order_id=order.id).select_related('product').order_by('id'))
+
+
+def remove_old_versions(order, variant, path):
+    """Borra los PDF de versiones anteriores de la orden; ya no se van a servir."""
+    for old in path.parent.glob(f'order_{order.id}_{variant}_*.pdf'):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def get_or_render(order, variant=CLIENT):
+    """Ruta del PDF de la orden en su versión actual; lo genera si no existe."""
+    path = receipt_path(order, variant)
+    if path.exists():
+        return path
+    write_atomic(path, render_pdf(receipt_data(order, load_items(order), variant)))
+    remove_old_versions(order, variant, path)
+    return path
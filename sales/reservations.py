@@ -0,0 +1,108 @@
+"""
+Reservas de stock para carritos (StockReservation).
+
+add_item aparta el stock con un UPDATE condicional sobre Product.stock y
+crea una reserva con vencimiento; remove_item y el barrido de vencidas lo
+devuelven, y el checkout convierte las reservas en la venta.
+
+Los cambios de estado se hacen con UPDATE ... WHERE status='ACTIVE' y
+marcan las filas (order o released_at), de modo que checkout, liberación
+y barrido pueden correr en paralelo sin bloquear filas y sin que una
+misma reserva se devuelva o se venda dos veces.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from products.stock import return_stock_bulk, take_stock
+from .models import StockReservation
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, 'CART_RESERVATION_TTL_MINUTES', 15))
+
+
+def reserve(cart, product_id, quantity):
+    """
+    Aparta quantity unidades para el carrito. Devuelve la reserva, o None si
+    no hay stock disponible. Renueva el vencimiento de las demás reservas
+    activas del carrito.
+    """
+    now = timezone.now()
+    expires_at = now + reservation_ttl()
+    with transaction.atomic():
+        if not take_stock(product_id, quantity):
+            return None
+        cart.reservations.filter(status='ACTIVE').update(expires_at=expires_at)
+        return StockReservation.objects.create(
+            cart=cart, product_id=product_id, quantity=quantity, expires_at=expires_at
+        )
+
+
+def _finish(queryset, status):
+    """
+    Pasa a status las reservas activas del queryset y devuelve al stock solo
+    las que este llamado cambió (marcadas con su propio released_at).
+    """
+    stamp = timezone.now()
+    with transaction.atomic():
+        changed = queryset.filter(status='ACTIVE').update(status=status, released_at=stamp)
+        if not changed:
+            return 0
+        released = (
+            queryset.filter(status=status, released_at=stamp)
+            .values('product_id')
+            .annotate(total=Sum('quantity'))
+            .order_by()
+        )
+        return_stock_bulk({row['product_id']: row['total'] for row in released})
+    return changed
+
+
+def release(cart, product_id=None):
+    """Libera las reservas activas del carrito (de un producto o todas)."""
+    queryset = cart.reservations.all()
+    if product_id is not None:
+        queryset = queryset.filter(product_id=product_id)
+    return _finish(queryset, 'RELEASED')
+
+
+def release_expired(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Devuelve al stock las reservas activas vencidas, por lotes. Devuelve cuántas."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(status='ACTIVE', expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += _finish(StockReservation.objects.filter(id__in=ids), 'EXPIRED')
+
+
+def convert(cart_id, order):
+    """
+    Convierte en venta todas las reservas activas del carrito (incluso las
+    vencidas que el barrido todavía no liberó, cuyo stock sigue apartado).
+    Devuelve {product_id: cantidad reservada}. Debe llamarse dentro de la
+    transacción del checkout.
+    """
+    changed = StockReservation.objects.filter(cart_id=cart_id, status='ACTIVE').update(
+        status='CONVERTED', order=order, released_at=timezone.now()
+    )
+    if not changed:
+        return {}
+    return {
+        row['product_id']: row['total']
+        for row in StockReservation.objects.filter(order=order)
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    }
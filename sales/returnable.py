@@ -0,0 +1,87 @@
+"""
+Órdenes del cliente que todavía pueden devolverse (my_orders_for_return).
+
+Las órdenes se leen con sus ítems, productos y la devolución abierta de
+cada ítem en consultas fijas (Prefetch), sin importar cuántos ítems haya.
+Las páginas ya armadas se guardan en el cache de Django bajo una versión
+por usuario que las señales de sales.signals incrementan cuando cambian
+sus órdenes o devoluciones; RETURNABLE_ORDERS_CACHE_SECONDS acota lo que
+puede quedar desactualizado en otros procesos.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Order, OrderItem, Return
+
+RETURNABLE_STATUSES = ('DELIVERED', 'PAID')
+OPEN_RETURN_STATUSES = ('REQUESTED', 'APPROVED', 'PROCESSING')
+RETURN_WINDOW_DAYS = 30
+
+
+def returnable_orders(user, now=None):
+    since = (now or timezone.now()) - timedelta(days=RETURN_WINDOW_DAYS)
+    open_returns = Return.objects.filter(status__in=OPEN_RETURN_STATUSES).order_by('-requested_at')
+    items = (
+        OrderItem.objects.select_related('product')
+        .prefetch_related(Prefetch('returns', queryset=open_returns, to_attr='open_returns'))
+        .order_by('id')
+    )
+    return (
+        Order.objects.filter(user=user, status__in=RETURNABLE_STATUSES, created_at__gte=since)
+        .prefetch_related(Prefetch('items', queryset=items))
+        .order_by('-created_at', '-id')
+    )
+
+
+def serialize_order(order):
+    items = []
+    for item in order.items.all():
+        existing_return = item.open_returns[0] if item.open_returns else None
+        items.append({
+            'id': item.id,
+            'product_id': item.product.id,
+            'product_name': item.product.name,
+            'product_sku': item.product.sku,
+            'quantity': item.quantity,
+            'price': item.price,
+            'subtotal': item.subtotal,
+            'can_return': not existing_return,
+            'existing_return_id': existing_return.id if existing_return else None,
+            'existing_return_status': existing_return.get_status_display() if existing_return else None,
+        })
+    return {
+        'id': order.id,
+        'created_at': order.created_at,
+        'status': order.status,
+        'total': order.total,
+        'items': items,
+    }
+
+
+def _version_key(user_id):
+    return f'returnable-orders:v:{user_id}'
+
+
+def _new_version():
+    # Si la versión se pierde (desalojo), la nueva no choca con páginas viejas
+    return int(timezone.now().timestamp() * 1000)
+
+
+def cache_key(user_id, full_path):
+    version = cache.get_or_set(_version_key(user_id), _new_version, timeout=None)
+    return f'returnable-orders:{user_id}:{version}:{full_path}'
+
+
+def cache_timeout():
+    return getattr(settings, 'RETURNABLE_ORDERS_CACHE_SECONDS', 60)
+
+
+def invalidate(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), _new_version(), timeout=None)
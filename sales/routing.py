@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import NotificationConsumer, OrderConsumer
+
+websocket_urlpatterns = [
+    path('ws/orders/', OrderConsumer.as_asgi()),
+    path('ws/notificaciones/', NotificationConsumer.as_asgi()),
+]
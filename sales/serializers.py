@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Cart, CartItem, Order, OrderItem, Payment, Return
+from .models import Cart, CartItem, NotificationSubscription, Order, OrderItem, Payment, Return
 from products.models import Product
 
 class ProductCompactSerializer(serializers.ModelSerializer):
@@ -155,3 +155,18 @@ class ReturnCreateSerializer(serializers.ModelSerializer):
         validated_data['order'] = order_item.order
         
         return super().create(validated_data)
+
+
+class NotificationSubscriptionSerializer(serializers.ModelSerializer):
+    """Filtros de notificaciones de órdenes; lista vacía = todos"""
+    statuses = serializers.ListField(child=serializers.ChoiceField(choices=Order.STATUS_CHOICES), required=False)
+    payment_methods = serializers.ListField(
+        child=serializers.ChoiceField(choices=Order.PAYMENT_METHOD_CHOICES), required=False
+    )
+    warehouses = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+    batch_window_ms = serializers.IntegerField(min_value=0, max_value=10000, required=False, allow_null=True)
+
+    class Meta:
+        model = NotificationSubscription
+        fields = ['statuses', 'payment_methods', 'warehouses', 'batch_window_ms', 'updated_at']
+        read_only_fields = ['updated_at']
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Order, Return
+from . import notifications, returnable
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Return)
+@receiver(post_delete, sender=Return)
+def invalidate_returnable_orders(sender, instance, **kwargs):
+    # Al confirmar, para que ninguna lectura vuelva a cachear el estado anterior
+    transaction.on_commit(lambda: returnable.invalidate(instance.user_id))
+
+
+@receiver(post_save, sender=Order)
+def publish_order_status_change(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    previous = None if created else getattr(instance, '_loaded_status', _UNKNOWN)
+    # Sin estado leído de la base (orden armada a mano) no se sabe si cambió
+    if previous is _UNKNOWN or previous == instance.status:
+        return
+    notifications.record_status_change(instance, previous)
+    instance._loaded_status = instance.status
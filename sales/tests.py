@@ -1,3 +1,516 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Category, InventoryMovement, Product
+from users.models import User
+from . import checkout, events, notifications, receipt_batch, receipts, reservations
+from .consumers import NotificationConsumer
+from .models import Cart, CartItem, NotificationSubscription, Order, OrderEvent, OrderItem, Return, StockReservation
+
+URL = '/api/v1/devoluciones/my_orders_for_return/'
+
+
+class MyOrdersForReturnTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('returns_client', 'c@example.com', 'x', role='CLIENT')
+        category = Category.objects.create(name='Returns')
+        cls.products = [
+            Product.objects.create(name=f'P{i}', category=category, sku=f'RET-{i}', price=Decimal('10.00'), stock=10)
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.user, status='DELIVERED', total=Decimal('50.00'), address='x')
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=1, price=product.price) for product in self.products
+            ])
+
+    def _queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_constant_query_count(self):
+        self._orders(2)
+        few = self._queries()
+        self._orders(10)
+        self.assertEqual(self._queries(), few)
+
+    def test_open_return_is_attached_to_its_item(self):
+        self._orders(1)
+        item = OrderItem.objects.filter(order__user=self.user).order_by('id').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            ret = Return.objects.create(
+                order=item.order, order_item=item, user=self.user, reason='DEFECTIVE', description='x'
+            )
+        data = self.client.get(URL).json()
+        self.assertEqual(data['count'], 1)
+        items = {i['id']: i for i in data['results'][0]['items']}
+        self.assertFalse(items[item.id]['can_return'])
+        self.assertEqual(items[item.id]['existing_return_id'], ret.id)
+        self.assertEqual(sum(i['can_return'] for i in items.values()), len(self.products) - 1)
+
+    def test_cached_page_is_invalidated_on_change(self):
+        self._orders(1)
+        self.assertEqual(self.client.get(URL).json()['count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(user=self.user, status='PAID', total=Decimal('5.00'), address='x')
+        self.assertEqual(self.client.get(URL).json()['count'], 2)
+
+    def test_page_is_served_from_cache(self):
+        self._orders(1)
+        self.client.get(URL)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(URL).json()['count'], 1)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class ReceiptTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('receipt_client', 'r@example.com', 'x', role='CLIENT')
+        cls.operator = User.objects.create_user('receipt_operator', 'o@example.com', 'x', role='OPERATOR')
+        category = Category.objects.create(name='Receipts')
+        cls.order = Order.objects.create(
+            user=cls.user, status='PAID', total=Decimal('30.00'), shipping_cost=Decimal('5.00'), address='x'
+        )
+        for i in range(3):
+            product = Product.objects.create(
+                name=f'R{i}', category=category, sku=f'RCPT-{i}', price=Decimal('10.00'), stock=10
+            )
+            OrderItem.objects.create(order=cls.order, product=product, quantity=1, price=product.price)
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, AUDIT_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        if response.status_code == 200:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_repeat_download_does_not_render(self):
+        url = f'/api/v1/pedidos/{self.order.id}/comprobante/'
+        with mock.patch.object(receipts, 'render_pdf', wraps=receipts.render_pdf) as render:
+            first = self._get(url)
+            second = self._get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+    def test_items_are_loaded_in_one_query(self):
+        order = Order.objects.select_related('user').get(pk=self.order.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            receipts.get_or_render(order)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_saving_the_order_replaces_the_cached_receipt(self):
+        first = receipts.get_or_render(self.order)
+        self.order.status = 'DELIVERED'
+        self.order.save()
+        second = receipts.get_or_render(self.order)
+        self.assertNotEqual(first, second)
+        self.assertFalse(first.exists())
+
+    def test_operator_receipt_uses_its_own_layout(self):
+        self.client.force_authenticate(self.operator)
+        response = self._get(f'/api/v1/ordenes/{self.order.id}/comprobante/')
+        self.assertEqual(response.status_code, 200)
+        data = receipts.receipt_data(self.order, receipts.load_items(self.order), receipts.OPERATOR)
+        self.assertEqual(dict(data['order_info'])['Total con Envío:'], 'Bs 35.0')
+        self.assertEqual(len(list(receipts.receipts_dir().glob(f'order_{self.order.id}_operator_*.pdf'))), 1)
+
+
+class ReceiptBatchTests(TestCase):
+    URL = '/api/v1/ordenes/comprobantes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('batch_client', 'b@example.com', 'x', role='CLIENT')
+        cls.operator = User.objects.create_user('batch_operator', 'bo@example.com', 'x', role='OPERATOR')
+        category = Category.objects.create(name='Batch')
+        product = Product.objects.create(name='B', category=category, sku='BATCH-0', price=Decimal('10.00'), stock=10)
+        cls.orders = []
+        for _ in range(4):
+            order = Order.objects.create(user=cls.user, status='PAID', total=Decimal('10.00'), address='x')
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+            cls.orders.append(order)
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, AUDIT_ASYNC=False, RECEIPT_BATCH_WORKERS=2, RECEIPT_BATCH_MAX_ORDERS=10
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.operator)
+
+    def _zip(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_zip_by_ids_renders_in_worker_processes(self):
+        ids = [order.id for order in self.orders[:3]]
+        with mock.patch.object(receipt_batch, 'ProcessPoolExecutor', wraps=receipt_batch.ProcessPoolExecutor) as pool:
+            archive = self._zip(ids=','.join(map(str, ids)))
+        # Sin fork: los hijos no heredan conexiones ni hilos del proceso web
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        self.assertEqual(archive.namelist(), [f'nota_venta_{i}.pdf' for i in ids])
+        for name in archive.namelist():
+            self.assertTrue(archive.read(name).startswith(b'%PDF'))
+        self.assertEqual(len(list(receipts.receipts_dir().glob('order_*_operator_*.pdf'))), 3)
+
+    def test_zip_by_date_range_reuses_cached_receipts(self):
+        receipts.get_or_render(Order.objects.select_related('user').get(pk=self.orders[0].pk), receipts.OPERATOR)
+        today = self.orders[0].created_at.date().isoformat()
+        with mock.patch.object(receipt_batch, '_render_to', wraps=receipt_batch._render_to) as render, \
+                override_settings(RECEIPT_BATCH_WORKERS=1):
+            archive = self._zip(start_date=today, end_date=today)
+        self.assertEqual(len(archive.namelist()), len(self.orders))
+        self.assertEqual(render.call_count, len(self.orders) - 1)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'ids': 'a,b'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'ids': '1', 'formato': 'rar'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'ids': '1', 'formato': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'start_date': '2000-01-01', 'end_date': '2000-01-02'}).status_code, 404)
+        with override_settings(RECEIPT_BATCH_MAX_ORDERS=2):
+            self.assertEqual(self.client.get(self.URL, {'ids': ','.join(str(o.id) for o in self.orders)}).status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(self.URL, {'ids': '1'}).status_code, 403)
+
+
+@override_settings(EVENT_BUS_ASYNC=False, AUDIT_ASYNC=False)
+class StockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stock_client', 's@example.com', 'x', role='CLIENT')
+        cls.operator = User.objects.create_user('stock_operator', 'so@example.com', 'x', role='OPERATOR')
+        cls.category = Category.objects.create(name='Stock')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _product(self, stock, sku='STK-0'):
+        return Product.objects.create(name=sku, category=self.category, sku=sku, price=Decimal('10.00'), stock=stock)
+
+    def _stock(self, product):
+        product.refresh_from_db(fields=['stock'])
+        return product.stock
+
+    def _add(self, product, quantity):
+        return self.client.post('/api/v1/carrito/add_item/', {'product': product.id, 'quantity': quantity}, format='json')
+
+    def _checkout(self):
+        return self.client.post(
+            '/api/v1/checkout/', {'shipping_address': 'Calle 1', 'shipping_method': 'standard'}, format='json'
+        )
+
+    def _other_client(self, username):
+        user = User.objects.create_user(username, f'{username}@example.com', 'x', role='CLIENT')
+        other = APIClient()
+        other.force_authenticate(user)
+        return other, user
+
+    def test_checkout_beyond_stock_is_refused_with_shortages(self):
+        scarce, plenty = self._product(5), self._product(50, sku='STK-1')
+        self._add(scarce, 3)
+        self._add(plenty, 2)
+        # La reserva vence y otro cliente compra el stock liberado
+        reservations.release_expired(now=timezone.now() + timedelta(days=1))
+        other, _ = self._other_client('stock_rival')
+        other.post('/api/v1/carrito/add_item/', {'product': scarce.id, 'quantity': 4}, format='json')
+        self.assertEqual(other.post(
+            '/api/v1/checkout/', {'shipping_address': 'Calle 2', 'shipping_method': 'standard'}, format='json'
+        ).status_code, 200)
+
+        response = self._checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['products'], [
+            {'product_id': scarce.id, 'name': scarce.name, 'requested': 3, 'available': 1},
+        ])
+        # Nada se descontó: ni el producto escaso ni el que sí alcanzaba
+        self.assertEqual(self._stock(scarce), 1)
+        self.assertEqual(self._stock(plenty), 50)
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 2)
+
+    def test_competing_unreserved_carts_never_oversell(self):
+        product = self._product(5)
+        clients = [(self.client, self.user)] + [self._other_client(f'stock_rival_{i}') for i in range(2)]
+        for _, user in clients:
+            # Carritos anteriores a las reservas: el stock no está apartado
+            CartItem.objects.create(cart=Cart.objects.get_or_create(user=user)[0], product=product, quantity=2)
+        statuses = [
+            api.post(
+                '/api/v1/checkout/', {'shipping_address': 'Calle 1', 'shipping_method': 'standard'}, format='json'
+            ).status_code
+            for api, _ in clients
+        ]
+        self.assertEqual(statuses, [200, 200, 409])
+        self.assertEqual(self._stock(product), 1)
+
+    def test_surplus_reservation_is_returned(self):
+        product = self._product(5)
+        self._add(product, 3)
+        self.assertEqual(self._stock(product), 2)
+        CartItem.objects.filter(cart__user=self.user).update(quantity=1)
+
+        self.assertEqual(self._checkout().status_code, 200)
+        self.assertEqual(self._stock(product), 4)
+        self.assertEqual(StockReservation.objects.get(product=product).status, 'CONVERTED')
+
+    def test_cancelling_returns_stock_once(self):
+        product = self._product(5)
+        self._add(product, 3)
+        order_id = self._checkout().json()['id']
+        self.assertEqual(self._stock(product), 2)
+
+        self.client.force_authenticate(self.operator)
+        url = f'/api/v1/ordenes/{order_id}/actualizar_estado/'
+        self.assertEqual(self.client.post(url, {'status': 'CANCELLED'}, format='json').status_code, 200)
+        self.assertEqual(self._stock(product), 5)
+        self.assertEqual(InventoryMovement.objects.filter(product=product, movement_type='IN').get().quantity, 3)
+        # CANCELLED es final: un segundo pedido no vuelve a sumar
+        self.assertEqual(self.client.post(url, {'status': 'CANCELLED'}, format='json').status_code, 400)
+        self.assertEqual(self._stock(product), 5)
+
+    def test_cancel_after_concurrent_status_change_is_refused(self):
+        product = self._product(5)
+        self._add(product, 2)
+        order = Order.objects.get(pk=self._checkout().json()['id'])
+        Order.objects.filter(pk=order.pk).update(status='CANCELLED')
+        self.assertFalse(checkout.cancel_order(order))
+        self.assertEqual(self._stock(product), 3)
+
+
+class ReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hold_client', 'h@example.com', 'x', role='CLIENT')
+        cls.rival = User.objects.create_user('hold_rival', 'hr@example.com', 'x', role='CLIENT')
+        category = Category.objects.create(name='Holds')
+        cls.product = Product.objects.create(
+            name='H', category=category, sku='HOLD-0', price=Decimal('10.00'), stock=5
+        )
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+
+    def _stock(self):
+        self.product.refresh_from_db(fields=['stock'])
+        return self.product.stock
+
+    def test_reservation_beyond_stock_is_refused(self):
+        rival_cart = Cart.objects.create(user=self.rival)
+        self.assertIsNotNone(reservations.reserve(self.cart, self.product.id, 4))
+        self.assertIsNone(reservations.reserve(rival_cart, self.product.id, 2))
+        self.assertIsNone(reservations.reserve(self.cart, self.product.id, 2))
+        self.assertEqual(self._stock(), 1)
+        self.assertEqual(StockReservation.objects.count(), 1)
+
+    def test_reserve_then_convert(self):
+        reservations.reserve(self.cart, self.product.id, 2)
+        reservations.reserve(self.cart, self.product.id, 1)
+        order = Order.objects.create(user=self.user, total=Decimal('30.00'), address='x')
+        self.assertEqual(reservations.convert(self.cart.id, order), {self.product.id: 3})
+        # Convertidas: el stock queda vendido y el barrido no las devuelve
+        self.assertEqual(reservations.release_expired(now=timezone.now() + timedelta(days=1)), 0)
+        self.assertEqual(self._stock(), 2)
+        self.assertEqual(reservations.convert(self.cart.id, order), {})
+
+    def test_expired_reservations_are_returned_once(self):
+        reservations.reserve(self.cart, self.product.id, 3)
+        self.assertEqual(reservations.release_expired(), 0)
+        self.assertEqual(self._stock(), 2)
+
+        later = timezone.now() + reservations.reservation_ttl() + timedelta(seconds=1)
+        self.assertEqual(reservations.release_expired(now=later, batch_size=1), 1)
+        self.assertEqual(self._stock(), 5)
+        self.assertEqual(StockReservation.objects.get().status, 'EXPIRED')
+        # Ni un segundo barrido ni la liberación del carrito vuelven a sumar
+        self.assertEqual(reservations.release_expired(now=later), 0)
+        self.assertEqual(reservations.release(self.cart), 0)
+        self.assertEqual(self._stock(), 5)
+
+    def test_release_returns_only_that_product(self):
+        other = Product.objects.create(
+            name='H2', category=self.product.category, sku='HOLD-1', price=Decimal('1.00'), stock=5
+        )
+        reservations.reserve(self.cart, self.product.id, 2)
+        reservations.reserve(self.cart, other.id, 2)
+        self.assertEqual(reservations.release(self.cart, self.product.id), 1)
+        other.refresh_from_db(fields=['stock'])
+        self.assertEqual((self._stock(), other.stock), (5, 3))
+
+
+@override_settings(EVENT_BUS_ASYNC=False, AUDIT_ASYNC=False)
+class CheckoutEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('event_client', 'e@example.com', 'x', role='CLIENT')
+        category = Category.objects.create(name='Events')
+        product = Product.objects.create(name='E', category=category, sku='EVT-0', price=Decimal('10.00'), stock=5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/v1/carrito/add_item/', {'product': product.id, 'quantity': 1}, format='json')
+
+    def test_order_created_is_published_after_commit(self):
+        with mock.patch.object(events.event_bus, '_send') as send:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(
+                    '/api/v1/checkout/', {'shipping_address': 'Calle 1', 'shipping_method': 'standard'}, format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+            send.assert_not_called()
+            for callback in callbacks:
+                callback()
+        order_sends = [c for c in send.call_args_list if c.args[0] == events.ORDERS_GROUP]
+        self.assertEqual(len(order_sends), 1)
+        self.assertEqual(order_sends[0].args[1]['order_id'], response.json()['id'])
+
+
+@override_settings(EVENT_BUS_ASYNC=False)
+class OrderEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('notify_client', 'n@example.com', 'x', role='CLIENT')
+        cls.admin = User.objects.create_superuser('notify_admin', 'na@example.com', 'x')
+
+    def _order(self, **fields):
+        return Order.objects.create(user=self.user, total=Decimal('10.00'), address='x', **fields)
+
+    def test_status_changes_are_recorded_and_published(self):
+        with mock.patch.object(events.event_bus, '_send') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                order = self._order()
+            order = Order.objects.get(pk=order.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                order.status = 'PAID'
+                order.save()
+                order.address = 'y'
+                order.save()
+                order.save(update_fields=['address'])
+        self.assertEqual(
+            list(OrderEvent.objects.filter(order_id=order.id).values_list('previous_status', 'status')),
+            [('', 'PENDING'), ('PENDING', 'PAID')],
+        )
+        group, message = send.call_args_list[-1].args
+        self.assertEqual(group, 'order_events.PAID')
+        self.assertEqual(message['coalesce_key'], f'order:{order.id}')
+        self.assertEqual(message['event']['previous_status'], 'PENDING')
+        self.assertEqual(send.call_count, 2)
+
+    def test_replay_applies_filters_and_asks_for_resync(self):
+        self._order(payment_method='CASH')
+        cursor = OrderEvent.objects.latest('id').id
+        paypal = self._order(payment_method='PAYPAL')
+        self._order(payment_method='CASH', status='PAID')
+        filters = {'statuses': [], 'payment_methods': ['PAYPAL'], 'warehouses': []}
+        self.assertEqual([e['order_id'] for e in notifications.replay(filters, cursor)], [paypal.id])
+        self.assertIsNone(notifications.replay({}, cursor, limit=1))
+        OrderEvent.objects.filter(id__lte=cursor + 1).delete()
+        self.assertIsNone(notifications.replay({}, cursor))
+
+    def test_warehouse_filter_only_matches_events_with_that_warehouse(self):
+        payload = {'status': 'PAID', 'payment_method': 'CASH', 'warehouse': ''}
+        self.assertTrue(notifications.matches({'statuses': ['PAID'], 'warehouses': []}, payload))
+        self.assertFalse(notifications.matches({'warehouses': ['central']}, payload))
+        self.assertTrue(notifications.matches({'warehouses': ['central']}, dict(payload, warehouse='central')))
+        self.assertEqual(notifications.groups_for({'statuses': ['PAID']}), ['order_events.PAID'])
+
+    def test_subscription_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = '/api/v1/notificaciones/suscripcion/'
+        self.assertEqual(client.get(url).json()['statuses'], [])
+        response = client.put(url, {'statuses': ['PAID'], 'batch_window_ms': 100}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(notifications.subscription_settings(self.admin), (
+            {'statuses': ['PAID'], 'payment_methods': [], 'warehouses': []}, 0.1
+        ))
+        self.assertEqual(client.put(url, {'statuses': ['LOST']}, format='json').status_code, 400)
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(url).status_code, 403)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('ws_admin', 'ws@example.com', 'x')
+        NotificationSubscription.objects.create(user=self.admin, statuses=['PAID', 'SHIPPED'], batch_window_ms=50)
+        self.client_user = User.objects.create_user('ws_client', 'wc@example.com', 'x', role='CLIENT')
+
+    def _order(self, status):
+        return Order.objects.create(user=self.client_user, total=Decimal('10.00'), address='x', status=status)
+
+    def test_replay_then_batched_live_events(self):
+        self._order('PAID')
+        cursor = OrderEvent.objects.latest('id').id
+        missed = self._order('SHIPPED')
+        self._order('PENDING')
+
+        async def scenario():
+            communicator = ApplicationCommunicator(NotificationConsumer.as_asgi(), {
+                'type': 'websocket', 'path': '/ws/notificaciones/', 'query_string': f'cursor={cursor}'.encode(),
+                'headers': [], 'subprotocols': [], 'user': self.admin,
+            })
+            await communicator.send_input({'type': 'websocket.connect'})
+            self.assertEqual((await communicator.receive_output(2))['type'], 'websocket.accept')
+            replay = json.loads((await communicator.receive_output(2))['text'])
+
+            layer = get_channel_layer()
+            for event_id, status in ((900, 'PAID'), (901, 'SHIPPED'), (902, 'PAID')):
+                await layer.group_send(notifications.status_group(status), {'type': 'order_event', 'event': {
+                    'id': event_id, 'order_id': 77 if event_id < 902 else 78, 'status': status,
+                    'payment_method': 'CASH', 'warehouse': '',
+                }})
+            frame = json.loads((await communicator.receive_output(2))['text'])
+            self.assertTrue(await communicator.receive_nothing(0.1))
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(2)
+            return replay, frame
+
+        replay, frame = asyncio.run(scenario())
+        self.assertTrue(replay['replay'])
+        self.assertEqual([e['order_id'] for e in replay['events']], [missed.id])
+        self.assertEqual([(e['order_id'], e['status']) for e in frame['events']], [(77, 'SHIPPED'), (78, 'PAID')])
+        self.assertEqual(frame['cursor'], 902)
@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CartViewSet, CheckoutView, PaymentView, OrderViewSet, OrderManagementViewSet, PaymentManagementView, ReturnViewSet
+from .views import CartViewSet, CheckoutView, PaymentView, OrderViewSet, OrderManagementViewSet, PaymentManagementView, ReturnViewSet, NotificationSubscriptionView
 
 router = DefaultRouter()
 router.register(r'carrito', CartViewSet, basename='cart')
@@ -23,4 +23,6 @@ urlpatterns = [
     path('pagos/', PaymentView.as_view({'post': 'process_payment'}), name='process_payment_plural'),
     # Gestión de pagos para operadores/administradores
     path('gestion-pagos/', PaymentManagementView.as_view(), name='payment_management'),
+    # Filtros de notificaciones de órdenes por administrador (WebSocket ws/notificaciones/)
+    path('notificaciones/suscripcion/', NotificationSubscriptionView.as_view(), name='notification_subscription'),
 ] + router.urls
@@ -4,29 +4,22 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.db import transaction
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from django.db.models import F
+from django.core.cache import cache
 from django.http import HttpResponse
-from io import BytesIO
-# Importaciones condicionales para channels
-try:
-    from channels.layers import get_channel_layer
-    from asgiref.sync import async_to_sync
-    HAS_CHANNELS = True
-except ImportError:
-    HAS_CHANNELS = False
-    get_channel_layer = None
-    async_to_sync = None
-from .models import Cart, CartItem, Order, OrderItem, Payment, Return
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Cart, CartItem, NotificationSubscription, Order, Payment, Return
+from .checkout import EmptyCart, InsufficientStock, cancel_order, place_order
+from . import events, receipt_batch, receipts, reservations, returnable
 from django.core.exceptions import MultipleObjectsReturned
 from products.models import Product
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, CheckoutSerializer, PaymentSerializer, ReturnSerializer, ReturnCreateSerializer
+from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, CheckoutSerializer, PaymentSerializer, ReturnSerializer, ReturnCreateSerializer, NotificationSubscriptionSerializer
 from permissions import IsClient
 from users.permissions import IsAdminUser, IsOperator
-from logs.models import LogEntry
+from logs.audit import audit_writer
+from reports.artifacts import serve as serve_artifact
+from backend_salessmart.pagination import KeysetPagination
 
 class CartViewSet(viewsets.GenericViewSet):
     serializer_class = CartSerializer
@@ -79,14 +72,17 @@ class CartViewSet(viewsets.GenericViewSet):
             return Response({'detail': 'Producto no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product_id=product_id,
-                defaults={'quantity': quantity}
-            )
-            if not created:
-                item.quantity += quantity
-                item.save()
+            with transaction.atomic():
+                # Apartar el stock antes de agregar (UPDATE condicional, sin sobreventa)
+                if reservations.reserve(cart, product_id, quantity) is None:
+                    return Response({'detail': 'Stock insuficiente.'}, status=status.HTTP_409_CONFLICT)
+                item, created = CartItem.objects.get_or_create(
+                    cart=cart,
+                    product_id=product_id,
+                    defaults={'quantity': quantity}
+                )
+                if not created:
+                    CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') + quantity)
         except Exception as exc:
             return Response({'detail': 'No se pudo agregar al carrito.', 'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -99,7 +95,7 @@ class CartViewSet(viewsets.GenericViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Carrito: agregado product_id={product_id} qty={quantity}"
@@ -119,7 +115,9 @@ class CartViewSet(viewsets.GenericViewSet):
             product_id = int(product_id)
         except (TypeError, ValueError):
             return Response({'detail': 'ID de producto inválido.'}, status=status.HTTP_400_BAD_REQUEST)
-        CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+        with transaction.atomic():
+            CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+            reservations.release(cart, product_id)
 
         # Refrescar carrito para que items reflejen la eliminación
         cart.refresh_from_db()
@@ -130,7 +128,7 @@ class CartViewSet(viewsets.GenericViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Carrito: removido product_id={product_id}"
@@ -148,48 +146,18 @@ class CheckoutView(viewsets.ViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        cart = Cart.objects.filter(user=request.user).first()
-        if not cart or not cart.items.exists():
+        try:
+            order = place_order(request.user, serializer.validated_data['shipping_address'])
+        except EmptyCart:
             return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        except InsufficientStock as e:
+            return Response({
+                'error': 'Insufficient stock',
+                'products': [{'product_id': product_id, **detail} for product_id, detail in e.shortages.items()],
+            }, status=status.HTTP_409_CONFLICT)
 
-        with transaction.atomic():
-            order = Order.objects.create(
-                user=request.user,
-                total=cart.total,
-                shipping_cost=10.00,  # Fixed shipping cost, can be calculated based on method
-                address=serializer.validated_data['shipping_address']
-            )
-
-            for item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    price=item.product.price
-                )
-
-            cart.items.all().delete()  # Clear cart
-            
-            # Crear garantías automáticas de 1 año para todos los productos
-            order.create_warranties()
-
-        # Send WebSocket signal for new order (if channels available)
-        if HAS_CHANNELS and get_channel_layer:
-            try:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    "orders",
-                    {
-                        "type": "order_created",
-                        "message": f"New order #{order.id} created by {request.user.username}",
-                        "order_id": order.id
-                    }
-                )
-            except Exception as e:
-                # Log error but don't fail the order creation
-                print(f"WebSocket notification failed: {e}")
-        else:
-            print("WebSocket notifications disabled (channels not available)")
+        # Aviso por WebSocket después del commit, sin esperar a la capa de canales
+        events.order_created(order, request.user.username)
 
         order_serializer = OrderSerializer(order)
         try:
@@ -198,7 +166,7 @@ class CheckoutView(viewsets.ViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Checkout creado order_id={order.id} total={order.total}"
@@ -272,7 +240,7 @@ class PaymentView(viewsets.ViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Pago procesado order_id={order.id} metodo={method} status={payment_status} monto={payment.amount}"
@@ -348,7 +316,7 @@ class PaymentManagementView(APIView):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Pago procesado por admin/operador order_id={order.id} metodo={payment_method} status={payment_status} monto={payment.amount}"
@@ -362,103 +330,42 @@ class PaymentManagementView(APIView):
             'message': f'Pago procesado exitosamente para la orden #{order.id}'
         })
 
+class NotificationSubscriptionView(APIView):
+    """
+    Filtros de las notificaciones de órdenes del administrador (estado,
+    medio de pago, almacén) y ventana de agrupación; los aplica
+    NotificationConsumer en la próxima conexión.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        subscription = NotificationSubscription.objects.filter(user=request.user).first()
+        if subscription is None:
+            subscription = NotificationSubscription(user=request.user)
+        return Response(NotificationSubscriptionSerializer(subscription).data)
+
+    def put(self, request):
+        subscription, _ = NotificationSubscription.objects.get_or_create(user=request.user)
+        serializer = NotificationSubscriptionSerializer(subscription, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsClient]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        queryset = Order.objects.filter(user=self.request.user)
+        if self.action == 'comprobante':
+            queryset = queryset.select_related('user')
+        return queryset
 
     @action(detail=True, methods=['get'])
     def comprobante(self, request, pk=None):
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from django.http import HttpResponse
-        from io import BytesIO
-
         order = self.get_object()
-
-        # Create a file-like buffer to receive PDF data
-        buffer = BytesIO()
-
-        # Create the PDF object, using the buffer as its "file"
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        # Title
-        title = Paragraph("Nota de Venta", styles['Title'])
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-
-        # Order details
-        order_info = [
-            ['Número de Orden:', str(order.id)],
-            ['Fecha:', order.created_at.strftime('%Y-%m-%d %H:%M:%S')],
-            ['Cliente:', order.user.username],
-            ['Dirección de Envío:', order.address],
-            ['Estado:', order.status],
-            ['Total:', f"${order.total}"],
-            ['Costo de Envío:', f"${order.shipping_cost}"],
-            ['Total con Envío:', f"${order.total + order.shipping_cost}"],
-        ]
-
-        order_table = Table(order_info, colWidths=[150, 300])
-        order_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(order_table)
-        elements.append(Spacer(1, 12))
-
-        # Items header
-        items_title = Paragraph("Productos", styles['Heading2'])
-        elements.append(items_title)
-        elements.append(Spacer(1, 12))
-
-        # Items table
-        data = [['Producto', 'Cantidad', 'Precio Unitario', 'Subtotal']]
-        for item in order.items.all():
-            data.append([
-                item.product.name,
-                str(item.quantity),
-                f"${item.price}",
-                f"${item.subtotal}"
-            ])
-
-        items_table = Table(data, colWidths=[200, 80, 100, 100])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(items_table)
-
-        # Build PDF
-        doc.build(elements)
-
-        # Get the value of the BytesIO buffer and write it to the response
-        pdf = buffer.getvalue()
-        buffer.close()
-
-        # Create HTTP response
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="nota_venta_{order.id}.pdf"'
-        response.write(pdf)
+        path = receipts.get_or_render(order, receipts.CLIENT)
+        response = serve_artifact(request, path, receipts.receipt_filename(order), receipts.CONTENT_TYPE)
 
         # Log PDF download
         try:
@@ -467,7 +374,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Comprobante descargado order_id={order.id}"
@@ -489,7 +396,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Consulta estado order_id={order.id} status={order.status}"
@@ -511,7 +418,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Consulta historial_ordenes count={len(serializer.data)}"
@@ -527,10 +434,16 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsAdminUser | IsOperator]
+    # Páginas por cursor sobre sales_order_created_id_idx
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         # Operadores y administradores pueden ver todas las órdenes
-        return Order.objects.all().order_by('-created_at')
+        queryset = Order.objects.all().order_by('-created_at', '-id')
+        if self.action == 'comprobante':
+            queryset = queryset.select_related('user')
+        return queryset
     
     @action(detail=True, methods=['post'])
     def actualizar_estado(self, request, pk=None):
@@ -563,9 +476,15 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
                 'error': f'No se puede cambiar de {current_status} a {new_status}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Actualizar el estado
-        order.status = new_status
-        order.save()
+        # Actualizar el estado (al cancelar se devuelve el stock en la misma transacción)
+        if new_status == 'CANCELLED':
+            if not cancel_order(order, user=request.user):
+                return Response({
+                    'error': 'La orden cambió de estado mientras se procesaba la solicitud'
+                }, status=status.HTTP_409_CONFLICT)
+        else:
+            order.status = new_status
+            order.save()
         
         # Log de la acción
         try:
@@ -574,7 +493,7 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Estado actualizado order_id={order.id} de {current_status} a {new_status}"
@@ -617,7 +536,7 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Entrega confirmada order_id={order.id} pago_efectivo={order.payment_method == 'CASH'}"
@@ -631,99 +550,70 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
             'order': serializer.data
         })
     
+    @action(detail=False, methods=['get'])
+    def comprobantes(self, request):
+        """
+        Descargar comprobantes de varias órdenes en un ZIP
+        ?ids=1,2,3 o ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD, &formato=zip
+        """
+        formato = request.query_params.get('formato', 'zip').lower()
+        if formato != 'zip':
+            return Response({'error': 'Formato inválido (solo zip)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'ids debe ser una lista de números separados por comas'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start_date = parse_date(request.query_params.get('start_date', ''))
+            end_date = parse_date(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response({'error': 'Fecha inválida (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids and not start_date and not end_date:
+            return Response({'error': 'Indique ids o un rango de fechas (start_date, end_date)'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Order.objects.select_related('user').order_by('created_at', 'id')
+        if ids:
+            queryset = queryset.filter(id__in=ids)
+        if start_date:
+            queryset = queryset.filter(created_at__date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(created_at__date__lte=end_date)
+        max_orders = receipt_batch.batch_max_orders()
+        orders = list(queryset[:max_orders + 1])
+        if not orders:
+            return Response({'error': 'No hay órdenes para los filtros indicados'}, status=status.HTTP_404_NOT_FOUND)
+        if len(orders) > max_orders:
+            return Response({'error': f'Máximo {max_orders} órdenes por descarga'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ip = request.META.get('HTTP_X_FORWARDED_FOR')
+            if ip:
+                ip = ip.split(',')[0]
+            else:
+                ip = request.META.get('REMOTE_ADDR')
+            audit_writer.log(
+                ip_address=ip or 'IP_UNKNOWN',
+                user=request.user,
+                action=f"Comprobantes descargados por operador formato={formato} ordenes={len(orders)}"
+            )
+        except Exception:
+            pass
+
+        receipt_iter = receipt_batch.iter_receipts(orders, receipts.OPERATOR)
+        filename = f"comprobantes_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return receipt_batch.stream_zip(receipt_iter, filename)
+
     @action(detail=True, methods=['get'])
     def comprobante(self, request, pk=None):
         """
         Generar y descargar comprobante PDF de una orden (CU11)
         """
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from django.http import HttpResponse
-        from io import BytesIO
-
         order = self.get_object()
-
-        # Create a file-like buffer to receive PDF data
-        buffer = BytesIO()
-
-        # Create the PDF object, using the buffer as its "file"
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        # Title
-        title = Paragraph("Nota de Venta", styles['Title'])
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-
-        # Order details
-        order_info = [
-            ['Número de Orden:', str(order.id)],
-            ['Fecha:', order.created_at.strftime('%Y-%m-%d %H:%M:%S')],
-            ['Cliente:', f"{order.user.first_name} {order.user.last_name} (@{order.user.username})"],
-            ['Dirección de Envío:', order.address],
-            ['Estado:', order.status],
-            ['Total:', f"Bs {order.total}"],
-            ['Costo de Envío:', f"Bs {order.shipping_cost}"],
-            ['Total con Envío:', f"Bs {float(order.total) + float(order.shipping_cost)}"],
-        ]
-
-        order_table = Table(order_info, colWidths=[150, 300])
-        order_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(order_table)
-        elements.append(Spacer(1, 12))
-
-        # Items header
-        items_title = Paragraph("Productos", styles['Heading2'])
-        elements.append(items_title)
-        elements.append(Spacer(1, 12))
-
-        # Items table
-        data = [['Producto', 'Cantidad', 'Precio Unitario', 'Subtotal']]
-        for item in order.items.all():
-            data.append([
-                item.product.name,
-                str(item.quantity),
-                f"Bs {item.price}",
-                f"Bs {item.subtotal}"
-            ])
-
-        items_table = Table(data, colWidths=[200, 80, 100, 100])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(items_table)
-
-        # Build PDF
-        doc.build(elements)
-
-        # Get the value of the BytesIO buffer and write it to the response
-        pdf = buffer.getvalue()
-        buffer.close()
-
-        # Create HTTP response
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="nota_venta_{order.id}.pdf"'
-        response.write(pdf)
+        path = receipts.get_or_render(order, receipts.OPERATOR)
+        response = serve_artifact(request, path, receipts.receipt_filename(order), receipts.CONTENT_TYPE)
 
         # Log PDF download
         try:
@@ -732,7 +622,7 @@ class OrderManagementViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=request.user,
                 action=f"Comprobante descargado por operador order_id={order.id}"
@@ -746,6 +636,8 @@ class ReturnViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar devoluciones"""
     serializer_class = ReturnSerializer
     permission_classes = [IsAuthenticated]
+    # Solo ids numéricos: devoluciones/available_orders/ sigue hasta el ReturnViewSet de posventa
+    lookup_value_regex = r'\d+'
     
     def get_queryset(self):
         """Filtrar devoluciones según el rol del usuario"""
@@ -772,7 +664,7 @@ class ReturnViewSet(viewsets.ModelViewSet):
                 ip = ip.split(',')[0]
             else:
                 ip = self.request.META.get('REMOTE_ADDR')
-            LogEntry.objects.create(
+            audit_writer.log(
                 ip_address=ip or 'IP_UNKNOWN',
                 user=self.request.user,
                 action=f"Devolución solicitada #{return_obj.id} - Producto: {return_obj.order_item.product.name}"
@@ -822,50 +714,13 @@ class ReturnViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def my_orders_for_return(self, request):
-        """Obtener órdenes del usuario que pueden ser devueltas"""
-        user = request.user
-        
-        from datetime import timedelta
-        from django.utils import timezone
-        
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        orders = Order.objects.filter(
-            user=user,
-            status__in=['DELIVERED', 'PAID'],
-            created_at__gte=thirty_days_ago
-        ).prefetch_related('items__product')
-        
-        orders_data = []
-        for order in orders:
-            order_data = {
-                'id': order.id,
-                'created_at': order.created_at,
-                'status': order.status,
-                'total': order.total,
-                'items': []
-            }
-            
-            for item in order.items.all():
-                existing_return = Return.objects.filter(
-                    order_item=item,
-                    status__in=['REQUESTED', 'APPROVED', 'PROCESSING']
-                ).first()
-                
-                item_data = {
-                    'id': item.id,
-                    'product_id': item.product.id,
-                    'product_name': item.product.name,
-                    'product_sku': item.product.sku,
-                    'quantity': item.quantity,
-                    'price': item.price,
-                    'subtotal': item.subtotal,
-                    'can_return': not existing_return,
-                    'existing_return_id': existing_return.id if existing_return else None,
-                    'existing_return_status': existing_return.get_status_display() if existing_return else None
-                }
-                order_data['items'].append(item_data)
-            
-            orders_data.append(order_data)
-        
-        return Response(orders_data)
+        """Obtener órdenes del usuario que pueden ser devueltas (paginado)"""
+        key = returnable.cache_key(request.user.id, request.get_full_path())
+        data = cache.get(key)
+        if data is None:
+            # Órdenes, ítems con producto y devolución abierta: consultas fijas por página
+            orders = returnable.returnable_orders(request.user)
+            page = self.paginate_queryset(orders)
+            data = self.get_paginated_response([returnable.serialize_order(order) for order in page]).data
+            cache.set(key, data, returnable.cache_timeout())
+        return Response(data)